@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "FileConversion API"
@@ -9,6 +9,16 @@ class Settings(BaseSettings):
     # Server settings
     HOST: str = "0.0.0.0"
     PORT: int = 8080
+    SERVER_MODE: str = "development"  # "development" (one process, auto-reload) or "production", see run.py
+    SERVER_WORKERS: int = 0  # production server processes, 0 = one per CPU core
+    SERVER_LOOP: str = "auto"  # "auto" = uvloop when installed, else "asyncio"
+    SERVER_HTTP: str = "auto"  # "auto" = httptools when installed, else "h11"
+    SERVER_KEEP_ALIVE: int = 5  # seconds an idle connection is kept open
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # seconds in-flight requests get to finish on shutdown
+    SERVER_MAX_CONVERSIONS: int = 1000  # renders before a production worker is replaced, 0 = never
+    SERVER_MAX_CONVERSIONS_JITTER: int = 100  # up to this many more, so workers are not replaced together
+    SERVER_MAX_RSS: int = 1024 * 1024 * 1024  # replace a production worker once one of its processes uses more, 0 = never
+    SERVER_RECYCLE_CHECK_INTERVAL: float = 5.0  # seconds between recycling checks
     
     # CORS settings
     ALLOWED_ORIGINS: List[str] = ["*"]
@@ -16,11 +26,94 @@ class Settings(BaseSettings):
     # File upload settings
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: List[str] = [".md", ".txt", ".docx", ".pdf", ".html"]
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024  # 64KB
+    
+    # Batch conversion settings
+    BATCH_MAX_FILES: int = 500
+    BATCH_MAX_ARCHIVE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    BATCH_MAX_CONTENT_BYTES: int = 100 * 1024 * 1024  # markdown per batch once extracted
     
     # PDF settings
     PDF_MARGIN: int = 30  # mm
     PDF_FONT_SIZE_NORMAL: int = 16
     PDF_FONT_SIZE_HEADER: int = 32
+    PDF_THEME: str = "cursor"  # default theme, see app/services/theme_registry.py
+    PDF_CUSTOM_THEMES: Dict[str, Dict[str, str]] = {}  # extra palettes: name -> {color role: hex}
+    PDF_FONT_FILES: Dict[str, str] = {}  # TrueType stand-ins for the built-in fonts: "Helvetica", "Helvetica-Bold" or "Courier" -> .ttf path
+    
+    # Table settings
+    TABLE_LARGE_ROWS: int = 200  # tables with more rows use the paged large-table layout
+    TABLE_SAMPLE_ROWS: int = 500  # rows measured to size large-table columns
+    
+    # Image settings
+    ASSET_DIR: str = ""  # local directory images can be loaded from, empty = bundled images only
+    IMAGE_DPI: int = 150  # images are downscaled to this resolution at their size on the page
+    IMAGE_MAX_BYTES: int = 10 * 1024 * 1024  # larger image files are shown as their alt text
+    IMAGE_MAX_PIXELS: int = 40 * 1000 * 1000  # guard against decompression bombs
+    IMAGE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # decoded, resized bitmaps kept per process
+    
+    # Inline formatting settings
+    INLINE_MAX_LINE_LENGTH: int = 20000  # longer lines are rendered as plain text
+    INLINE_CACHE_SIZE: int = 4096  # formatted lines memoized per process
+    INLINE_CACHE_MAX_LINE_LENGTH: int = 512  # only lines up to this length are memoized
+    
+    # Preview settings (HTML and first-pages PDF)
+    PREVIEW_PAGES: int = 1  # pages a PDF preview lays out unless the request asks for more
+    PREVIEW_MAX_PAGES: int = 20
+    PARSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # tokenized documents kept by the server process
+    
+    # Output settings
+    PDF_MEMORY_OUTPUT_MAX_BYTES: int = 8 * 1024 * 1024  # larger PDFs spill to the spool directory
+    SPOOL_DIR: str = ""  # empty = <system temp dir>/fileconverter-spool
+    SPOOL_MAX_BYTES: int = 2 * 1024 * 1024 * 1024  # 2GB
+    SPOOL_MAX_AGE: int = 15 * 60  # seconds before an unsent spool file is swept
+    SPOOL_SWEEP_INTERVAL: int = 60  # seconds
+    PDF_STREAM_MIN_BYTES: int = 4 * 1024 * 1024  # uploads this large stream the PDF page by page unless ?stream=false
+    PDF_PARALLEL_MIN_CHARS: int = 512 * 1024  # larger documents are rendered in sections on several workers
+    PDF_STREAM_POLL_INTERVAL: float = 0.05  # seconds between checks for newly written pages
+    PDF_OUTPUT_PROFILE: str = "compact"  # "compact" (smaller files) or "fast" (quicker renders)
+    
+    # Render executor settings
+    RENDER_WORKERS: int = 0  # 0 = one worker process per CPU core
+    RENDER_QUEUE_SIZE: int = 64  # conversions allowed to wait for a free worker
+    RENDER_START_METHOD: str = "spawn"
+    RENDER_PREWARM: bool = True  # start workers and load ReportLab, fonts and themes at startup
+    RENDER_TIMEOUT: float = 300.0  # wall-clock seconds one render may take before its worker is killed, 0 = no limit
+    RENDER_CPU_LIMIT: int = 300  # CPU seconds one render may use, 0 = no limit
+    RENDER_MEMORY_LIMIT: int = 2 * 1024 * 1024 * 1024  # address space of a render worker, 0 = no limit
+    
+    # Admission control settings (conversion and job submission routes)
+    ADMISSION_MAX_CONCURRENT: int = 32  # requests in progress at once before new ones get 503, 0 = no limit
+    ADMISSION_CLIENT_RATE: float = 2.0  # tokens per second refilled per client (API key or IP), 0 = no rate limit
+    ADMISSION_CLIENT_BURST: float = 60.0  # tokens a client can save up, and the most one request costs
+    ADMISSION_COST_UNIT_BYTES: int = 256 * 1024  # a request costs 1 token plus 1 per this many upload bytes
+    ADMISSION_API_KEY_HEADER: str = "X-API-Key"  # clients sending one of ADMISSION_API_KEYS in it are limited by key, not IP
+    ADMISSION_API_KEYS: List[str] = []  # known API keys; any other value is ignored and the client limited by IP
+    ADMISSION_MAX_CLIENTS: int = 10000  # token buckets kept, least recently seen dropped first
+    ADMISSION_THROUGHPUT_WINDOW: float = 30.0  # seconds of finished requests the Retry-After estimate uses
+    ADMISSION_MAX_RETRY_AFTER: int = 60  # seconds
+    
+    # Job settings
+    JOB_QUEUE_BACKEND: str = "sqlite"  # "sqlite" or "memory"
+    JOB_DB_PATH: str = ""  # empty = <system temp dir>/fileconverter-jobs/jobs.db
+    JOB_RESULT_DIR: str = ""  # empty = <system temp dir>/fileconverter-jobs/results
+    JOB_WORKERS: int = 0  # jobs converted at once per server process, 0 = one per render worker
+    JOB_RESULT_TTL: int = 24 * 60 * 60  # seconds a finished job and its result are kept
+    JOB_STALE_AFTER: int = 60 * 60  # seconds before a job left running by a crash is retried
+    JOB_POLL_INTERVAL: float = 1.0  # seconds
+    JOB_SWEEP_INTERVAL: int = 60  # seconds
+    
+    # Result cache settings
+    CACHE_ENABLED: bool = True
+    CACHE_MEMORY_MAX_BYTES: int = 64 * 1024 * 1024  # 64MB
+    CACHE_MEMORY_TTL: int = 60 * 60  # seconds
+    CACHE_DISK_DIR: str = ""  # empty = <system temp dir>/fileconverter-cache
+    CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024  # 1GB, 0 disables the disk tier
+    CACHE_DISK_TTL: int = 24 * 60 * 60  # seconds
+    
+    # HTTP caching settings (conversion results and job downloads)
+    HTTP_CACHE_CONTROL: str = "private, no-cache"  # Cache-Control sent with results, empty = none
+    HTTP_ETAG_CACHE_SIZE: int = 1024  # stored result files whose ETag is remembered per process
     
     class Config:
         env_file = ".env"
@@ -1,10 +1,10 @@
 from fastapi import HTTPException
-from typing import Optional
+from typing import Dict, List, Optional
 
 class FileConversionError(HTTPException):
     """Base exception for file conversion errors"""
-    def __init__(self, detail: str, status_code: int = 500):
-        super().__init__(status_code=status_code, detail=detail)
+    def __init__(self, detail: str, status_code: int = 500, headers: Optional[Dict[str, str]] = None):
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
 
 class UnsupportedFileTypeError(FileConversionError):
     """Raised when file type is not supported"""
@@ -14,6 +14,14 @@ class UnsupportedFileTypeError(FileConversionError):
             status_code=400
         )
 
+class UnknownThemeError(FileConversionError):
+    """Raised when a request selects a theme that is not registered"""
+    def __init__(self, theme: str, available: List[str]):
+        super().__init__(
+            detail=f"Unknown theme '{theme}'. Available themes: {', '.join(available)}",
+            status_code=400
+        )
+
 class FileTooLargeError(FileConversionError):
     """Raised when file is too large"""
     def __init__(self, max_size: int):
@@ -22,6 +30,22 @@ class FileTooLargeError(FileConversionError):
             status_code=413
         )
 
+class BatchTooLargeError(FileConversionError):
+    """Raised when a batch upload contains too many files"""
+    def __init__(self, max_files: int):
+        super().__init__(
+            detail=f"Batch too large. Maximum is {max_files} files",
+            status_code=413
+        )
+
+class BatchContentTooLargeError(FileConversionError):
+    """Raised for a batch document past the batch's total of extracted markdown"""
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            detail=f"Batch content too large. Maximum is {max_bytes} bytes of markdown in total",
+            status_code=413
+        )
+
 class ConversionFailedError(FileConversionError):
     """Raised when file conversion fails"""
     def __init__(self, error: str):
@@ -29,3 +53,92 @@ class ConversionFailedError(FileConversionError):
             detail=f"Conversion failed: {error}",
             status_code=500
         )
+
+class RenderLimitExceededError(ConversionFailedError):
+    """Raised when a render is stopped for going over one of the render worker limits"""
+    limit = "unknown"
+
+    def __init__(self, error: str):
+        super().__init__(error)
+        # The document is too expensive to render, not the service broken
+        self.status_code = 422
+
+class RenderTimeoutError(RenderLimitExceededError):
+    """Raised when a render runs longer than RENDER_TIMEOUT"""
+    limit = "wall_clock"
+
+    def __init__(self, seconds: float):
+        super().__init__(f"rendering took longer than {seconds:g} seconds")
+
+class RenderCpuLimitError(RenderLimitExceededError):
+    """Raised when a render uses more than RENDER_CPU_LIMIT seconds of CPU time"""
+    limit = "cpu"
+
+    def __init__(self, seconds: int):
+        super().__init__(f"rendering used more than {seconds} seconds of CPU time")
+
+class RenderMemoryLimitError(RenderLimitExceededError):
+    """Raised when a render needs more memory than RENDER_MEMORY_LIMIT"""
+    limit = "memory"
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"rendering needed more than {max_bytes} bytes of memory")
+
+class RenderQueueFullError(FileConversionError):
+    """Raised when the render queue cannot accept more conversions"""
+    def __init__(self, queue_size: int):
+        super().__init__(
+            detail=f"Render queue is full ({queue_size} conversions waiting). Try again later",
+            status_code=503
+        )
+
+class TooManyRequestsError(FileConversionError):
+    """Raised when a client has used up its share of conversions for now"""
+    def __init__(self, retry_after: int):
+        super().__init__(
+            detail=f"Too many conversion requests. Try again in {retry_after} seconds",
+            status_code=429,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class ServiceOverloadedError(FileConversionError):
+    """Raised when the service is already running as many conversions as it accepts"""
+    def __init__(self, retry_after: int):
+        super().__init__(
+            detail=f"Service is busy with other conversions. Try again in {retry_after} seconds",
+            status_code=503,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class SpoolFullError(FileConversionError):
+    """Raised when the output spool directory has no room for another PDF"""
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            detail=f"Output spool is full (quota {max_bytes} bytes). Try again later",
+            status_code=503
+        )
+
+class RangeNotSatisfiableError(FileConversionError):
+    """Raised when a Range header asks for bytes past the end of a result"""
+    def __init__(self, size: int):
+        super().__init__(
+            detail=f"Requested range not satisfiable. The result is {size} bytes",
+            status_code=416,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+
+class JobNotFoundError(FileConversionError):
+    """Raised when a job id is unknown or its result has expired"""
+    def __init__(self, job_id: str):
+        super().__init__(
+            detail=f"Job '{job_id}' not found",
+            status_code=404
+        )
+
+class JobNotReadyError(FileConversionError):
+    """Raised when a job result is requested before the job succeeded"""
+    def __init__(self, job_id: str, state: str, error: Optional[str] = None):
+        detail = f"Job '{job_id}' is {state}"
+        if error:
+            detail = f"{detail}: {error}"
+        super().__init__(detail=detail, status_code=409)
@@ -0,0 +1,90 @@
+from typing import Collection, Dict
+from fastapi.responses import JSONResponse
+from app.core.exceptions import FileConversionError, FileTooLargeError
+
+# Room for multipart boundaries and part headers around the uploaded file
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject request bodies over a per-path limit while they are still arriving
+
+    A declared Content-Length over the limit is answered with 413 before any of
+    the body is read. Otherwise bytes are counted as the body streams in, and
+    the request fails with FileTooLargeError as soon as the limit is crossed,
+    before the multipart parser spools the rest to disk.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        max_body = limit + MULTIPART_OVERHEAD
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > max_body:
+                error = FileTooLargeError(limit)
+                response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    raise FileTooLargeError(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+class AdmissionControlMiddleware:
+    """
+    Admit or turn away requests to the given paths before their bodies are read
+
+    The client is identified by the api_key_header value when that is one of
+    api_keys and by its IP address otherwise, so a client cannot get a fresh
+    bucket by sending a new made-up key with every request. The upload size
+    is taken from the declared Content-Length. A rejected request is answered straight away
+    with the controller's 429 or 503 and its Retry-After header; an admitted
+    one holds its place until the response has been sent.
+    """
+
+    def __init__(self, app, paths: Collection[str], controller, api_key_header: str, api_keys: Collection[str]):
+        self.app = app
+        self.paths = paths
+        self.controller = controller
+        self.api_key_header = api_key_header.lower().encode("latin-1")
+        self.api_keys = frozenset(api_keys)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        client = f"ip:{scope['client'][0]}" if scope.get("client") else "ip:unknown"
+        size = None
+        for name, value in scope["headers"]:
+            if name == self.api_key_header and value.decode('latin-1') in self.api_keys:
+                client = f"key:{value.decode('latin-1')}"
+            elif name == b"content-length" and value.isdigit():
+                size = int(value)
+
+        try:
+            self.controller.admit(client, size)
+        except FileConversionError as error:
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code, headers=error.headers)
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, Mapping, Optional, Tuple
+import anyio
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Send
+from app.core.config import settings
+from app.core.exceptions import RangeNotSatisfiableError
+
+# Conditional requests and ranges only apply to these; other methods always get the whole result
+CONDITIONAL_METHODS = ("GET", "HEAD")
+
+def bytes_etag(data: bytes) -> str:
+    """Strong ETag of a result: the SHA-256 of its bytes"""
+    return f'"{hashlib.sha256(data).hexdigest()}"'
+
+class FileEtags:
+    """
+    ETags of result files, remembered by path, size and modification time
+
+    A stored job result is downloaded (and revalidated) many times but
+    never changes, so it is hashed once; a file replaced at the same path
+    has a different modification time and is hashed again.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+
+    def get(self, path: str) -> Tuple[str, int]:
+        """ETag and size of a file (blocking: it may read the whole file)"""
+        stat_result = os.stat(path)
+        key = (path, stat_result.st_size, stat_result.st_mtime_ns)
+        etag = self._entries.get(key)
+        if etag is not None:
+            self._entries.move_to_end(key)
+            return etag, stat_result.st_size
+        digest = hashlib.sha256()
+        with open(path, 'rb') as result_file:
+            for chunk in iter(lambda: result_file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()}"'
+        self._entries[key] = etag
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return etag, stat_result.st_size
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header lists etag (compared weakly, as that header is)"""
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+def byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    First and last byte a Range header asks for, or None to send the whole result
+
+    Only a single bytes range is served; several ranges, other units and
+    malformed headers get the whole result, which HTTP allows. Raises
+    RangeNotSatisfiableError for a range that starts past the end.
+    """
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash:
+        return None
+    try:
+        if not first:
+            # A suffix: the last N bytes
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise RangeNotSatisfiableError(size)
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiableError(size)
+    if start > end:
+        return None
+    return start, end
+
+class FileRangeResponse(Response):
+    """Bytes start to end (inclusive) of a file, read in chunks as they are sent"""
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+        send_header_only: bool = False
+    ):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = background
+        self.send_header_only = send_header_only
+        self.init_headers(headers)
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as result_file:
+                await result_file.seek(self.start)
+                remaining = self.end - self.start + 1
+                more_body = True
+                while more_body:
+                    chunk = await result_file.read(min(self.chunk_size, remaining)) if remaining else b''
+                    remaining -= len(chunk)
+                    # A file that shrank while it was sent ends the body early, so the client sees it cut short
+                    more_body = bool(chunk) and remaining > 0
+                    await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        if self.background is not None:
+            await self.background()
+
+class StreamAborted(Exception):
+    """Raised by a streamed body that cannot be finished, once its response has started"""
+
+class AbortableStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body can end it early by raising StreamAborted
+
+    Once the headers are out there is no status left to report an error
+    with. The response is left incomplete instead, so the server closes the
+    connection without the final chunk and the client sees the body cut
+    short rather than a truncated file that looks complete.
+    """
+
+    async def stream_response(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        try:
+            async for chunk in self.body_iterator:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        except StreamAborted:
+            return
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+async def result_response(
+    request: Request,
+    media_type: str,
+    data: Optional[bytes] = None,
+    path: Optional[str] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    background: Optional[BackgroundTask] = None
+) -> Response:
+    """
+    Response for a finished result, held in memory (data) or in a file (path)
+
+    Every response carries a strong ETag derived from the result's bytes,
+    its exact Content-Length and the HTTP_CACHE_CONTROL Cache-Control, so
+    identical results have the same validator however they were produced.
+    For GET and HEAD, an If-None-Match listing the ETag is answered with
+    304 and no body, and a single Range (unless an If-Range names another
+    ETag) with 206 and just those bytes. Other methods, such as the POST
+    conversions, always get the whole result, as HTTP requires.
+    """
+    if data is not None:
+        etag, size = bytes_etag(data), len(data)
+    else:
+        etag, size = await asyncio.to_thread(file_etags.get, path)
+    validators: Dict[str, str] = {"ETag": etag}
+    if settings.HTTP_CACHE_CONTROL:
+        validators["Cache-Control"] = settings.HTTP_CACHE_CONTROL
+
+    status_code = 200
+    start, end = 0, size - 1
+    method = request.method.upper()
+    if method in CONDITIONAL_METHODS:
+        validators["Accept-Ranges"] = "bytes"
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=validators, background=background)
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header is not None and (if_range is None or if_range.strip() == etag):
+            requested = byte_range(range_header, size)
+            if requested is not None:
+                status_code = 206
+                start, end = requested
+                validators["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response_headers = {**(headers or {}), **validators}
+    if data is not None:
+        content = data if status_code == 200 else data[start:end + 1]
+        return Response(content, status_code, response_headers, media_type, background)
+    return FileRangeResponse(
+        path, start, end, status_code, response_headers, media_type, background, send_header_only=method == "HEAD"
+    )
+
+# ETags of stored results, shared by every download in this process
+file_etags = FileEtags(settings.HTTP_ETAG_CACHE_SIZE)
@@ -0,0 +1,131 @@
+import importlib.util
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from socket import socket
+from typing import List, Optional
+import uvicorn
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# Connections waiting for a worker to accept them
+SOCKET_BACKLOG = 2048
+
+# A worker that exits sooner than this after starting is restarted after a pause
+MIN_WORKER_LIFETIME = 5.0
+
+multiprocessing.allow_connection_pickling()
+_spawn = multiprocessing.get_context("spawn")
+
+def _resolve(setting: str, fast: str, fallback: str) -> str:
+    """The implementation "auto" picks: the fast one when it is installed"""
+    if setting != "auto":
+        return setting
+    return fast if importlib.util.find_spec(fast) is not None else fallback
+
+def server_config() -> uvicorn.Config:
+    """uvicorn settings for app.main in production, taken from Settings"""
+    return uvicorn.Config(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        loop=_resolve(settings.SERVER_LOOP, "uvloop", "asyncio"),
+        http=_resolve(settings.SERVER_HTTP, "httptools", "h11"),
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        backlog=SOCKET_BACKLOG,
+        log_level="info"
+    )
+
+def _serve(config: uvicorn.Config, sockets: List[socket]):
+    """Body of a production worker process: serve on the shared sockets, retiring when recycled"""
+    config.configure_logging()
+    from app.services.worker_recycler import worker_recycler
+    worker_recycler.enable()
+    uvicorn.Server(config).run(sockets=sockets)
+
+class WorkerSupervisor:
+    """
+    Runs several uvicorn worker processes on one listening socket and keeps them running
+
+    The parent binds the socket and only supervises: a worker that exits,
+    whether it was recycled (see WorkerRecycler) or crashed, is replaced.
+    SIGTERM or SIGINT shuts down gracefully: every worker is asked to stop,
+    gets SERVER_GRACEFUL_TIMEOUT seconds to finish its in-flight requests
+    and conversions, and is killed only after that.
+    """
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.processes: List[Optional[multiprocessing.Process]] = [None] * workers
+        self.started: List[float] = [0.0] * workers
+        self.should_exit = threading.Event()
+
+    def _signal_handler(self, signum, frame):
+        self.should_exit.set()
+
+    def _start(self, index: int, sockets: List[socket]):
+        process = _spawn.Process(target=_serve, args=(self.config, sockets), daemon=False)
+        process.start()
+        self.processes[index] = process
+        self.started[index] = time.monotonic()
+        logger.info("Started worker process [%d]", process.pid)
+
+    def run(self):
+        sock = self.config.bind_socket()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._signal_handler)
+        logger.info(
+            "Started supervisor process [%d] with %d workers (event loop: %s, HTTP parser: %s)",
+            os.getpid(), self.workers, self.config.loop, self.config.http
+        )
+
+        for index in range(self.workers):
+            self._start(index, [sock])
+        while not self.should_exit.wait(0.5):
+            for index, process in enumerate(self.processes):
+                if process.is_alive():
+                    continue
+                logger.info("Worker process [%d] exited with code %s, replacing it", process.pid, process.exitcode)
+                if time.monotonic() - self.started[index] < MIN_WORKER_LIFETIME:
+                    # Probably failing on startup; do not spin
+                    if self.should_exit.wait(1.0):
+                        break
+                self._start(index, [sock])
+
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT + MIN_WORKER_LIFETIME
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Worker process [%d] did not stop in time, killing it", process.pid)
+                process.kill()
+                process.join()
+        sock.close()
+        logger.info("Stopped supervisor process [%d]", os.getpid())
+
+def server_workers() -> int:
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
+
+def run_production():
+    """
+    Serve with SERVER_WORKERS processes, uvloop and httptools where installed, and worker recycling
+
+    Each worker has its own render pool, so unless RENDER_WORKERS is set the
+    CPU cores are shared out between the workers' pools.
+    """
+    workers = server_workers()
+    if not settings.RENDER_WORKERS:
+        os.environ["RENDER_WORKERS"] = str(max(1, (os.cpu_count() or 1) // workers))
+    WorkerSupervisor(server_config(), workers).run()
+
+def run_development():
+    """A single process that reloads on code changes"""
+    uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=True, log_level="info")
@@ -1,7 +1,15 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import health, markdown_converter
+from app.routers import health, jobs, markdown_converter
 from app.core.config import settings
+from app.core.middleware import AdmissionControlMiddleware, UploadSizeLimitMiddleware
+from app.services.admission import admission_controller
+from app.services.job_service import job_service
+from app.services.markdown_service import render_worker_status, warm_up_render_worker
+from app.services.render_executor import render_executor
+from app.services.spool import pdf_spool
+from app.services.worker_recycler import worker_recycler
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -11,7 +19,34 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Add CORS middleware
+# Turn away conversions a client has no budget for, or the service no room for, before reading them
+app.add_middleware(
+    AdmissionControlMiddleware,
+    paths={
+        "/api/v1/convert/markdown-to-pdf",
+        "/api/v1/convert/markdown-to-pdf/batch",
+        "/api/v1/convert/markdown-to-pdf/preview",
+        "/api/v1/convert/markdown-to-html",
+        "/api/v1/jobs/markdown-to-pdf"
+    },
+    controller=admission_controller,
+    api_key_header=settings.ADMISSION_API_KEY_HEADER,
+    api_keys=settings.ADMISSION_API_KEYS
+)
+
+# Stop single-file uploads at MAX_FILE_SIZE, and batches at BATCH_MAX_ARCHIVE_SIZE, while they stream in
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/v1/convert/markdown-to-pdf": settings.MAX_FILE_SIZE,
+        "/api/v1/convert/markdown-to-pdf/batch": settings.BATCH_MAX_ARCHIVE_SIZE,
+        "/api/v1/convert/markdown-to-pdf/preview": settings.MAX_FILE_SIZE,
+        "/api/v1/convert/markdown-to-html": settings.MAX_FILE_SIZE,
+        "/api/v1/jobs/markdown-to-pdf": settings.MAX_FILE_SIZE
+    }
+)
+
+# Add CORS middleware (outermost, so rejected uploads still carry CORS headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -23,6 +58,44 @@ app.add_middleware(
 # Include routers
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(markdown_converter.router, prefix="/api/v1", tags=["converters"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
+
+@app.on_event("startup")
+async def start_spool_sweeper():
+    """Periodically delete spooled PDFs that were never sent"""
+    pdf_spool.sweep()
+    app.state.spool_sweeper = asyncio.create_task(pdf_spool.run_sweeper(settings.SPOOL_SWEEP_INTERVAL))
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Start background job workers"""
+    job_service.start()
+
+@app.on_event("startup")
+async def warm_up_render_workers():
+    """Start render workers in the background with ReportLab, fonts and themes already loaded"""
+    app.state.render_warm_up = None
+    if settings.RENDER_PREWARM:
+        app.state.render_warm_up = asyncio.create_task(
+            render_executor.warm_up(warm_up_render_worker, render_worker_status)
+        )
+
+@app.on_event("startup")
+async def start_worker_recycler():
+    """Retire this worker after SERVER_MAX_CONVERSIONS renders or past SERVER_MAX_RSS (production launcher only)"""
+    app.state.worker_recycler = None
+    if worker_recycler.enabled:
+        app.state.worker_recycler = asyncio.create_task(worker_recycler.run(settings.SERVER_RECYCLE_CHECK_INTERVAL))
+
+@app.on_event("shutdown")
+async def shutdown_background_work():
+    """Stop background tasks and render worker processes"""
+    for task in (app.state.render_warm_up, app.state.worker_recycler):
+        if task is not None:
+            task.cancel()
+    await job_service.stop()
+    render_executor.shutdown()
+    app.state.spool_sweeper.cancel()
 
 @app.get("/")
 async def root():
@@ -1,17 +1,43 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
+from app.services.admission import admission_controller
+from app.services.job_service import job_service
+from app.services.markdown_service import conversion_flights
+from app.services.metrics import metrics_registry
+from app.services.pdf_cache import pdf_cache
+from app.services.render_executor import render_executor
+from app.services.worker_recycler import worker_recycler
 
 router = APIRouter()
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint
+
+    "status" is liveness: the process is up and serving requests. "readiness"
+    says whether conversions run without a cold start; it stays false while
+    the render workers are still loading ReportLab, fonts and themes.
+    """
     return {
         "status": "healthy",
         "message": "Service is running",
-        "version": settings.VERSION
+        "version": settings.VERSION,
+        "readiness": render_executor.readiness()
     }
 
+@router.get("/health/live")
+async def liveness():
+    """Liveness probe: answers as long as the event loop does"""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness():
+    """Readiness probe: 503 until the render workers are warm, or if warming them failed"""
+    readiness = render_executor.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
+
 @router.get("/status")
 async def status():
     """Detailed status endpoint"""
@@ -19,5 +45,36 @@ async def status():
         "status": "running",
         "version": settings.VERSION,
         "project_name": settings.PROJECT_NAME,
-        "description": settings.PROJECT_DESCRIPTION
+        "description": settings.PROJECT_DESCRIPTION,
+        "render": render_executor.readiness(),
+        "worker": worker_recycler.stats(),
+        "admission": admission_controller.stats(),
+        "cache": pdf_cache.stats(),
+        "coalescing": conversion_flights.stats(),
+        "jobs": await job_service.stats()
     }
+
+async def current_gauges() -> list:
+    """Point-in-time values read when metrics are scraped"""
+    gauges = [
+        ("fileconverter_render_workers", "Render worker processes", {}, render_executor.max_workers),
+        ("fileconverter_render_ready", "1 once render workers are warm", {}, int(render_executor.readiness()["ready"])),
+        ("fileconverter_render_in_flight", "Conversions running in the render pool", {}, render_executor.in_flight),
+        ("fileconverter_render_queue_depth", "Conversions waiting for a render worker", {}, render_executor.queue_depth),
+        ("fileconverter_admission_in_flight", "Admitted conversion requests in progress", {}, admission_controller.in_flight),
+        ("fileconverter_coalescing_in_flight", "Distinct conversions that identical requests can join", {}, conversion_flights.in_flight)
+    ]
+    for state, count in (await job_service.stats()).items():
+        gauges.append(("fileconverter_jobs", "Background jobs by state", {"state": state}, count))
+    return gauges
+
+@router.get("/metrics")
+async def metrics(format: str = Query("prometheus", pattern="^(prometheus|json)$")):
+    """Request counts, per-stage latency histograms, sizes, page counts and pool/queue gauges"""
+    gauges = await current_gauges()
+    if format == "json":
+        return metrics_registry.snapshot(gauges)
+    return PlainTextResponse(
+        metrics_registry.prometheus(gauges),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, UploadFile, Depends, Request
+from app.routers.markdown_converter import (
+    validate_markdown_file, validate_theme, pdf_download_headers, read_markdown_upload
+)
+from app.services.job_service import job_service, JOB_CONVERTER
+from app.services.metrics import conversion_metrics
+from app.core.exceptions import UnsupportedFileTypeError
+from app.core.responses import result_response
+
+router = APIRouter()
+
+@router.post("/jobs/markdown-to-pdf", status_code=202)
+async def submit_markdown_to_pdf_job(
+    file: UploadFile = Depends(validate_markdown_file),
+    theme: str = Depends(validate_theme)
+):
+    """
+    Queue a Markdown to PDF conversion and return immediately
+    
+    - **file**: Markdown file (.md) to convert
+    - **theme**: Optional theme name
+    - **Returns**: Job id plus URLs to poll its status and download the result
+    """
+    timings = {}
+    try:
+        md_content = await read_markdown_upload(file, timings=timings)
+    except UnicodeDecodeError:
+        conversion_metrics.count(JOB_CONVERTER, "error")
+        raise UnsupportedFileTypeError("File is not valid UTF-8")
+    for stage, seconds in timings.items():
+        conversion_metrics.stage(JOB_CONVERTER, stage, seconds)
+    conversion_metrics.input(JOB_CONVERTER, file.size if file.size is not None else len(md_content))
+    
+    job = await job_service.submit(md_content, file.filename, theme)
+    return {
+        **job.to_dict(),
+        "status_url": f"/api/v1/jobs/{job.job_id}",
+        "result_url": f"/api/v1/jobs/{job.job_id}/result"
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job state and timings"""
+    return (await job_service.get(job_id)).to_dict()
+
+@router.api_route("/jobs/{job_id}/result", methods=["GET", "HEAD"])
+async def download_job_result(request: Request, job_id: str):
+    """
+    Download the PDF of a finished job
+    
+    Supports If-None-Match (304 when the ETag still matches) and single
+    byte ranges, so downloads can be revalidated and resumed.
+    """
+    job = await job_service.get(job_id)
+    return await result_response(
+        request,
+        'application/pdf',
+        path=job_service.result_path(job),
+        headers=pdf_download_headers(job.filename)
+    )
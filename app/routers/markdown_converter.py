@@ -1,55 +1,410 @@
-from fastapi import APIRouter, UploadFile, File, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTasks
+from html import escape
 from pathlib import Path
-from app.services.markdown_service import markdown_service
-from app.core.exceptions import UnsupportedFileTypeError, FileTooLargeError
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+import asyncio
+import codecs
+import time
+import zipfile
+from app.services.markdown_service import markdown_service, RenderedPdf
+from app.services.batch_service import batch_service, BatchEntry
+from app.services.image_assets import is_image_name
+from app.services.metrics import conversion_metrics, Stopwatch
+from app.services.pdf_cache import cache_key_hasher
+from app.services.pdf_stream import PdfStream
+from app.services.spool import pdf_spool
+from app.services.theme_registry import theme_registry
+from app.core.exceptions import (
+    FileConversionError, UnsupportedFileTypeError, FileTooLargeError, BatchTooLargeError,
+    BatchContentTooLargeError
+)
 from app.core.config import settings
+from app.core.responses import AbortableStreamingResponse, StreamAborted, result_response
 
 router = APIRouter()
 
-def validate_markdown_file(file: UploadFile) -> UploadFile:
-    """Validate uploaded markdown file"""
-    if not file:
+# Converter names used to label metrics
+CONVERTER = "markdown-to-pdf"
+BATCH_CONVERTER = "markdown-to-pdf-batch"
+PREVIEW_CONVERTER = "markdown-to-pdf-preview"
+HTML_CONVERTER = "markdown-to-html"
+
+# Converted HTML is shown as a page of its own: no scripts (javascript: links included), frames or plugins
+HTML_CONTENT_SECURITY_POLICY = "default-src 'none'; img-src * data:; style-src 'unsafe-inline'"
+
+def check_markdown_upload(filename: Optional[str], size: Optional[int]):
+    """Apply the markdown upload rules to a file name and (declared) size"""
+    if not filename:
         raise UnsupportedFileTypeError("No file uploaded")
     
     # Check file extension
-    if not file.filename.lower().endswith('.md'):
-        raise UnsupportedFileTypeError(f"File must be a Markdown (.md) file, got {Path(file.filename).suffix}")
+    if not filename.lower().endswith('.md'):
+        raise UnsupportedFileTypeError(f"File must be a Markdown (.md) file, got {Path(filename).suffix}")
     
     # Check file size
-    if hasattr(file, 'size') and file.size > settings.MAX_FILE_SIZE:
+    if size is not None and size > settings.MAX_FILE_SIZE:
         raise FileTooLargeError(settings.MAX_FILE_SIZE)
+
+def validate_markdown_file(file: UploadFile) -> UploadFile:
+    """Validate uploaded markdown file"""
+    if not file:
+        raise UnsupportedFileTypeError("No file uploaded")
+    
+    check_markdown_upload(file.filename, getattr(file, 'size', None))
     
     return file
 
+async def read_markdown_upload(file: UploadFile, digest=None, timings: Optional[Dict[str, float]] = None) -> str:
+    """
+    Read and decode an uploaded markdown file chunk by chunk
+    
+    The size limit is enforced while reading, so an oversized upload fails as
+    soon as it crosses MAX_FILE_SIZE, and the raw bytes are never held in full
+    next to the decoded text. An optional hash object is fed each chunk, and
+    an optional timings dict receives seconds spent in upload_read and decode.
+    Raises UnicodeDecodeError for invalid UTF-8.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    pieces = []
+    total = 0
+    decoding = 0.0
+    started = time.perf_counter()
+    while True:
+        chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > settings.MAX_FILE_SIZE:
+            raise FileTooLargeError(settings.MAX_FILE_SIZE)
+        if digest is not None:
+            digest.update(chunk)
+        decode_started = time.perf_counter()
+        pieces.append(decoder.decode(chunk))
+        decoding += time.perf_counter() - decode_started
+    decode_started = time.perf_counter()
+    pieces.append(decoder.decode(b'', final=True))
+    text = ''.join(pieces)
+    decoding += time.perf_counter() - decode_started
+    if timings is not None:
+        timings["upload_read"] = time.perf_counter() - started - decoding
+        timings["decode"] = decoding
+    return text
+
+def validate_theme(
+    theme: Optional[str] = Query(None, description="Named theme for the PDF (defaults to PDF_THEME)")
+) -> str:
+    """Validate the requested theme name"""
+    return theme_registry.validate(theme)
+
+def read_zip_entries(archive) -> Tuple[List[BatchEntry], Dict[str, bytes]]:
+    """
+    Extract markdown documents from a zip archive, validating each entry
+    
+    Image files are returned separately, by path, for the documents to show.
+    An image over IMAGE_MAX_BYTES, or past BATCH_MAX_ARCHIVE_SIZE of images
+    in total, is left out and its documents fall back to the alt text.
+    Documents past BATCH_MAX_CONTENT_BYTES of extracted markdown in total are
+    recorded as errors without being decompressed.
+    """
+    try:
+        zip_file = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise UnsupportedFileTypeError("Uploaded archive is not a valid zip file")
+    
+    with zip_file:
+        infos = [
+            info for info in zip_file.infolist()
+            if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+        ]
+        if len(infos) > settings.BATCH_MAX_FILES:
+            raise BatchTooLargeError(settings.BATCH_MAX_FILES)
+        
+        entries = []
+        assets = {}
+        asset_bytes = 0
+        content_bytes = 0
+        for info in infos:
+            if is_image_name(info.filename):
+                if info.file_size <= settings.IMAGE_MAX_BYTES and asset_bytes + info.file_size <= settings.BATCH_MAX_ARCHIVE_SIZE:
+                    try:
+                        with zip_file.open(info) as member:
+                            data = member.read(settings.IMAGE_MAX_BYTES + 1)
+                    except (zipfile.BadZipFile, NotImplementedError, RuntimeError):
+                        continue
+                    if len(data) <= settings.IMAGE_MAX_BYTES:
+                        assets[info.filename] = data
+                        asset_bytes += len(data)
+                continue
+            try:
+                check_markdown_upload(info.filename, info.file_size)
+                remaining = settings.BATCH_MAX_CONTENT_BYTES - content_bytes
+                if info.file_size > remaining:
+                    raise BatchContentTooLargeError(settings.BATCH_MAX_CONTENT_BYTES)
+                # Never trust the declared size; stop reading just past the limits
+                with zip_file.open(info) as member:
+                    data = member.read(min(settings.MAX_FILE_SIZE, remaining) + 1)
+                check_markdown_upload(info.filename, len(data))
+                if len(data) > remaining:
+                    raise BatchContentTooLargeError(settings.BATCH_MAX_CONTENT_BYTES)
+                content_bytes += len(data)
+                entries.append(BatchEntry(info.filename, content=data.decode('utf-8')))
+            except FileConversionError as e:
+                entries.append(BatchEntry(info.filename, error=e.detail))
+            except UnicodeDecodeError:
+                entries.append(BatchEntry(info.filename, error="File is not valid UTF-8"))
+            except (zipfile.BadZipFile, NotImplementedError, RuntimeError) as e:
+                entries.append(BatchEntry(info.filename, error=f"Could not extract file: {str(e)}"))
+        return entries, assets
+
+async def read_batch_entries(files: List[UploadFile]) -> Tuple[List[BatchEntry], Dict[str, bytes]]:
+    """Turn a batch upload (several .md files or one .zip) into validated entries and the images uploaded with them"""
+    if len(files) == 1 and files[0].filename and files[0].filename.lower().endswith('.zip'):
+        archive = files[0]
+        if archive.size is not None and archive.size > settings.BATCH_MAX_ARCHIVE_SIZE:
+            raise FileTooLargeError(settings.BATCH_MAX_ARCHIVE_SIZE)
+        return await asyncio.to_thread(read_zip_entries, archive.file)
+    
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise BatchTooLargeError(settings.BATCH_MAX_FILES)
+    
+    entries = []
+    assets = {}
+    content_bytes = 0
+    for upload in files:
+        if upload.filename and is_image_name(upload.filename):
+            data = await upload.read(settings.IMAGE_MAX_BYTES + 1)
+            if len(data) <= settings.IMAGE_MAX_BYTES:
+                assets[upload.filename] = data
+            continue
+        try:
+            check_markdown_upload(upload.filename, upload.size)
+            if content_bytes + (upload.size or 0) > settings.BATCH_MAX_CONTENT_BYTES:
+                raise BatchContentTooLargeError(settings.BATCH_MAX_CONTENT_BYTES)
+            content_bytes += upload.size or 0
+            entries.append(BatchEntry(upload.filename, content=await read_markdown_upload(upload)))
+        except FileConversionError as e:
+            entries.append(BatchEntry(upload.filename or "", error=e.detail))
+        except UnicodeDecodeError:
+            entries.append(BatchEntry(upload.filename, error="File is not valid UTF-8"))
+    return entries, assets
+
+def pdf_download_headers(filename: str, disposition: str = "attachment") -> dict:
+    """Content-Disposition header offering the PDF as a download ("attachment") or for display ("inline")"""
+    pdf_name = f"{Path(filename).stem}.pdf"
+    quoted = quote(pdf_name)
+    if quoted != pdf_name:
+        return {"Content-Disposition": f"{disposition}; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'{disposition}; filename="{pdf_name}"'}
+
+def html_document(fragment: bytes, filename: str) -> bytes:
+    """A standalone UTF-8 page around converted HTML, titled after the uploaded file"""
+    title = escape(Path(filename).stem).encode('utf-8')
+    return (
+        b'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>' + title +
+        b'</title>\n</head>\n<body>\n' + fragment + b'\n</body>\n</html>\n'
+    )
+
+async def pdf_response(
+    request: Request,
+    result: RenderedPdf,
+    filename: str,
+    background: Optional[BackgroundTasks] = None,
+    disposition: str = "attachment"
+):
+    """Send an in-memory PDF directly, or stream a spooled one and delete it afterwards, with ETag and Content-Length"""
+    background = background or BackgroundTasks()
+    if result.path is not None:
+        background.add_task(pdf_spool.release, result.path)
+    return await result_response(
+        request,
+        'application/pdf',
+        data=result.data,
+        path=result.path,
+        headers=pdf_download_headers(filename, disposition),
+        background=background
+    )
+
+async def streamed_pdf_body(stream: PdfStream, stopwatch: Stopwatch):
+    """Body of a streamed PDF response; the conversion is recorded once the last byte is out"""
+    try:
+        async for chunk in stream.chunks():
+            yield chunk
+    except StreamAborted:
+        # Headers are already sent, so the client only sees the body cut short
+        conversion_metrics.count(CONVERTER, "error")
+        raise
+    conversion_metrics.stage(CONVERTER, "first_byte", stream.first_byte)
+    conversion_metrics.result(CONVERTER, stream.result)
+    conversion_metrics.count(CONVERTER, "ok", stopwatch.total())
+
 @router.post("/convert/markdown-to-pdf")
 async def convert_markdown_to_pdf(
-    file: UploadFile = Depends(validate_markdown_file)
+    request: Request,
+    file: UploadFile = Depends(validate_markdown_file),
+    theme: str = Depends(validate_theme),
+    stream: Optional[bool] = Query(
+        None, description="Send pages as they are laid out (default: on for uploads of PDF_STREAM_MIN_BYTES or more)"
+    )
 ):
     """
     Convert uploaded Markdown file to PDF with exact Cursor-style formatting
     
     - **file**: Markdown file (.md) to convert
+    - **theme**: Optional theme name (see /converters)
+    - **stream**: Stream the PDF with chunked transfer while it is rendered
     - **Returns**: PDF file for download
     """
+    stopwatch = Stopwatch()
     try:
-        # Read the markdown content
-        content = await file.read()
-        md_content = content.decode('utf-8')
+        # Read, decode and hash the markdown content in one streaming pass
+        digest = cache_key_hasher(markdown_service.render_options(theme))
+        timings = {}
+        md_content = await read_markdown_upload(file, digest, timings)
+        stopwatch.split()
+        for stage, seconds in timings.items():
+            conversion_metrics.stage(CONVERTER, stage, seconds)
+        size = file.size if file.size is not None else len(md_content)
+        conversion_metrics.input(CONVERTER, size)
         
-        # Convert to PDF
-        pdf_path = await markdown_service.convert_markdown_to_pdf(md_content, file.filename)
+        # Convert to PDF in the render pool, streaming huge documents page by page
+        if stream if stream is not None else size >= settings.PDF_STREAM_MIN_BYTES:
+            result = await markdown_service.stream_markdown_to_pdf(md_content, theme, digest.hexdigest())
+        else:
+            result = await markdown_service.convert_markdown_to_pdf(md_content, file.filename, theme, digest.hexdigest())
+        if isinstance(result, PdfStream):
+            await result.start()
+            return AbortableStreamingResponse(
+                streamed_pdf_body(result, stopwatch),
+                media_type='application/pdf',
+                headers=pdf_download_headers(file.filename)
+            )
+        conversion_metrics.stage(CONVERTER, "render", stopwatch.split())
+        conversion_metrics.result(CONVERTER, result)
         
         # Return the PDF file for download
-        return FileResponse(
-            path=pdf_path,
-            filename=f"{Path(file.filename).stem}.pdf",
-            media_type='application/pdf'
+        background = BackgroundTasks()
+        background.add_task(conversion_metrics.sent, CONVERTER, stopwatch)
+        return await pdf_response(request, result, file.filename, background)
+        
+    except FileConversionError:
+        conversion_metrics.count(CONVERTER, "error")
+        raise
+    except Exception as e:
+        conversion_metrics.count(CONVERTER, "error")
+        raise UnsupportedFileTypeError(f"Error converting file: {str(e)}")
+
+@router.post("/convert/markdown-to-pdf/preview")
+async def preview_markdown_to_pdf(
+    request: Request,
+    file: UploadFile = Depends(validate_markdown_file),
+    theme: str = Depends(validate_theme),
+    pages: int = Query(
+        settings.PREVIEW_PAGES, ge=1, le=settings.PREVIEW_MAX_PAGES, description="Pages to lay out before stopping"
+    )
+):
+    """
+    Convert only the first pages of an uploaded Markdown file to PDF, for editor previews
+    
+    - **file**: Markdown file (.md) to preview
+    - **theme**: Optional theme name (see /converters)
+    - **pages**: Number of pages to lay out (default PREVIEW_PAGES)
+    - **Returns**: PDF of at most that many pages, for display inline
+    """
+    stopwatch = Stopwatch()
+    try:
+        digest = cache_key_hasher(markdown_service.preview_options(theme, pages))
+        md_content = await read_markdown_upload(file, digest)
+        conversion_metrics.stage(PREVIEW_CONVERTER, "upload_read", stopwatch.split())
+        conversion_metrics.input(PREVIEW_CONVERTER, file.size if file.size is not None else len(md_content))
+        
+        result = await markdown_service.preview_markdown_to_pdf(md_content, theme, pages, digest.hexdigest())
+        conversion_metrics.stage(PREVIEW_CONVERTER, "render", stopwatch.split())
+        conversion_metrics.result(PREVIEW_CONVERTER, result)
+        
+        background = BackgroundTasks()
+        background.add_task(conversion_metrics.sent, PREVIEW_CONVERTER, stopwatch)
+        return await pdf_response(request, result, file.filename, background, "inline")
+        
+    except FileConversionError:
+        conversion_metrics.count(PREVIEW_CONVERTER, "error")
+        raise
+    except Exception as e:
+        conversion_metrics.count(PREVIEW_CONVERTER, "error")
+        raise UnsupportedFileTypeError(f"Error converting file: {str(e)}")
+
+@router.post("/convert/markdown-to-html")
+async def convert_markdown_to_html(request: Request, file: UploadFile = Depends(validate_markdown_file)):
+    """
+    Convert uploaded Markdown file to an HTML page
+    
+    - **file**: Markdown file (.md) to convert
+    - **Returns**: UTF-8 HTML page; raw HTML in the Markdown is shown as text
+    """
+    stopwatch = Stopwatch()
+    try:
+        digest = cache_key_hasher(markdown_service.html_options())
+        md_content = await read_markdown_upload(file, digest)
+        conversion_metrics.stage(HTML_CONVERTER, "upload_read", stopwatch.split())
+        conversion_metrics.input(HTML_CONVERTER, file.size if file.size is not None else len(md_content))
+        
+        fragment = await markdown_service.convert_markdown_to_html(md_content, digest.hexdigest())
+        conversion_metrics.stage(HTML_CONVERTER, "render", stopwatch.split())
+        
+        background = BackgroundTasks()
+        background.add_task(conversion_metrics.sent, HTML_CONVERTER, stopwatch)
+        return await result_response(
+            request,
+            'text/html',
+            data=html_document(fragment, file.filename),
+            headers={"Content-Security-Policy": HTML_CONTENT_SECURITY_POLICY},
+            background=background
         )
         
+    except FileConversionError:
+        conversion_metrics.count(HTML_CONVERTER, "error")
+        raise
     except Exception as e:
+        conversion_metrics.count(HTML_CONVERTER, "error")
         raise UnsupportedFileTypeError(f"Error converting file: {str(e)}")
 
+@router.post("/convert/markdown-to-pdf/batch")
+async def convert_markdown_batch_to_pdf(
+    files: List[UploadFile] = File(...),
+    theme: str = Depends(validate_theme)
+):
+    """
+    Convert many Markdown files to PDF in parallel
+    
+    - **files**: Several Markdown files (.md), or a single zip archive of them, plus any images they show
+    - **theme**: Optional theme name applied to every document
+    - **Returns**: Zip archive with one PDF per document and a manifest.json with per-file status
+    """
+    stopwatch = Stopwatch()
+    try:
+        entries, assets = await read_batch_entries(files)
+        conversion_metrics.stage(BATCH_CONVERTER, "upload_read", stopwatch.split())
+        archive = await batch_service.convert_batch(entries, theme, BATCH_CONVERTER, assets)
+        conversion_metrics.stage(BATCH_CONVERTER, "render", stopwatch.split())
+    except FileConversionError:
+        conversion_metrics.count(BATCH_CONVERTER, "error")
+        raise
+    except Exception as e:
+        conversion_metrics.count(BATCH_CONVERTER, "error")
+        raise UnsupportedFileTypeError(f"Error converting file: {str(e)}")
+    
+    background = BackgroundTasks()
+    background.add_task(archive.close)
+    background.add_task(conversion_metrics.sent, BATCH_CONVERTER, stopwatch)
+    return StreamingResponse(
+        iter(lambda: archive.read(64 * 1024), b''),
+        media_type='application/zip',
+        headers={"Content-Disposition": 'attachment; filename="converted-pdfs.zip"'},
+        background=background
+    )
+
 @router.get("/converters")
 async def list_converters():
     """List all available converters"""
@@ -60,8 +415,33 @@ async def list_converters():
                 "endpoint": "/api/v1/convert/markdown-to-pdf",
                 "description": "Convert Markdown files to PDF with exact Cursor styling",
                 "supported_formats": [".md"],
-                "output_format": "PDF"
+                "output_format": "PDF",
+                "themes": theme_registry.names()
+            },
+            {
+                "name": "Markdown to PDF (batch)",
+                "endpoint": "/api/v1/convert/markdown-to-pdf/batch",
+                "description": "Convert many Markdown files, or a zip of them, into a zip of PDFs",
+                "supported_formats": [".md", ".zip"],
+                "output_format": "ZIP",
+                "themes": theme_registry.names()
+            },
+            {
+                "name": "Markdown to PDF (preview)",
+                "endpoint": "/api/v1/convert/markdown-to-pdf/preview",
+                "description": "Lay out only the first pages of a Markdown file, for fast previews",
+                "supported_formats": [".md"],
+                "output_format": "PDF",
+                "themes": theme_registry.names(),
+                "max_pages": settings.PREVIEW_MAX_PAGES
+            },
+            {
+                "name": "Markdown to HTML",
+                "endpoint": "/api/v1/convert/markdown-to-html",
+                "description": "Convert Markdown files to an HTML page",
+                "supported_formats": [".md"],
+                "output_format": "HTML"
             }
         ],
-        "total": 1
+        "total": 4
     }
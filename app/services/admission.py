@@ -0,0 +1,142 @@
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.exceptions import ServiceOverloadedError, TooManyRequestsError
+from app.services.metrics import metrics_registry
+from app.services.render_executor import render_executor
+
+class TokenBucket:
+    """Refills at rate tokens per second up to burst; a request spends its cost in tokens"""
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, cost: float, rate: float, burst: float, now: float) -> float:
+        """Spend cost tokens if there are enough; otherwise the seconds until there will be"""
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / rate
+
+class AdmissionController:
+    """
+    Decides, before a conversion request is read, whether to take it on
+
+    Each client (its API key, or its IP address without one) has a token
+    bucket, so one client's burst of uploads cannot starve the others. A
+    request costs one token plus one per cost_unit bytes of upload, as told
+    by its Content-Length; a request without one is charged the most any
+    request can cost, a full bucket. A client whose bucket is short gets 429.
+
+    On top of that at most max_concurrent admitted requests are in progress
+    at once. Past that the service is overloaded and answers 503 instead of
+    letting every conversion slow down until clients time out together.
+
+    Both carry a Retry-After. For 429 it is when the client's bucket will
+    hold enough tokens. For 503 it is how long the conversions waiting for a
+    render worker (plus this one) take to drain at the throughput of the
+    last window seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        rate: float,
+        burst: float,
+        cost_unit: int,
+        max_clients: int,
+        window: float,
+        max_retry_after: int
+    ):
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = burst
+        self.cost_unit = cost_unit
+        self.max_clients = max_clients
+        self.window = window
+        self.max_retry_after = max_retry_after
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = {"rate_limited": 0, "overloaded": 0}
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # Finish times of recent admitted requests, for the throughput estimate
+        self._finished: deque = deque()
+        metrics_registry.counter("fileconverter_admission_rejections_total", "Requests turned away by admission control")
+
+    def cost(self, size: Optional[int]) -> float:
+        """Tokens a request of size upload bytes costs; unknown sizes cost a full bucket"""
+        if size is None:
+            return self.burst
+        return min(self.burst, 1 + size / self.cost_unit)
+
+    def throughput(self, now: float) -> float:
+        """Admitted requests finished per second over the last window"""
+        while self._finished and self._finished[0] < now - self.window:
+            self._finished.popleft()
+        return len(self._finished) / self.window
+
+    def retry_after(self, now: float) -> int:
+        """Seconds until the queued conversions ahead of a new one should have drained"""
+        throughput = self.throughput(now)
+        if not throughput:
+            return self.max_retry_after
+        return max(1, min(self.max_retry_after, math.ceil((render_executor.queue_depth + 1) / throughput)))
+
+    def admit(self, client: str, size: Optional[int]):
+        """Take on a request or raise TooManyRequestsError/ServiceOverloadedError; release() it when done"""
+        now = time.monotonic()
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            self._reject("overloaded")
+            raise ServiceOverloadedError(self.retry_after(now))
+
+        if self.rate:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.burst, now)
+                if len(self._buckets) > self.max_clients:
+                    # The least recently seen client starts over with a full bucket
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            wait = bucket.take(self.cost(size), self.rate, self.burst, now)
+            if wait:
+                self._reject("rate_limited")
+                raise TooManyRequestsError(max(1, min(self.max_retry_after, math.ceil(wait))))
+
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._finished.append(time.monotonic())
+
+    def _reject(self, reason: str):
+        self.rejected[reason] += 1
+        metrics_registry.inc("fileconverter_admission_rejections_total", reason=reason)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "clients": len(self._buckets),
+            "throughput_per_second": round(self.throughput(time.monotonic()), 3)
+        }
+
+# Global admission controller for the conversion routes
+admission_controller = AdmissionController(
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    rate=settings.ADMISSION_CLIENT_RATE,
+    burst=settings.ADMISSION_CLIENT_BURST,
+    cost_unit=settings.ADMISSION_COST_UNIT_BYTES,
+    max_clients=settings.ADMISSION_MAX_CLIENTS,
+    window=settings.ADMISSION_THROUGHPUT_WINDOW,
+    max_retry_after=settings.ADMISSION_MAX_RETRY_AFTER
+)
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import tempfile
+import zipfile
+from pathlib import PurePosixPath
+from typing import Dict, List, Optional
+from app.core.exceptions import FileConversionError
+from app.core.config import settings
+from app.services.markdown_service import markdown_service
+from app.services.metrics import conversion_metrics
+from app.services.render_executor import render_executor
+from app.services.spool import pdf_spool
+
+class BatchEntry:
+    """One document of a batch upload, either decoded content or the reason it was rejected"""
+
+    def __init__(self, name: str, content: Optional[str] = None, error: Optional[str] = None):
+        self.name = name
+        self.content = content
+        self.error = error
+
+class _ArchiveWriter:
+    """Adds finished PDFs to a batch archive one at a time, off the event loop"""
+
+    def __init__(self, zip_file: zipfile.ZipFile):
+        self.zip_file = zip_file
+        self._lock = asyncio.Lock()
+
+    def _write(self, name: str, result):
+        # PDFs are already compressed; store them as-is
+        if result.path is not None:
+            self.zip_file.write(result.path, name, compress_type=zipfile.ZIP_STORED)
+        else:
+            self.zip_file.writestr(name, result.data, compress_type=zipfile.ZIP_STORED)
+
+    async def add(self, name: str, result):
+        """Write a PDF into the archive and release its spool file"""
+        try:
+            async with self._lock:
+                await asyncio.to_thread(self._write, name, result)
+        finally:
+            if result.path is not None:
+                pdf_spool.release(result.path)
+
+class BatchConverterService:
+    """Service for converting many Markdown documents into one zip of PDFs"""
+
+    async def _convert_entry(
+        self,
+        entry: BatchEntry,
+        output: str,
+        theme: Optional[str],
+        slots: asyncio.Semaphore,
+        converter: str,
+        assets: Dict[str, bytes],
+        archive: _ArchiveWriter
+    ) -> dict:
+        """Convert a single entry into the archive, returning its manifest item; failures are recorded, not raised"""
+        if entry.error is None:
+            async with slots:
+                try:
+                    conversion_metrics.input(converter, len(entry.content.encode('utf-8')))
+                    result = await markdown_service.convert_markdown_to_pdf(
+                        entry.content, entry.name, theme, parallel=False, assets=assets
+                    )
+                    conversion_metrics.result(converter, result)
+                except FileConversionError as e:
+                    entry.error = e.detail
+                except Exception as e:
+                    entry.error = f"Conversion failed: {str(e)}"
+        if entry.error is not None:
+            return {"source": entry.name, "status": "error", "error": entry.error}
+        # The content is not needed any more, and the PDF leaves memory as soon as it is in the archive
+        entry.content = None
+        await archive.add(output, result)
+        return {"source": entry.name, "status": "ok", "output": output, "size": result.size}
+
+    def _output_name(self, source: str, used: set) -> str:
+        """
+        PDF name inside the archive, kept unique across the batch
+
+        The upload path is kept but made safe to extract: roots, drive
+        letters, "." and ".." are dropped, so a crafted "../x.md" or
+        "/etc/x.md" becomes "x.pdf" or "etc/x.pdf" rather than escaping
+        the directory the archive is unpacked into.
+        """
+        parts = [
+            part for part in source.replace('\\', '/').split('/')
+            if part not in ('', '.', '..') and not part.endswith(':')
+        ]
+        path = PurePosixPath(*parts) if parts else PurePosixPath("document")
+        path = path.with_suffix('.pdf')
+        name = str(path)
+        counter = 1
+        while name in used:
+            name = str(path.with_name(f"{path.stem}-{counter}.pdf"))
+            counter += 1
+        used.add(name)
+        return name
+
+    async def convert_batch(
+        self,
+        entries: List[BatchEntry],
+        theme: Optional[str] = None,
+        converter: str = "batch",
+        assets: Optional[Dict[str, bytes]] = None
+    ):
+        """
+        Convert entries concurrently and return a zip file object positioned at the start
+
+        The archive holds one PDF per successful entry plus manifest.json with a
+        per-file status. One bad entry never fails the rest of the batch.
+        Per-document metrics are recorded under the given converter name.
+        Images the documents show are looked up in assets, keyed by their path
+        in the upload. Each PDF is written into the archive as soon as it is
+        finished, so only the PDFs still being rendered are held at once.
+        """
+        # Names follow the upload order, whatever order the documents finish in
+        used_names = set()
+        outputs = [self._output_name(entry.name, used_names) for entry in entries]
+
+        archive = tempfile.SpooledTemporaryFile(max_size=settings.PDF_MEMORY_OUTPUT_MAX_BYTES)
+        zip_file = zipfile.ZipFile(archive, 'w')
+        try:
+            writer = _ArchiveWriter(zip_file)
+            # Keep at most one job per render worker in flight so a batch never floods the queue
+            slots = asyncio.Semaphore(render_executor.max_workers)
+            manifest = await asyncio.gather(*(
+                self._convert_entry(entry, output, theme, slots, converter, assets or {}, writer)
+                for entry, output in zip(entries, outputs)
+            ))
+            await asyncio.to_thread(self._finish_archive, zip_file, manifest)
+        except BaseException:
+            zip_file.close()
+            archive.close()
+            raise
+
+        archive.seek(0)
+        return archive
+
+    def _finish_archive(self, zip_file: zipfile.ZipFile, manifest: List[dict]):
+        """Add manifest.json and write the zip's central directory"""
+        zip_file.writestr(
+            'manifest.json',
+            json.dumps({
+                "total": len(manifest),
+                "succeeded": sum(1 for item in manifest if item["status"] == "ok"),
+                "failed": sum(1 for item in manifest if item["status"] == "error"),
+                "files": manifest
+            }, indent=2),
+            compress_type=zipfile.ZIP_DEFLATED
+        )
+        zip_file.close()
+
+# Global service instance
+batch_service = BatchConverterService()
@@ -0,0 +1,102 @@
+from typing import List, Optional
+from reportlab.lib.geomutils import normalizeTRBL
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Flowable
+
+class CodeBlock(Flowable):
+    """
+    A fenced code block drawn line for line, splittable across pages
+
+    Lines keep their whitespace and are never re-flowed, so layout is one
+    division per page: the height is the line count times the leading, and a
+    split takes the lines that fit. Every piece is a view on the same line
+    list, so a long listing lays out in time proportional to its line count.
+    The box uses the code style's background, border and padding, the same
+    as a Paragraph in that style, and is closed on every page.
+    """
+
+    def __init__(
+        self,
+        lines: List[str],
+        style: ParagraphStyle,
+        start: int = 0,
+        end: Optional[int] = None,
+        wrapped_width: Optional[float] = None
+    ):
+        super().__init__()
+        self.lines = lines
+        self.style = style
+        self.start = start
+        self.end = len(lines) if end is None else end
+        # Width the lines were hard-wrapped for; None until the first wrap
+        self.wrapped_width = wrapped_width
+        self.spaceBefore = style.spaceBefore
+        self.spaceAfter = style.spaceAfter
+
+    def _hard_wrap(self, width: float):
+        """Break lines wider than the text area; monospaced, so by character count"""
+        if self.wrapped_width == width:
+            return
+        style = self.style
+        columns = max(1, int((width - style.leftIndent - style.rightIndent)
+                             // stringWidth(' ', style.fontName, style.fontSize)))
+        wrapped = []
+        for line in self.lines[self.start:self.end]:
+            line = line.expandtabs(4)
+            if len(line) <= columns:
+                wrapped.append(line)
+            else:
+                wrapped.extend(line[offset:offset + columns] for offset in range(0, len(line), columns))
+        self.lines = wrapped
+        self.start = 0
+        self.end = len(wrapped)
+        self.wrapped_width = width
+
+    def wrap(self, availWidth, availHeight):
+        self._hard_wrap(availWidth)
+        self.width = availWidth
+        self.height = (self.end - self.start) * self.style.leading
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        self._hard_wrap(availWidth)
+        fit = int(availHeight // self.style.leading)
+        if fit < 1:
+            return []
+        middle = self.start + fit
+        if middle >= self.end:
+            return [self]
+        return [
+            CodeBlock(self.lines, self.style, self.start, middle, self.wrapped_width),
+            CodeBlock(self.lines, self.style, middle, self.end, self.wrapped_width)
+        ]
+
+    def draw(self):
+        style = self.style
+        canvas = self.canv
+        canvas.saveState()
+
+        # Background and border, placed exactly as Paragraph places them
+        top, right, bottom, left = normalizeTRBL(style.borderPadding)
+        if style.backColor:
+            canvas.setFillColor(style.backColor)
+        if style.borderColor and style.borderWidth:
+            canvas.setStrokeColor(style.borderColor)
+            canvas.setLineWidth(style.borderWidth)
+        canvas.rect(
+            style.leftIndent - left,
+            -bottom,
+            self.width - (style.leftIndent + style.rightIndent) + left + right,
+            self.height + top + bottom,
+            fill=1 if style.backColor else 0,
+            stroke=1 if style.borderColor and style.borderWidth else 0
+        )
+
+        canvas.setFillColor(style.textColor)
+        text = canvas.beginText(style.leftIndent, self.height - style.fontSize)
+        text.setFont(style.fontName, style.fontSize, style.leading)
+        for line in self.lines[self.start:self.end]:
+            text.textLine(line)
+        canvas.drawText(text)
+        canvas.restoreState()
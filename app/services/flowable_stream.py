@@ -0,0 +1,68 @@
+import time
+from typing import Iterable, List
+from reportlab.platypus import Flowable
+
+_EXHAUSTED = object()
+
+class FlowableStream:
+    """
+    A document's flowables, produced on demand while doc.build lays them out
+
+    ReportLab's build loop treats its argument as a list that it consumes from
+    the front: it reads flowables[0], deletes it once it is drawn, and puts
+    split remainders back with insert() or slice assignment. This supports
+    those operations over an iterator, so only a few flowables exist ahead of
+    the one being laid out and each is released as soon as it is drawn.
+
+    len() tops the buffer up to lookahead flowables and counts those. Build
+    only looks further than the first flowable to keep headings with what
+    follows them, so that is as far as it can see.
+    """
+
+    def __init__(self, flowables: Iterable[Flowable], lookahead: int = 16):
+        self._source = iter(flowables)
+        self._buffer: List[Flowable] = []
+        self._exhausted = False
+        self.lookahead = lookahead
+        # Seconds spent producing flowables (parsing), as opposed to laying them out
+        self.seconds = 0.0
+
+    def _fill(self, count: int):
+        while len(self._buffer) < count and not self._exhausted:
+            started = time.perf_counter()
+            flowable = next(self._source, _EXHAUSTED)
+            self.seconds += time.perf_counter() - started
+            if flowable is _EXHAUSTED:
+                self._exhausted = True
+            else:
+                self._buffer.append(flowable)
+
+    def _fill_for(self, index):
+        if isinstance(index, slice):
+            if index.stop is None or index.stop < 0:
+                self._fill(float('inf'))
+            else:
+                self._fill(index.stop)
+        elif index < 0:
+            self._fill(float('inf'))
+        else:
+            self._fill(index + 1)
+
+    def __len__(self) -> int:
+        self._fill(self.lookahead)
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        self._fill_for(index)
+        return self._buffer[index]
+
+    def __setitem__(self, index, value):
+        self._fill_for(index)
+        self._buffer[index] = value
+
+    def __delitem__(self, index):
+        self._fill_for(index)
+        del self._buffer[index]
+
+    def insert(self, index: int, flowable: Flowable):
+        self._buffer.insert(index, flowable)
@@ -0,0 +1,44 @@
+from pathlib import Path
+from typing import Dict
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from app.core.config import settings
+
+# The built-in PDF fonts the themes are drawn in
+BUILTIN_FONTS = ("Helvetica", "Helvetica-Bold", "Courier")
+
+class FontRegistry:
+    """
+    Resolves the themes' built-in fonts, registering TrueType replacements once per process
+
+    Built-in fonts are never embedded, so they cost nothing per document but
+    only cover Latin-1. A font configured for one of them is parsed and
+    registered the first time a theme asks for it and reused by every later
+    render in the process. ReportLab embeds only the glyphs a document uses,
+    so each PDF carries a subset rather than the whole file.
+    """
+
+    def __init__(self, files: Dict[str, str]):
+        unknown = set(files) - set(BUILTIN_FONTS)
+        if unknown:
+            raise ValueError(f"PDF_FONT_FILES can only replace {', '.join(BUILTIN_FONTS)}, not {', '.join(sorted(unknown))}")
+        self._files = dict(files)
+        self._names: Dict[str, str] = {}
+
+    def font(self, builtin: str) -> str:
+        """The font name to draw in where a theme uses the built-in font"""
+        name = self._names.get(builtin)
+        if name is None:
+            path = self._files.get(builtin)
+            name = Path(path).stem if path else builtin
+            if path:
+                pdfmetrics.registerFont(TTFont(name, path))
+            self._names[builtin] = name
+            if builtin == "Helvetica" and path:
+                # <b> and <i> in body text switch within the family
+                bold = self.font("Helvetica-Bold")
+                pdfmetrics.registerFontFamily(name, normal=name, bold=bold, italic=name, boldItalic=bold)
+        return name
+
+# Global registry instance for the fonts configured through settings
+font_registry = FontRegistry(settings.PDF_FONT_FILES)
@@ -0,0 +1,29 @@
+from typing import Optional
+import markdown
+
+# Python-Markdown extensions giving the HTML the same blocks the PDF has
+HTML_EXTENSIONS = ['tables', 'fenced_code', 'sane_lists']
+
+class HtmlRenderer:
+    """
+    Converts markdown to an HTML fragment with Python-Markdown, per render worker
+
+    Raw HTML is switched off, so tags in a document are shown as text just
+    as they are in the PDF. Results are cached by the result cache, not here.
+    """
+
+    def __init__(self):
+        self._markdown: Optional[markdown.Markdown] = None
+
+    def render(self, content: str) -> str:
+        return self._converter().reset().convert(content)
+
+    def _converter(self) -> markdown.Markdown:
+        if self._markdown is None:
+            self._markdown = markdown.Markdown(extensions=HTML_EXTENSIONS)
+            self._markdown.preprocessors.deregister('html_block')
+            self._markdown.inlinePatterns.deregister('html')
+        return self._markdown
+
+# Global renderer instance, one per render worker
+html_renderer = HtmlRenderer()
@@ -0,0 +1,77 @@
+import hashlib
+import posixpath
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from app.core.config import settings
+
+# File types that are taken as images rather than documents in a batch upload
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp")
+
+# Image lines anywhere in a document; the tokenizer decides which ones really are images
+_IMAGE_LINES = re.compile(r'^[ \t]*!\[[^\]\n]*\]\(\s*([^)\s]+)(?:\s+"[^"\n]*")?\s*\)[ \t]*$', re.MULTILINE)
+_SCHEME = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+
+def is_image_name(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+def image_references(content: str) -> Iterable[str]:
+    """Paths of the images a document places on their own line"""
+    if '![' not in content:
+        return ()
+    return {match.group(1) for match in _IMAGE_LINES.finditer(content)}
+
+class ImageSource:
+    """
+    Finds the bytes behind an image path: files bundled with the document, then the asset directory
+
+    Bundled files are keyed by their path inside the upload. A relative path
+    is looked up next to the document first and then from the upload root.
+    The asset directory (ASSET_DIR) is only searched below itself, and URLs
+    with a scheme (http:, data:, file:) are never fetched.
+    """
+
+    def __init__(self, bundled: Optional[Dict[str, bytes]] = None, document: str = ""):
+        self.bundled = bundled or {}
+        self.base = posixpath.dirname(document)
+
+    def resolve(self, url: str) -> Optional[bytes]:
+        if _SCHEME.match(url):
+            return None
+        path = url.split('#', 1)[0].split('?', 1)[0]
+        if not path:
+            return None
+        if self.bundled:
+            candidates = [path.lstrip('/')] if path.startswith('/') else [posixpath.join(self.base, path), path]
+            for candidate in candidates:
+                data = self.bundled.get(posixpath.normpath(candidate))
+                if data is not None:
+                    return data
+        return self._from_asset_dir(path)
+
+    def _from_asset_dir(self, path: str) -> Optional[bytes]:
+        if not settings.ASSET_DIR:
+            return None
+        root = Path(settings.ASSET_DIR).resolve()
+        file_path = (root / path.lstrip('/')).resolve()
+        if not file_path.is_relative_to(root) or not file_path.is_file():
+            return None
+        if file_path.stat().st_size > settings.IMAGE_MAX_BYTES:
+            return None
+        return file_path.read_bytes()
+
+def collect_images(content: str, source: ImageSource) -> Dict[str, bytes]:
+    """The bytes of every image the document refers to that can be found, by path"""
+    images = {}
+    for url in image_references(content):
+        data = source.resolve(url)
+        if data is not None:
+            images[url] = data
+    return images
+
+def images_digest(images: Dict[str, bytes]) -> bytes:
+    """Identifies a set of images by path and content, for the result cache key"""
+    digest = hashlib.sha256()
+    for url in sorted(images):
+        digest.update(url.encode('utf-8') + b'\0' + hashlib.sha256(images[url]).digest())
+    return digest.digest()
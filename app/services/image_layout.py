@@ -0,0 +1,123 @@
+import hashlib
+import io
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+from PIL import Image as PILImage
+from reportlab import rl_config
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable
+from app.core.config import settings
+
+# Image data is embedded as binary; ASCII85 would only make it a quarter bigger
+rl_config.useA85 = 0
+
+# Assumed resolution of images that do not record one, as browsers do
+DEFAULT_IMAGE_DPI = 96
+
+class PreparedImage(NamedTuple):
+    """A decoded image, downscaled for the page and ready to draw"""
+    reader: ImageReader
+    width: float  # points on the page
+    height: float
+    cost: int  # approximate bytes held while cached
+
+class ImageCache:
+    """
+    LRU of prepared images keyed by content hash and target size
+
+    A logo or diagram shared by many documents is decoded and resampled once
+    per process; later documents reuse the result, including the raw pixel
+    data ReportLab extracts when the image is first drawn.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple, PreparedImage]" = OrderedDict()
+
+    def get(self, data: bytes, max_width: float, max_height: float) -> PreparedImage:
+        key = (hashlib.sha256(data).digest(), round(max_width, 2), round(max_height, 2), settings.IMAGE_DPI)
+        image = self._entries.get(key)
+        if image is not None:
+            self._entries.move_to_end(key)
+            return image
+        image = prepare_image(data, max_width, max_height)
+        if image.cost <= self.max_bytes:
+            self._entries[key] = image
+            self.size += image.cost
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.cost
+        return image
+
+def prepare_image(data: bytes, max_width: float, max_height: float) -> PreparedImage:
+    """
+    Decode an image and size it for the page
+
+    The image keeps its natural size (from its recorded DPI) unless that is
+    wider or taller than the frame, in which case it is shrunk to fit. Pixels
+    beyond IMAGE_DPI at that size are resampled away. JPEGs stay JPEGs, so
+    ReportLab embeds them as they are; everything else is kept as a bitmap.
+    Raises ValueError for data that is not a usable image.
+    """
+    image = PILImage.open(io.BytesIO(data))
+    if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+        raise ValueError(f"Image has more than {settings.IMAGE_MAX_PIXELS} pixels")
+    dpi_x, dpi_y = image.info.get('dpi') or (DEFAULT_IMAGE_DPI, DEFAULT_IMAGE_DPI)
+    width = image.width * 72 / (dpi_x or DEFAULT_IMAGE_DPI)
+    height = image.height * 72 / (dpi_y or DEFAULT_IMAGE_DPI)
+    scale = min(1.0, max_width / width, max_height / height)
+    width, height = width * scale, height * scale
+
+    target = (
+        max(1, min(image.width, round(width / 72 * settings.IMAGE_DPI))),
+        max(1, min(image.height, round(height / 72 * settings.IMAGE_DPI)))
+    )
+    is_jpeg = image.format == 'JPEG'
+    if target != image.size:
+        # JPEG decoders can skip most of the work when scaling down by a power of two
+        image.draft(image.mode, target)
+        image = image.resize(target, PILImage.LANCZOS)
+    elif is_jpeg:
+        return PreparedImage(ImageReader(io.BytesIO(data)), width, height, len(data) + image.width * image.height * 3)
+
+    if is_jpeg:
+        encoded = io.BytesIO()
+        image.convert('RGB').save(encoded, 'JPEG', quality=90)
+        encoded.seek(0)
+        return PreparedImage(ImageReader(encoded), width, height, encoded.getbuffer().nbytes + target[0] * target[1] * 3)
+    if image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode.endswith('A') else 'RGB')
+    image.load()
+    # The bitmap plus the RGB and alpha data ReportLab extracts from it
+    return PreparedImage(ImageReader(image), width, height, target[0] * target[1] * 8)
+
+class ImageBlock(Flowable):
+    """A prepared image drawn centred at its page size"""
+
+    def __init__(self, image: PreparedImage, alt: str = "", space_before: float = 0, space_after: float = 0):
+        super().__init__()
+        self.image = image
+        self.alt = alt
+        self.width = image.width
+        self.height = image.height
+        self.spaceBefore = space_before
+        self.spaceAfter = space_after
+        self.hAlign = 'CENTER'
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.image.reader, 0, 0, self.width, self.height, mask='auto')
+
+# Per-process cache; render workers each keep their own
+image_cache = ImageCache(settings.IMAGE_CACHE_MAX_BYTES)
+
+def image_block(data: bytes, alt: str, max_width: float, max_height: float, **spacing) -> Optional[ImageBlock]:
+    """A flowable for image data, or None if it cannot be decoded"""
+    try:
+        image = image_cache.get(data, max_width, max_height)
+    except (OSError, ValueError, PILImage.DecompressionBombError):
+        return None
+    return ImageBlock(image, alt, **spacing)
@@ -0,0 +1,149 @@
+import re
+from collections import defaultdict, deque
+from functools import lru_cache
+from html import unescape
+from app.core.config import settings
+
+# Characters that can start inline markup; everything between them is plain text
+_SPECIAL = re.compile(r'[*`\[\]\\]')
+_BACKTICK_RUN = re.compile(r'`+')
+_ESCAPABLE = frozenset('*`[]\\()!#_-')
+_XML_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+_EMPHASIS_TAGS = {1: ('<i>', '</i>'), 2: ('<b>', '</b>')}
+_LINK = 0
+
+def _escape(text: str) -> str:
+    return text.translate(_XML_ESCAPES)
+
+def _format(text: str) -> str:
+    """
+    Convert one line of inline markdown to ReportLab paragraph markup in a single scan
+
+    Handles **bold**, *italic*, `code` and [links](url) with correct nesting;
+    an inline ![image](url) shows its alt text.
+    Unmatched markers are kept as literal text. Openers live on one stack and
+    each is pushed and popped at most once. Closing backtick runs and ')' are
+    found through lookups that only move forward. Together this keeps the
+    work linear in the line length, whatever the input.
+    """
+    text = unescape(text)
+    if len(text) > settings.INLINE_MAX_LINE_LENGTH:
+        # Past the bound, treat the line as plain text so CPU per line stays capped
+        return _escape(text)
+
+    # Start positions of every backtick run, grouped by run length
+    backtick_runs = defaultdict(deque)
+    for run in _BACKTICK_RUN.finditer(text):
+        backtick_runs[len(run.group())].append(run.start())
+
+    out = []
+    stack = []  # (marker length or _LINK, index of the opener's piece in out)
+    open_counts = defaultdict(int)
+    image_openers = set()  # out indices of '[' that follow an unescaped '!'
+    next_paren = -1
+    n = len(text)
+    i = 0
+
+    while i < n:
+        match = _SPECIAL.search(text, i)
+        if match is None:
+            out.append(_escape(text[i:]))
+            break
+        j = match.start()
+        if j > i:
+            out.append(_escape(text[i:j]))
+        char = text[j]
+
+        if char == '\\':
+            # Backslash escapes a markup character
+            if j + 1 < n and text[j + 1] in _ESCAPABLE:
+                out.append(_escape(text[j + 1]))
+                i = j + 2
+            else:
+                out.append('\\')
+                i = j + 1
+
+        elif char == '`':
+            # Code span: closes at the next run of exactly the same length
+            run_end = j + 1
+            while run_end < n and text[run_end] == '`':
+                run_end += 1
+            length = run_end - j
+            closers = backtick_runs[length]
+            while closers and closers[0] < run_end:
+                closers.popleft()
+            if closers:
+                close = closers.popleft()
+                out.append(f"<code>{_escape(text[run_end:close])}</code>")
+                i = close + length
+            else:
+                out.append('`' * length)
+                i = run_end
+
+        elif char == '*':
+            run_end = j + 1
+            while run_end < n and text[run_end] == '*':
+                run_end += 1
+            length = run_end - j
+            if length > 3:
+                out.append('*' * length)
+            else:
+                can_open = run_end < n and not text[run_end].isspace()
+                can_close = j > 0 and not text[j - 1].isspace()
+                # A *** run is a ** and a * marker: closes inner first, opens outer first
+                markers = (1, 2) if can_close and not can_open else (2, 1)
+                for marker in (markers if length == 3 else (length,)):
+                    if can_close and open_counts[marker]:
+                        # Markers opened after the matching opener can no longer close
+                        while stack[-1][0] != marker:
+                            open_counts[stack.pop()[0]] -= 1
+                        _, opener = stack.pop()
+                        open_counts[marker] -= 1
+                        out[opener] = _EMPHASIS_TAGS[marker][0]
+                        out.append(_EMPHASIS_TAGS[marker][1])
+                    elif can_open:
+                        stack.append((marker, len(out)))
+                        open_counts[marker] += 1
+                        out.append('*' * marker)
+                    else:
+                        out.append('*' * marker)
+            i = run_end
+
+        elif char == '[':
+            if j > i and text[j - 1] == '!':
+                image_openers.add(len(out))
+            stack.append((_LINK, len(out)))
+            open_counts[_LINK] += 1
+            out.append('[')
+            i = j + 1
+
+        else:  # ']'
+            i = j + 1
+            if open_counts[_LINK] and j + 1 < n and text[j + 1] == '(':
+                if next_paren <= j + 1:
+                    next_paren = text.find(')', j + 2)
+                    if next_paren == -1:
+                        next_paren = n
+                if j + 2 < next_paren < n:
+                    # Links render as their label
+                    while stack[-1][0] != _LINK:
+                        open_counts[stack.pop()[0]] -= 1
+                    _, opener = stack.pop()
+                    open_counts[_LINK] -= 1
+                    out[opener] = ''
+                    if opener in image_openers:
+                        out[opener - 1] = out[opener - 1][:-1]
+                    i = next_paren + 1
+                    continue
+            out.append(']')
+
+    return ''.join(out)
+
+_format_cached = lru_cache(maxsize=settings.INLINE_CACHE_SIZE)(_format)
+
+def format_inline(text: str) -> str:
+    """Format inline markdown, memoizing short lines that repeat across documents"""
+    if len(text) <= settings.INLINE_CACHE_MAX_LINE_LENGTH:
+        return _format_cached(text)
+    return _format(text)
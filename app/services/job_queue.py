@@ -0,0 +1,292 @@
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+class Job:
+    """A queued markdown-to-PDF conversion and its outcome"""
+
+    def __init__(
+        self,
+        job_id: str,
+        filename: str,
+        state: str = QUEUED,
+        submitted_at: Optional[float] = None,
+        started_at: Optional[float] = None,
+        finished_at: Optional[float] = None,
+        error: Optional[str] = None,
+        result_path: Optional[str] = None,
+        result_size: Optional[int] = None,
+        theme: Optional[str] = None,
+        content: Optional[str] = None
+    ):
+        self.job_id = job_id
+        self.filename = filename
+        self.state = state
+        self.submitted_at = submitted_at if submitted_at is not None else time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.error = error
+        self.result_path = result_path
+        self.result_size = result_size
+        self.theme = theme
+        self.content = content
+
+    @classmethod
+    def create(cls, filename: str, content: str, theme: Optional[str] = None) -> "Job":
+        return cls(uuid.uuid4().hex, filename, theme=theme, content=content)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the job, with timings in seconds"""
+        now = time.time()
+        queued_until = self.started_at or self.finished_at or now
+        return {
+            "job_id": self.job_id,
+            "filename": self.filename,
+            "state": self.state,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": round(queued_until - self.submitted_at, 3),
+            "run_seconds": round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+            "result_size": self.result_size,
+            "theme": self.theme,
+            "error": self.error
+        }
+
+class JobQueue(ABC):
+    """
+    Interface for job storage backends feeding the job workers
+
+    Methods may block (on disk or on other processes holding the database),
+    so JobService calls them from its own thread, never on the event loop.
+    """
+
+    @abstractmethod
+    def submit(self, job: Job):
+        """Store a new job in the queued state"""
+
+    @abstractmethod
+    def claim(self) -> Optional[Job]:
+        """Atomically move the oldest queued job to running and return it (with content)"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job without its content"""
+
+    @abstractmethod
+    def complete(self, job_id: str, result_path: str, result_size: int):
+        """Mark a running job succeeded with its stored PDF"""
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str):
+        """Mark a running job failed with the reason"""
+
+    @abstractmethod
+    def requeue(self, job_id: str):
+        """Return a running job to the queue, e.g. when its worker shuts down"""
+
+    @abstractmethod
+    def requeue_stale(self, started_before: float) -> int:
+        """Put jobs left running by a crashed process back in the queue"""
+
+    @abstractmethod
+    def purge_finished(self, before: float) -> List[Job]:
+        """Delete jobs that finished before the given time and return them"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per state"""
+
+class MemoryJobQueue(JobQueue):
+    """In-process job queue; jobs are lost when the process exits"""
+
+    def __init__(self):
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def submit(self, job: Job):
+        self._jobs[job.job_id] = job
+
+    def claim(self) -> Optional[Job]:
+        for job in self._jobs.values():
+            if job.state == QUEUED:
+                job.state = RUNNING
+                job.started_at = time.time()
+                return job
+        return None
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def complete(self, job_id: str, result_path: str, result_size: int):
+        job = self._jobs[job_id]
+        job.state = SUCCEEDED
+        job.finished_at = time.time()
+        job.result_path = result_path
+        job.result_size = result_size
+        job.content = None
+
+    def fail(self, job_id: str, error: str):
+        job = self._jobs[job_id]
+        job.state = FAILED
+        job.finished_at = time.time()
+        job.error = error
+        job.content = None
+
+    def requeue(self, job_id: str):
+        job = self._jobs[job_id]
+        job.state = QUEUED
+        job.started_at = None
+
+    def requeue_stale(self, started_before: float) -> int:
+        stale = [
+            job for job in self._jobs.values()
+            if job.state == RUNNING and job.started_at < started_before
+        ]
+        for job in stale:
+            job.state = QUEUED
+            job.started_at = None
+        return len(stale)
+
+    def purge_finished(self, before: float) -> List[Job]:
+        expired = [
+            job for job in self._jobs.values()
+            if job.finished_at is not None and job.finished_at < before
+        ]
+        for job in expired:
+            del self._jobs[job.job_id]
+        return expired
+
+    def counts(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for job in self._jobs.values():
+            counts[job.state] += 1
+        return counts
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue persisted in a local SQLite database, shared by all server processes"""
+
+    _COLUMNS = "job_id, filename, state, submitted_at, started_at, finished_at, error, result_path, result_size, theme"
+
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Created here but used only from JobService's queue thread from then on
+        self._db = sqlite3.connect(db_path, isolation_level=None, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                state TEXT NOT NULL,
+                submitted_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                error TEXT,
+                result_path TEXT,
+                result_size INTEGER,
+                theme TEXT,
+                content TEXT
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, submitted_at)")
+
+    def _row_to_job(self, row) -> Job:
+        return Job(*row)
+
+    def submit(self, job: Job):
+        self._db.execute(
+            "INSERT INTO jobs (job_id, filename, state, submitted_at, theme, content) VALUES (?, ?, ?, ?, ?, ?)",
+            (job.job_id, job.filename, job.state, job.submitted_at, job.theme, job.content)
+        )
+
+    def claim(self) -> Optional[Job]:
+        # BEGIN IMMEDIATE takes the write lock, so two processes never claim the same job
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute(
+                f"SELECT {self._COLUMNS}, content FROM jobs WHERE state = ? ORDER BY submitted_at LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+            if row is None:
+                self._db.execute("COMMIT")
+                return None
+            job = self._row_to_job(row)
+            job.state = RUNNING
+            job.started_at = time.time()
+            self._db.execute(
+                "UPDATE jobs SET state = ?, started_at = ? WHERE job_id = ?",
+                (job.state, job.started_at, job.job_id)
+            )
+            self._db.execute("COMMIT")
+            return job
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._db.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def complete(self, job_id: str, result_path: str, result_size: int):
+        self._db.execute(
+            "UPDATE jobs SET state = ?, finished_at = ?, result_path = ?, result_size = ?, content = NULL "
+            "WHERE job_id = ?",
+            (SUCCEEDED, time.time(), result_path, result_size, job_id)
+        )
+
+    def fail(self, job_id: str, error: str):
+        self._db.execute(
+            "UPDATE jobs SET state = ?, finished_at = ?, error = ?, content = NULL WHERE job_id = ?",
+            (FAILED, time.time(), error, job_id)
+        )
+
+    def requeue(self, job_id: str):
+        self._db.execute(
+            "UPDATE jobs SET state = ?, started_at = NULL WHERE job_id = ? AND state = ?",
+            (QUEUED, job_id, RUNNING)
+        )
+
+    def requeue_stale(self, started_before: float) -> int:
+        cursor = self._db.execute(
+            "UPDATE jobs SET state = ?, started_at = NULL WHERE state = ? AND started_at < ?",
+            (QUEUED, RUNNING, started_before)
+        )
+        return cursor.rowcount
+
+    def purge_finished(self, before: float) -> List[Job]:
+        rows = self._db.execute(
+            f"SELECT {self._COLUMNS} FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (before,)
+        ).fetchall()
+        self._db.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (before,))
+        return [self._row_to_job(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for state, count in self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"):
+            counts[state] = count
+        return counts
+
+def job_storage_dir() -> str:
+    """Directory holding the job database and stored results"""
+    return os.path.join(tempfile.gettempdir(), "fileconverter-jobs")
+
+def create_job_queue() -> JobQueue:
+    """Build the configured job queue backend"""
+    if settings.JOB_QUEUE_BACKEND == "memory":
+        return MemoryJobQueue()
+    if settings.JOB_QUEUE_BACKEND == "sqlite":
+        return SQLiteJobQueue(settings.JOB_DB_PATH or os.path.join(job_storage_dir(), "jobs.db"))
+    raise ValueError(f"Unknown JOB_QUEUE_BACKEND '{settings.JOB_QUEUE_BACKEND}'")
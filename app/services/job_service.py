@@ -0,0 +1,148 @@
+import asyncio
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+from app.core.exceptions import FileConversionError, JobNotFoundError, JobNotReadyError, RenderQueueFullError
+from app.core.config import settings
+from app.services.job_queue import Job, JobQueue, SUCCEEDED, create_job_queue, job_storage_dir
+from app.services.markdown_service import markdown_service
+from app.services.metrics import conversion_metrics
+from app.services.render_executor import render_executor
+from app.services.spool import pdf_spool
+
+# Converter name used to label job metrics
+JOB_CONVERTER = "markdown-to-pdf-job"
+
+class JobService:
+    """
+    Runs submitted conversions in the background and keeps their results until they expire
+
+    Queue calls run one at a time on a thread of their own: SQLite may wait
+    up to 30 seconds for another process's lock, and a submission writes
+    the whole document, neither of which may stall the event loop. One
+    thread also keeps the SQLite connection out of concurrent use.
+    """
+
+    def __init__(self, queue: JobQueue, result_dir: str):
+        self.queue = queue
+        self.result_dir = Path(result_dir)
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._queue_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-queue")
+
+    async def _queue_call(self, method: Callable[..., Any], *args) -> Any:
+        """Run a queue method on the queue thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._queue_thread, partial(method, *args))
+
+    async def submit(self, content: str, filename: str, theme: Optional[str] = None) -> Job:
+        """Queue a conversion and wake a job worker"""
+        job = Job.create(filename, content, theme)
+        await self._queue_call(self.queue.submit, job)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Job:
+        job = await self._queue_call(self.queue.get, job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
+        return job
+
+    def result_path(self, job: Job) -> str:
+        """Path of a finished job's PDF"""
+        if job.state != SUCCEEDED:
+            raise JobNotReadyError(job.job_id, job.state, job.error)
+        return job.result_path
+
+    def _store_result(self, job: Job, result) -> str:
+        """Move a rendered PDF into the result directory"""
+        self.result_dir.mkdir(parents=True, exist_ok=True)
+        path = str(self.result_dir / f"{job.job_id}.pdf")
+        if result.path is not None:
+            shutil.move(result.path, path)
+            pdf_spool.release(result.path)
+        else:
+            with open(path, 'wb') as pdf_file:
+                pdf_file.write(result.data)
+        return path
+
+    async def _run_job(self, job: Job):
+        started = time.perf_counter()
+        try:
+            result = await markdown_service.convert_markdown_to_pdf(job.content, job.filename, job.theme)
+            conversion_metrics.result(JOB_CONVERTER, result)
+            path = await asyncio.to_thread(self._store_result, job, result)
+            await self._queue_call(self.queue.complete, job.job_id, path, result.size)
+            conversion_metrics.count(JOB_CONVERTER, "ok", time.perf_counter() - started)
+        except asyncio.CancelledError:
+            # Shutting down: leave the job for the next worker to pick up
+            await self._queue_call(self.queue.requeue, job.job_id)
+            raise
+        except RenderQueueFullError:
+            # Interactive traffic has the pool busy; retry the job a little later
+            await self._queue_call(self.queue.requeue, job.job_id)
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+        except FileConversionError as e:
+            await self._queue_call(self.queue.fail, job.job_id, e.detail)
+            conversion_metrics.count(JOB_CONVERTER, "error")
+        except Exception as e:
+            await self._queue_call(self.queue.fail, job.job_id, f"Conversion failed: {str(e)}")
+            conversion_metrics.count(JOB_CONVERTER, "error")
+
+    async def _worker(self):
+        """Claim queued jobs and feed them to the render pool"""
+        while True:
+            job = await self._queue_call(self.queue.claim)
+            if job is None:
+                # Other processes may share the queue, so poll as well as wait for local submissions
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(job)
+
+    def _purge_expired(self) -> int:
+        # Runs on the queue thread, deleting result files there too
+        now = time.time()
+        self.queue.requeue_stale(now - settings.JOB_STALE_AFTER)
+        expired = self.queue.purge_finished(now - settings.JOB_RESULT_TTL)
+        for job in expired:
+            if job.result_path:
+                Path(job.result_path).unlink(missing_ok=True)
+        return len(expired)
+
+    async def purge_expired(self) -> int:
+        """Drop jobs finished longer than the retention period ago, with their results"""
+        return await self._queue_call(self._purge_expired)
+
+    async def _sweeper(self):
+        while True:
+            await self.purge_expired()
+            await asyncio.sleep(settings.JOB_SWEEP_INTERVAL)
+
+    def start(self):
+        """Start job workers and the retention sweeper on the running event loop"""
+        workers = settings.JOB_WORKERS or render_executor.max_workers
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self):
+        """Cancel job workers; jobs they were running go back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def stats(self) -> dict:
+        return await self._queue_call(self.queue.counts)
+
+# Global service instance
+job_service = JobService(
+    create_job_queue(),
+    settings.JOB_RESULT_DIR or os.path.join(job_storage_dir(), "results")
+)
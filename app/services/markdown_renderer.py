@@ -0,0 +1,239 @@
+import io
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Paragraph, Spacer, Table
+from reportlab.lib.units import mm
+from app.core.config import settings
+from app.services.code_layout import CodeBlock
+from app.services.flowable_stream import FlowableStream
+from app.services.html_renderer import html_renderer
+from app.services.image_layout import image_block
+from app.services.inline_formatter import format_inline
+from app.services.markdown_service import RenderedPdf
+from app.services.markdown_tokenizer import (
+    tokenize, iter_lines, Token, HEADING, BULLET, ORDERED, CODE, QUOTE, TABLE, RULE, IMAGE, PARAGRAPH
+)
+from app.services.output_profiles import output_profile
+from app.services.pdf_writer import OutlineDocTemplate, StreamingCanvas
+from app.services.spool import SpillingOutput, pdf_spool
+from app.services.table_layout import large_table
+from app.services.theme_registry import theme_registry
+from app.services.theme_styles import Theme
+
+# A little of everything the renderer draws, so warming up loads every code path
+WARM_UP_DOCUMENT = """# Warm-up
+
+Some **bold**, *italic* and `inline code` text.
+
+- a list item
+
+> a quote
+
+```
+code block
+```
+
+| a | b |
+|---|---|
+| 1 | 2 |
+"""
+
+class MarkdownRenderer:
+    """Lays out markdown as PDF with exact Cursor styling; runs inside render worker processes"""
+    
+    def _parse_markdown_exactly(self, md_content: str, theme: Optional[Theme] = None):
+        """Parse markdown content with exact Cursor-style formatting"""
+        # Classify lines into block tokens in one pass, then build flowables from the stream
+        return list(self._iter_flowables(tokenize(iter_lines(md_content)), theme))
+    
+    def _iter_flowables(
+        self,
+        tokens: Iterable[Token],
+        theme: Optional[Theme] = None,
+        images: Optional[Dict[str, bytes]] = None
+    ):
+        """Build the flowables for a stream of block tokens, one token at a time"""
+        theme = theme or theme_registry.get()
+        images = images or {}
+        for token in tokens:
+            if token.kind == IMAGE:
+                yield from self._image_flowables(token, theme, images.get(token.url))
+            else:
+                yield from self._token_flowables[token.kind](self, token, theme)
+    
+    def _heading_flowables(self, token: Token, theme: Theme):
+        """Handle headers with exact styling"""
+        text = self._format_inline_markdown_exactly(token.text)
+        heading = Paragraph(text, theme.styles[f'h{token.level}'])
+        # Headings are bookmarked in the PDF outline
+        heading.outline_level = token.level
+        return [heading]
+    
+    def _list_item_flowables(self, token: Token, theme: Theme):
+        """Handle bulleted and numbered lists with exact styling"""
+        formatted_text = self._format_inline_markdown_exactly(token.text)
+        return [Paragraph(f"• {formatted_text}", theme.styles['list'])]
+    
+    def _code_flowables(self, token: Token, theme: Theme):
+        """Handle code blocks with exact styling"""
+        return [CodeBlock(token.text.split('\n'), theme.styles['code'])]
+    
+    def _quote_flowables(self, token: Token, theme: Theme):
+        """Handle blockquotes with exact styling"""
+        formatted_text = self._format_inline_markdown_exactly(token.text)
+        return [Paragraph(formatted_text, theme.styles['quote'])]
+    
+    def _table_flowables(self, token: Token, theme: Theme):
+        """Handle tables with exact styling"""
+        if len(token.rows) > settings.TABLE_LARGE_ROWS:
+            # Fixed geometry and per-page splitting keep big tables linear in their row count
+            return [large_table(token.rows, theme.table_style, settings.TABLE_SAMPLE_ROWS), Spacer(1, 20)]
+        table = Table(token.rows)
+        table.setStyle(theme.table_style)
+        return [table, Spacer(1, 20)]
+    
+    def _image_flowables(self, token: Token, theme: Theme, data: Optional[bytes]):
+        """Handle images, falling back to the alt text when the image is missing or unreadable"""
+        style = theme.styles['normal']
+        if data is not None:
+            # The frame is the page inside the margins, less its 6pt padding on each side
+            block = image_block(
+                data,
+                token.text,
+                A4[0] - 2 * settings.PDF_MARGIN * mm - 12,
+                A4[1] - 2 * settings.PDF_MARGIN * mm - 12,
+                space_before=style.spaceBefore,
+                space_after=style.spaceAfter
+            )
+            if block is not None:
+                return [block]
+        if not token.text:
+            return []
+        return [Paragraph(f"<i>{self._format_inline_markdown_exactly(token.text)}</i>", style)]
+    
+    def _rule_flowables(self, token: Token, theme: Theme):
+        """Handle horizontal rules"""
+        return [Spacer(1, 32), Paragraph("", theme.styles['hr'])]
+    
+    def _paragraph_flowables(self, token: Token, theme: Theme):
+        """Handle regular text with exact styling"""
+        formatted_text = self._format_inline_markdown_exactly(token.text)
+        return [Paragraph(formatted_text, theme.styles['normal'])]
+    
+    _token_flowables = {
+        HEADING: _heading_flowables,
+        BULLET: _list_item_flowables,
+        ORDERED: _list_item_flowables,
+        CODE: _code_flowables,
+        QUOTE: _quote_flowables,
+        TABLE: _table_flowables,
+        RULE: _rule_flowables,
+        PARAGRAPH: _paragraph_flowables
+    }
+    
+    def _format_inline_markdown_exactly(self, text: str) -> str:
+        """Format inline markdown elements with exact HTML tags"""
+        return format_inline(text)
+    
+    def _new_document(self, buffer, max_pages: int = 0) -> OutlineDocTemplate:
+        """Create PDF document with exact margins"""
+        return OutlineDocTemplate(
+            buffer, 
+            max_pages=max_pages,
+            pagesize=A4,
+            rightMargin=settings.PDF_MARGIN*mm,
+            leftMargin=settings.PDF_MARGIN*mm,
+            topMargin=settings.PDF_MARGIN*mm,
+            bottomMargin=settings.PDF_MARGIN*mm,
+            pageCompression=1 if output_profile().compression else 0
+        )
+
+    def _layout(
+        self,
+        doc: OutlineDocTemplate,
+        tokens: Iterable[Token],
+        theme: Optional[str] = None,
+        images: Optional[Dict[str, bytes]] = None
+    ) -> Dict[str, float]:
+        """
+        Build block tokens into doc, returning per-stage seconds
+        
+        Flowables are created as layout reaches them and dropped once drawn,
+        and the streaming canvas writes out each finished page, so memory
+        depends on how complex a page is rather than on document length.
+        Parse time is the time spent creating flowables.
+        """
+        started = time.perf_counter()
+        flowables = FlowableStream(self._iter_flowables(tokens, theme_registry.get(theme), images))
+        doc.build(flowables, canvasmaker=partial(StreamingCanvas, profile=output_profile()))
+        elapsed = time.perf_counter() - started
+        return {"parse": flowables.seconds, "build": elapsed - flowables.seconds}
+
+    def build_pdf(
+        self,
+        content: str,
+        theme: Optional[str] = None,
+        images: Optional[Dict[str, bytes]] = None
+    ) -> "RenderedPdf":
+        """Lay out markdown content, with the bytes of its images by path, into an in-memory PDF (CPU-bound)"""
+        return self.build_pdf_from_tokens(tokenize(iter_lines(content)), theme, images)
+
+    def build_pdf_from_tokens(
+        self,
+        tokens: Iterable[Token],
+        theme: Optional[str] = None,
+        images: Optional[Dict[str, bytes]] = None
+    ) -> "RenderedPdf":
+        """Lay out block tokens, e.g. one section of a document, into a PDF (CPU-bound)"""
+        # Large outputs go to the spool directory as they are written, instead of travelling back through the pool
+        output = SpillingOutput(pdf_spool, settings.PDF_MEMORY_OUTPUT_MAX_BYTES)
+        try:
+            doc = self._new_document(output)
+            timings = self._layout(doc, tokens, theme, images)
+        except BaseException:
+            output.discard()
+            raise
+        output.close()
+        return RenderedPdf(
+            output.size, data=output.data, path=output.path, pages=doc.page, timings=timings, outline=doc.outline
+        )
+
+    def build_preview(
+        self,
+        tokens: Iterable[Token],
+        theme: Optional[str] = None,
+        images: Optional[Dict[str, bytes]] = None,
+        pages: int = 1
+    ) -> "RenderedPdf":
+        """Lay out the first pages of a document's block tokens only (CPU-bound)"""
+        buffer = io.BytesIO()
+        doc = self._new_document(buffer, max_pages=pages)
+        timings = self._layout(doc, tokens, theme, images)
+        return RenderedPdf(buffer.tell(), data=buffer.getvalue(), pages=doc.page, timings=timings, outline=doc.outline)
+
+    def build_pdf_stream(
+        self,
+        tokens: Iterable[Token],
+        theme: Optional[str],
+        pdf_path: str,
+        images: Optional[Dict[str, bytes]] = None
+    ) -> "RenderedPdf":
+        """Lay out block tokens into a spool file, writing each page as soon as it is finished (CPU-bound)"""
+        with open(pdf_path, 'wb') as pdf_file:
+            doc = self._new_document(pdf_file)
+            timings = self._layout(doc, tokens, theme, images)
+            size = pdf_file.tell()
+        return RenderedPdf(size, path=pdf_path, pages=doc.page, timings=timings)
+    
+    def warm_up(self):
+        """Load ReportLab, register fonts, compile the default theme and set up Python-Markdown on a small document"""
+        result = self.build_pdf(WARM_UP_DOCUMENT)
+        if result.path is not None:
+            Path(result.path).unlink(missing_ok=True)
+        html_renderer.render(WARM_UP_DOCUMENT)
+
+# Global renderer instance, one per render worker
+markdown_renderer = MarkdownRenderer()
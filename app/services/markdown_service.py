@@ -1,378 +1,438 @@
-import markdown
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import mm
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_LEFT
-import tempfile
-import re
-from html import unescape
+import asyncio
+import io
+import os
+import time
 from pathlib import Path
-from app.core.exceptions import ConversionFailedError
+from typing import Dict, List, Optional, Union
+from app.core.exceptions import ConversionFailedError, FileConversionError
 from app.core.config import settings
+from app.services.image_assets import ImageSource, collect_images, images_digest
+from app.services.markdown_tokenizer import split_sections, Token
+from app.services.output_profiles import output_profile
+from app.services.parse_cache import parse_cache
+from app.services.pdf_cache import make_cache_key, pdf_cache
+from app.services.pdf_merge import OutlineEntry, merge_pdfs
+from app.services.pdf_stream import PdfStream
+from app.services.render_executor import render_executor
+from app.services.single_flight import SingleFlight
+from app.services.spool import pdf_spool
+from app.services.theme_registry import theme_registry
+
+# Spool bytes reserved per character of a streamed document; PDFs come out at about 1.5x the markdown
+STREAM_SPOOL_RESERVE = 2
 
 class MarkdownConverterService:
-    """Service for converting Markdown to PDF with exact Cursor styling"""
+    """
+    Service for converting Markdown to PDF with exact Cursor styling
     
-    def __init__(self):
-        self.styles = self._create_exact_cursor_styles()
+    Layout happens in render worker processes (see markdown_renderer), so
+    the server process never loads ReportLab and starts quickly.
+    """
     
-    def _create_exact_cursor_styles(self):
-        """Create styles that exactly match Cursor's Markdown preview"""
-        styles = getSampleStyleSheet()
-        
-        # Exact colors from Cursor's theme
-        text_color = colors.HexColor('#24292f')
-        code_bg = colors.HexColor('#f6f8fa')
-        code_border = colors.HexColor('#d0d7de')
-        quote_color = colors.HexColor('#656d76')
+    def render_options(self, theme: Optional[str] = None) -> dict:
+        """
+        Effective settings that change the rendered PDF
         
-        # H1 - Exact Cursor styling
-        h1_style = ParagraphStyle(
-            'ExactH1',
-            parent=styles['Normal'],
-            fontSize=32,
-            spaceAfter=24,
-            spaceBefore=40,
-            textColor=text_color,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold',
-            leading=38,
-            leftIndent=0,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=0,
-            borderColor=code_border,
-            borderPadding=0
-        )
-        
-        # H2 - Exact Cursor styling
-        h2_style = ParagraphStyle(
-            'ExactH2',
-            parent=styles['Normal'],
-            fontSize=24,
-            spaceAfter=20,
-            spaceBefore=32,
-            textColor=text_color,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold',
-            leading=28,
-            leftIndent=0,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=0,
-            borderColor=code_border,
-            borderPadding=0
-        )
-        
-        # H3 - Exact Cursor styling
-        h3_style = ParagraphStyle(
-            'ExactH3',
-            parent=styles['Normal'],
-            fontSize=20,
-            spaceAfter=16,
-            spaceBefore=28,
-            textColor=text_color,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold',
-            leading=24,
-            leftIndent=0,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=0,
-            borderColor=code_border,
-            borderPadding=0
-        )
-        
-        # H4 - Exact Cursor styling
-        h4_style = ParagraphStyle(
-            'ExactH4',
-            parent=styles['Normal'],
-            fontSize=18,
-            spaceAfter=14,
-            spaceBefore=24,
-            textColor=text_color,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold',
-            leading=22,
-            leftIndent=0,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=0,
-            borderColor=code_border,
-            borderPadding=0
-        )
+        The theme's resolved colors are included, not just its name, so
+        changing a palette through PDF_CUSTOM_THEMES does not serve PDFs
+        cached (on disk, across restarts) with the old one.
+        """
+        return {
+            "theme": theme or settings.PDF_THEME,
+            "palette": theme_registry.palette(theme),
+            "margin": settings.PDF_MARGIN,
+            "font_size_normal": settings.PDF_FONT_SIZE_NORMAL,
+            "font_size_header": settings.PDF_FONT_SIZE_HEADER,
+            "fonts": settings.PDF_FONT_FILES,
+            "profile": settings.PDF_OUTPUT_PROFILE,
+            "table_large_rows": settings.TABLE_LARGE_ROWS,
+            "table_sample_rows": settings.TABLE_SAMPLE_ROWS,
+            "image_dpi": settings.IMAGE_DPI,
+            "image_max_pixels": settings.IMAGE_MAX_PIXELS,
+            "inline_max_line_length": settings.INLINE_MAX_LINE_LENGTH
+        }
+    
+    def preview_options(self, theme: Optional[str] = None, pages: int = 1) -> dict:
+        """Effective settings that change a first-pages PDF preview"""
+        return {**self.render_options(theme), "preview_pages": pages}
+    
+    def html_options(self) -> dict:
+        """Effective settings that change the HTML output"""
+        return {"format": "html"}
+    
+    def _merge_sections(self, parts: List["RenderedPdf"]) -> "RenderedPdf":
+        """Concatenate rendered sections into one PDF with a continuous outline (CPU-bound)"""
+        started = time.perf_counter()
+        datas = []
+        for part in parts:
+            if part.path is not None:
+                with open(part.path, 'rb') as pdf_file:
+                    datas.append(pdf_file.read())
+            else:
+                datas.append(part.data)
+        outlines = [part.outline for part in parts]
+        deduplicate = output_profile().deduplicate
         
-        # Normal text - Exact Cursor styling
-        normal_style = ParagraphStyle(
-            'ExactNormal',
-            parent=styles['Normal'],
-            fontSize=16,
-            spaceAfter=12,
-            spaceBefore=0,
-            textColor=text_color,
-            alignment=TA_LEFT,
-            fontName='Helvetica',
-            leading=24,
-            leftIndent=0,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=0,
-            borderColor=code_border,
-            borderPadding=0
-        )
+        # Sections ran side by side, so the slowest one sets each stage's latency
+        timings = {}
+        for part in parts:
+            for stage, seconds in part.timings.items():
+                timings[stage] = max(timings.get(stage, 0.0), seconds)
         
-        # Code block - Exact Cursor styling
-        code_style = ParagraphStyle(
-            'ExactCode',
-            parent=styles['Normal'],
-            fontSize=14,
-            spaceAfter=20,
-            spaceBefore=20,
-            textColor=text_color,
-            alignment=TA_LEFT,
-            fontName='Courier',
-            leading=18,
-            leftIndent=0,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=1,
-            borderColor=code_border,
-            borderPadding=20,
-            backColor=code_bg
-        )
+        if sum(part.size for part in parts) > settings.PDF_MEMORY_OUTPUT_MAX_BYTES:
+            pdf_path = pdf_spool.new_path()
+            with open(pdf_path, 'wb') as pdf_file:
+                pages = merge_pdfs(datas, outlines, pdf_file, deduplicate)
+            timings["merge"] = time.perf_counter() - started
+            return RenderedPdf(os.path.getsize(pdf_path), path=pdf_path, pages=pages, timings=timings)
+        buffer = io.BytesIO()
+        pages = merge_pdfs(datas, outlines, buffer, deduplicate)
+        timings["merge"] = time.perf_counter() - started
+        return RenderedPdf(buffer.tell(), data=buffer.getvalue(), pages=pages, timings=timings)
+    
+    async def _tokens(self, content: str) -> List[Token]:
+        """Block tokens of content from the parse cache, tokenizing off the event loop"""
+        return await asyncio.to_thread(parse_cache.tokens, content)
+    
+    async def _render_sections(
+        self,
+        content: str,
+        theme: Optional[str] = None,
+        images: Optional[Dict[str, bytes]] = None
+    ) -> "RenderedPdf":
+        """
+        Render one large document on several workers
         
-        # Inline code - Exact Cursor styling
-        inline_code_style = ParagraphStyle(
-            'ExactInlineCode',
-            parent=styles['Normal'],
-            fontSize=14,
-            spaceAfter=0,
-            spaceBefore=0,
-            textColor=text_color,
-            alignment=TA_LEFT,
-            fontName='Courier',
-            leading=18,
-            leftIndent=0,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=0.5,
-            borderColor=code_border,
-            borderPadding=6,
-            backColor=code_bg
-        )
+        The token stream is cut at top-level headings into one part per
+        worker, balanced by size. Every part starts on a new page, as if the
+        heading had a page break before it.
+        """
+        parts = await asyncio.to_thread(section_parts, content, render_executor.max_workers)
+        if len(parts) < 2:
+            return await render_executor.run(render_tokens_to_pdf, await self._tokens(content), theme, images)
         
-        # List - Exact Cursor styling
-        list_style = ParagraphStyle(
-            'ExactList',
-            parent=normal_style,
-            fontSize=16,
-            spaceAfter=6,
-            spaceBefore=6,
-            textColor=text_color,
-            alignment=TA_LEFT,
-            fontName='Helvetica',
-            leading=24,
-            leftIndent=24,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=0,
-            borderColor=code_border,
-            borderPadding=0
+        results = await asyncio.gather(
+            *(render_executor.run(render_tokens_to_pdf, part, theme, images) for part in parts),
+            return_exceptions=True
         )
+        try:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            return await asyncio.to_thread(self._merge_sections, results)
+        finally:
+            for result in results:
+                if isinstance(result, RenderedPdf) and result.path is not None:
+                    Path(result.path).unlink(missing_ok=True)
+    
+    async def _resolve_images(self, content: str, cache_key: str, source: ImageSource):
+        """
+        Load the images a document refers to and fold them into its cache key
         
-        # Quote - Exact Cursor styling
-        quote_style = ParagraphStyle(
-            'ExactQuote',
-            parent=normal_style,
-            fontSize=16,
-            spaceAfter=12,
-            spaceBefore=12,
-            textColor=quote_color,
-            alignment=TA_LEFT,
-            fontName='Helvetica',
-            leading=24,
-            leftIndent=24,
-            rightIndent=0,
-            firstLineIndent=0,
-            borderWidth=0,
-            borderColor=code_border,
-            borderPadding=0,
-            leftBorderWidth=4,
-            leftBorderColor=code_border,
-            leftBorderPadding=16
-        )
+        The markdown alone does not identify the PDF once it shows images, so
+        their paths and contents are hashed into the key as well.
+        """
+        if '![' not in content:
+            return {}, cache_key
+        images = await asyncio.to_thread(collect_images, content, source)
+        if images:
+            cache_key = make_cache_key(images_digest(images), {"document": cache_key})
+        return images, cache_key
+    
+    async def _render(
+        self,
+        content: str,
+        theme: Optional[str],
+        images: Dict[str, bytes],
+        cache_key: str,
+        parallel: bool = False
+    ) -> "RenderedPdf":
+        """Render a document missing from the result cache and cache it"""
+        # Lay out the PDF in worker processes so the event loop stays responsive
+        if parallel and render_executor.max_workers > 1 and len(content) >= settings.PDF_PARALLEL_MIN_CHARS:
+            result = await self._render_sections(content, theme, images)
+        else:
+            result = await render_executor.run(render_tokens_to_pdf, await self._tokens(content), theme, images)
         
-        return {
-            'h1': h1_style,
-            'h2': h2_style,
-            'h3': h3_style,
-            'h4': h4_style,
-            'normal': normal_style,
-            'code': code_style,
-            'inline_code': inline_code_style,
-            'list': list_style,
-            'quote': quote_style
-        }
+        if result.path is not None:
+            pdf_spool.register(result.path)
+            await pdf_cache.put_file(cache_key, result.path)
+        else:
+            await pdf_cache.put(cache_key, result.data)
+        return result
     
-    def _parse_markdown_exactly(self, md_content: str):
-        """Parse markdown content with exact Cursor-style formatting"""
-        elements = []
+    async def convert_markdown_to_pdf(
+        self,
+        content: str,
+        filename: str,
+        theme: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        parallel: bool = True,
+        assets: Optional[Dict[str, bytes]] = None
+    ) -> "RenderedPdf":
+        """
+        Convert markdown content to PDF with exact Cursor styling
         
-        # Split content by lines
-        lines = md_content.split('\n')
-        i = 0
+        Callers that hashed the upload while reading it pass cache_key, which
+        saves encoding the whole document again just to look it up. Documents
+        of PDF_PARALLEL_MIN_CHARS or more are rendered section by section on
+        several workers, unless parallel is False (e.g. for a batch, which
+        already keeps every worker busy). Images are looked up in assets (the
+        other files of a batch upload, by path) and then in ASSET_DIR.
         
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Skip empty lines
-            if not line:
-                i += 1
-                continue
-            
-            # Handle headers with exact styling
-            if line.startswith('# '):
-                text = self._format_inline_markdown_exactly(line[2:])
-                elements.append(Paragraph(text, self.styles['h1']))
-            elif line.startswith('## '):
-                text = self._format_inline_markdown_exactly(line[3:])
-                elements.append(Paragraph(text, self.styles['h2']))
-            elif line.startswith('### '):
-                text = self._format_inline_markdown_exactly(line[4:])
-                elements.append(Paragraph(text, self.styles['h3']))
-            elif line.startswith('#### '):
-                text = self._format_inline_markdown_exactly(line[5:])
-                elements.append(Paragraph(text, self.styles['h4']))
-            
-            # Handle lists with exact styling
-            elif line.startswith('- ') or line.startswith('* '):
-                bullet_text = line[2:]
-                formatted_text = self._format_inline_markdown_exactly(bullet_text)
-                elements.append(Paragraph(f"• {formatted_text}", self.styles['list']))
-            
-            # Handle numbered lists
-            elif re.match(r'^\d+\. ', line):
-                number_text = re.sub(r'^\d+\. ', '', line)
-                formatted_text = self._format_inline_markdown_exactly(number_text)
-                elements.append(Paragraph(f"• {formatted_text}", self.styles['list']))
-            
-            # Handle code blocks with exact styling
-            elif line.startswith('```'):
-                code_lines = []
-                i += 1
-                while i < len(lines) and not lines[i].strip().startswith('```'):
-                    code_lines.append(lines[i])
-                    i += 1
-                if code_lines:
-                    code_text = '\n'.join(code_lines)
-                    elements.append(Paragraph(f"<code>{code_text}</code>", self.styles['code']))
-            
-            # Handle blockquotes with exact styling
-            elif line.startswith('> '):
-                quote_text = line[2:]
-                formatted_text = self._format_inline_markdown_exactly(quote_text)
-                elements.append(Paragraph(formatted_text, self.styles['quote']))
+        Identical conversions that arrive while one is rendering (same
+        content, images and render options) wait for it rather than render
+        again, and get the same PDF or the same error.
+        """
+        try:
+            # Serve repeated documents straight from the result cache
+            if cache_key is None:
+                cache_key = make_cache_key(content.encode('utf-8'), self.render_options(theme))
+            images, cache_key = await self._resolve_images(content, cache_key, ImageSource(assets, filename))
+            cached = await pdf_cache.get(cache_key)
+            if cached is not None:
+                return RenderedPdf(cached.size, data=cached.data, path=cached.path)
             
-            # Handle tables with exact styling
-            elif '|' in line and i + 1 < len(lines) and '|' in lines[i + 1]:
-                # Exact table parsing
-                table_data = []
-                while i < len(lines) and '|' in lines[i]:
-                    row = [cell.strip() for cell in lines[i].split('|')[1:-1]]
-                    table_data.append(row)
-                    i += 1
-                if table_data:
-                    table = Table(table_data)
-                    table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f6f8fa')),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#24292f')),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 14),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('TOPPADDING', (0, 0), (-1, 0), 12),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 12),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                        ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#24292f')),
-                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 1), (-1, -1), 14),
-                        ('BOTTOMPADDING', (0, 1), (-1, -1), 12),
-                        ('TOPPADDING', (0, 1), (-1, -1), 12),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d0d7de')),
-                        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f6f8fa')])
-                    ]))
-                    elements.append(table)
-                    elements.append(Spacer(1, 20))
-                continue
+            return await conversion_flights.run(
+                cache_key, lambda: self._render(content, theme, images, cache_key, parallel)
+            )
             
-            # Handle horizontal rules
-            elif line.startswith('---') or line.startswith('***'):
-                elements.append(Spacer(1, 32))
-                # Add exact horizontal rule
-                hr_style = ParagraphStyle(
-                    'ExactHR',
-                    parent=self.styles['normal'],
-                    borderWidth=1,
-                    borderColor=colors.HexColor('#d0d7de'),
-                    spaceAfter=32,
-                    spaceBefore=32,
-                    leading=1
-                )
-                elements.append(Paragraph("", hr_style))
+        except FileConversionError:
+            raise
+        except Exception as e:
+            raise ConversionFailedError(f"Failed to convert markdown to PDF: {str(e)}")
+    
+    async def _render_preview(
+        self,
+        content: str,
+        theme: Optional[str],
+        images: Dict[str, bytes],
+        pages: int,
+        cache_key: str
+    ) -> "RenderedPdf":
+        result = await render_executor.run(render_markdown_preview, await self._tokens(content), theme, images, pages)
+        await pdf_cache.put(cache_key, result.data)
+        return result
+    
+    async def preview_markdown_to_pdf(
+        self,
+        content: str,
+        theme: Optional[str] = None,
+        pages: int = 1,
+        cache_key: Optional[str] = None
+    ) -> "RenderedPdf":
+        """
+        Convert only the first pages of markdown content to PDF, for previews
+        
+        Layout stops once pages pages are finished, so a preview takes about
+        as long as those pages however long the document is. Previews are
+        cached and coalesced like full conversions, under their own key.
+        """
+        try:
+            if cache_key is None:
+                cache_key = make_cache_key(content.encode('utf-8'), self.preview_options(theme, pages))
+            images, cache_key = await self._resolve_images(content, cache_key, ImageSource())
+            cached = await pdf_cache.get(cache_key)
+            if cached is not None:
+                return RenderedPdf(cached.size, data=cached.data, path=cached.path)
             
-            # Handle regular text with exact styling
-            else:
-                formatted_text = self._format_inline_markdown_exactly(line)
-                elements.append(Paragraph(formatted_text, self.styles['normal']))
+            return await conversion_flights.run(
+                cache_key, lambda: self._render_preview(content, theme, images, pages, cache_key)
+            )
             
-            i += 1
-        
-        return elements
+        except FileConversionError:
+            raise
+        except Exception as e:
+            raise ConversionFailedError(f"Failed to convert markdown to PDF: {str(e)}")
     
-    def _format_inline_markdown_exactly(self, text: str) -> str:
-        """Format inline markdown elements with exact HTML tags"""
-        # Bold
-        text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-        # Italic
-        text = re.sub(r'\*(.*?)\*', r'<i>\1</i>', text)
-        # Inline code with exact styling
-        text = re.sub(r'`(.*?)`', r'<code>\1</code>', text)
-        # Links (simple handling)
-        text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'\1', text)
-        # Unescape HTML entities
-        text = unescape(text)
-        return text
+    async def _render_html(self, content: str, cache_key: str) -> bytes:
+        html = (await render_executor.run(render_markdown_to_html, content)).encode('utf-8')
+        await pdf_cache.put(cache_key, html)
+        return html
     
-    async def convert_markdown_to_pdf(self, content: str, filename: str) -> str:
-        """Convert markdown content to PDF with exact Cursor styling"""
+    async def convert_markdown_to_html(self, content: str, cache_key: Optional[str] = None) -> bytes:
+        """
+        Convert markdown content to a UTF-8 HTML fragment with Python-Markdown
+        
+        Python-Markdown takes about a second for a few hundred KB, so it runs
+        in the render workers like PDF layout. Results are cached and
+        coalesced like PDFs.
+        """
         try:
-            # Create a temporary file for the PDF
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                pdf_path = tmp_file.name
+            if cache_key is None:
+                cache_key = make_cache_key(content.encode('utf-8'), self.html_options())
+            cached = await pdf_cache.get(cache_key, spool=False)
+            if cached is not None:
+                return cached.data
             
-            # Create PDF document with exact margins
-            doc = SimpleDocTemplate(
-                pdf_path, 
-                pagesize=A4,
-                rightMargin=settings.PDF_MARGIN*mm,
-                leftMargin=settings.PDF_MARGIN*mm,
-                topMargin=settings.PDF_MARGIN*mm,
-                bottomMargin=settings.PDF_MARGIN*mm
-            )
+            return await conversion_flights.run(cache_key, lambda: self._render_html(content, cache_key))
             
-            # Parse markdown with exact styling
-            elements = self._parse_markdown_exactly(content)
+        except FileConversionError:
+            raise
+        except Exception as e:
+            raise ConversionFailedError(f"Failed to convert markdown to HTML: {str(e)}")
+    
+    async def stream_markdown_to_pdf(
+        self,
+        content: str,
+        theme: Optional[str] = None,
+        cache_key: Optional[str] = None
+    ) -> Union["RenderedPdf", PdfStream]:
+        """
+        Start a conversion whose PDF is sent while it is still being laid out
+        
+        A cached PDF is returned as usual, as is the result of an identical
+        conversion already in progress. Otherwise this waits for a free
+        render worker, so a full queue is still reported before any response
+        starts, and returns a PdfStream of the pages as the worker writes them.
+        """
+        try:
+            if cache_key is None:
+                cache_key = make_cache_key(content.encode('utf-8'), self.render_options(theme))
+            images, cache_key = await self._resolve_images(content, cache_key, ImageSource())
+            cached = await pdf_cache.get(cache_key)
+            if cached is not None:
+                return RenderedPdf(cached.size, data=cached.data, path=cached.path)
             
-            # Build PDF
-            doc.build(elements)
+            # An identical conversion already under way is joined rather than started again
+            if conversion_flights.joinable(cache_key):
+                return await conversion_flights.run(
+                    cache_key, lambda: self._render(content, theme, images, cache_key)
+                )
             
-            return pdf_path
+            # Create the file up front so the stream can open it before the worker does, and
+            # reserve its likely size, as nothing can be refused once the response has started
+            tokens = await self._tokens(content)
+            pdf_path = pdf_spool.new_path()
+            Path(pdf_path).touch()
+            pdf_spool.register(pdf_path, reserve=STREAM_SPOOL_RESERVE * len(content))
+            try:
+                render = await render_executor.submit(render_markdown_to_pdf_stream, tokens, theme, pdf_path, images)
+            except BaseException:
+                pdf_spool.release(pdf_path)
+                raise
+            return PdfStream(pdf_path, render, cache_key)
             
+        except FileConversionError:
+            raise
         except Exception as e:
             raise ConversionFailedError(f"Failed to convert markdown to PDF: {str(e)}")
 
+class RenderedPdf:
+    """A finished PDF, held in memory or spooled to disk when large"""
+    
+    def __init__(
+        self,
+        size: int,
+        data: Optional[bytes] = None,
+        path: Optional[str] = None,
+        pages: int = 0,
+        timings: Optional[Dict[str, float]] = None,
+        outline: Optional[List[OutlineEntry]] = None
+    ):
+        self.size = size
+        self.data = data
+        self.path = path
+        # Page count and per-stage seconds, known only for freshly rendered PDFs
+        self.pages = pages
+        self.timings = timings or {}
+        # Headings placed in the PDF outline, needed to merge section PDFs
+        self.outline = outline or []
+
+def _share_result(result: Union[RenderedPdf, bytes]) -> Union[RenderedPdf, bytes]:
+    """A waiter's own copy of a shared result; each response deletes its spool file once sent"""
+    if not isinstance(result, RenderedPdf) or result.path is None:
+        return result
+    return RenderedPdf(
+        result.size,
+        path=pdf_spool.share(result.path),
+        pages=result.pages,
+        timings=result.timings,
+        outline=result.outline
+    )
+
+def _release_result(result: Union[RenderedPdf, bytes]):
+    if isinstance(result, RenderedPdf) and result.path is not None:
+        pdf_spool.release(result.path)
+
+# Conversions rendering right now, by cache key, for identical requests to wait on
+conversion_flights = SingleFlight(share=_share_result, release=_release_result)
+
+def _renderer():
+    # Imported on first use: only render workers pay for loading ReportLab and Pillow
+    from app.services.markdown_renderer import markdown_renderer
+    return markdown_renderer
+
+def render_tokens_to_pdf(
+    tokens: List[Token],
+    theme: Optional[str] = None,
+    images: Optional[Dict[str, bytes]] = None
+) -> RenderedPdf:
+    """Render entry point executed inside render worker processes, for a whole document or one section"""
+    return _renderer().build_pdf_from_tokens(tokens, theme, images)
+
+def section_parts(content: str, parts: int) -> List[List[Token]]:
+    """Tokenize content (through the parse cache) and group its top-level sections into at most parts runs of similar size"""
+    sections = split_sections(parse_cache.tokens(content))
+    if len(sections) < 2:
+        return sections
+    weights = [
+        sum(len(token.text) + sum(len(cell) for row in token.rows or () for cell in row) for token in section)
+        for section in sections
+    ]
+    target = sum(weights) / min(parts, len(sections))
+    groups = [[]]
+    weight = 0
+    for section, section_weight in zip(sections, weights):
+        if groups[-1] and weight + section_weight / 2 > target * len(groups) and len(groups) < parts:
+            groups.append([])
+        groups[-1].extend(section)
+        weight += section_weight
+    return groups
+
+def render_markdown_preview(
+    tokens: List[Token],
+    theme: Optional[str],
+    images: Optional[Dict[str, bytes]],
+    pages: int
+) -> RenderedPdf:
+    """Preview render entry point executed inside render worker processes"""
+    return _renderer().build_preview(tokens, theme, images, pages)
+
+def render_markdown_to_html(content: str) -> str:
+    """HTML render entry point executed inside render worker processes"""
+    # Imported on first use, like the renderer: the server process never loads Python-Markdown
+    from app.services.html_renderer import html_renderer
+    return html_renderer.render(content)
+
+def render_markdown_to_pdf_stream(
+    tokens: List[Token],
+    theme: Optional[str],
+    pdf_path: str,
+    images: Optional[Dict[str, bytes]] = None
+) -> RenderedPdf:
+    """Streaming render entry point executed inside render worker processes"""
+    return _renderer().build_pdf_stream(tokens, theme, pdf_path, images)
+
+# Set in a render worker whose warm-up failed
+_warm_up_error: Optional[str] = None
+
+def warm_up_render_worker():
+    """
+    Render worker initializer: load the renderer, its fonts and the default theme before the first conversion
+
+    A failure is kept rather than raised, which would break the whole pool;
+    render_worker_status() reports it to the readiness check.
+    """
+    global _warm_up_error
+    try:
+        _renderer().warm_up()
+    except Exception as e:
+        _warm_up_error = f"{type(e).__name__}: {e}"
+
+def render_worker_status() -> Optional[str]:
+    """Readiness probe executed inside render worker processes; the warm-up error, if any"""
+    return _warm_up_error
+
 # Global service instance
 markdown_service = MarkdownConverterService()
@@ -0,0 +1,116 @@
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+# Token kinds
+HEADING = "heading"
+BULLET = "bullet"
+ORDERED = "ordered"
+CODE = "code"
+QUOTE = "quote"
+TABLE = "table"
+RULE = "rule"
+IMAGE = "image"
+PARAGRAPH = "paragraph"
+
+# One anchored pattern classifies every block marker; the group that matched tells which one
+_BLOCK_START = re.compile(r'(#{1,4}) |([-*]) |(\d+)\. |(```)|(> )|(---|\*\*\*)')
+_HEADING_GROUP, _BULLET_GROUP, _ORDERED_GROUP, _FENCE_GROUP, _QUOTE_GROUP, _RULE_GROUP = range(1, 7)
+
+# A line holding nothing but an image: ![alt](path "optional title")
+IMAGE_LINE = re.compile(r'!\[([^\]]*)\]\(\s*([^)\s]+)(?:\s+"[^"]*")?\s*\)')
+
+class Token(NamedTuple):
+    """A block-level markdown element"""
+    kind: str
+    text: str = ''
+    level: int = 0
+    rows: Optional[List[List[str]]] = None
+    url: str = ''  # image path, with the alt text in text
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Lines of text without their newlines, like text.split('\n') but without building the list"""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+def _table_row(line: str) -> List[str]:
+    return [cell.strip() for cell in line.split('|')[1:-1]]
+
+def tokenize(lines: Iterable[str]) -> Iterator[Token]:
+    """
+    Classify markdown lines into block tokens in a single linear pass
+
+    Lines are consumed lazily with one line of lookahead (needed to recognise
+    tables), so the input can be any iterable of lines without newlines.
+    """
+    it = iter(lines)
+    line = next(it, None)
+    while line is not None:
+        stripped = line.strip()
+
+        # Skip empty lines
+        if not stripped:
+            line = next(it, None)
+            continue
+
+        match = _BLOCK_START.match(stripped)
+        group = match.lastindex if match else None
+
+        if group == _HEADING_GROUP:
+            yield Token(HEADING, stripped[match.end():], level=len(match.group(1)))
+        elif group == _BULLET_GROUP:
+            yield Token(BULLET, stripped[2:])
+        elif group == _ORDERED_GROUP:
+            yield Token(ORDERED, stripped[match.end():])
+        elif group == _FENCE_GROUP:
+            # Fenced code keeps its raw lines up to the closing fence (or end of input)
+            code_lines = []
+            line = next(it, None)
+            while line is not None and not line.strip().startswith('```'):
+                code_lines.append(line)
+                line = next(it, None)
+            if code_lines:
+                yield Token(CODE, '\n'.join(code_lines))
+        elif group == _QUOTE_GROUP:
+            yield Token(QUOTE, stripped[2:])
+        elif '|' in stripped:
+            # A table needs at least two consecutive lines containing '|'
+            next_line = next(it, None)
+            if next_line is not None and '|' in next_line:
+                rows = [_table_row(line)]
+                line = next_line
+                while line is not None and '|' in line:
+                    rows.append(_table_row(line))
+                    line = next(it, None)
+                yield Token(TABLE, rows=rows)
+                continue
+            yield _rule_or_paragraph(stripped, group)
+            line = next_line
+            continue
+        else:
+            yield _rule_or_paragraph(stripped, group)
+
+        line = next(it, None)
+
+def _rule_or_paragraph(stripped: str, group: Optional[int]) -> Token:
+    if group == _RULE_GROUP:
+        return Token(RULE)
+    if stripped.startswith('!['):
+        image = IMAGE_LINE.fullmatch(stripped)
+        if image:
+            return Token(IMAGE, image.group(1), url=image.group(2))
+    return Token(PARAGRAPH, stripped)
+
+def split_sections(tokens: Iterable[Token]) -> List[List[Token]]:
+    """Group tokens into sections that each start at a top-level heading (any leading content is its own section)"""
+    sections = [[]]
+    for token in tokens:
+        if token.kind == HEADING and token.level == 1 and sections[-1]:
+            sections.append([])
+        sections[-1].append(token)
+    return [section for section in sections if section]
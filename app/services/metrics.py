@@ -0,0 +1,183 @@
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = tuple(1024 * 4 ** power for power in range(9))  # 1KB .. 64MB
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        buckets = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            running += count
+            buckets.append(("+Inf" if bound == float("inf") else f"{bound:g}", running))
+        return buckets
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+class MetricsRegistry:
+    """
+    Counters and histograms keyed by metric name and labels
+
+    All observations happen on the event loop thread (render workers send their
+    stage timings back with the result), so plain increments are safe and
+    recording a sample costs a dict lookup and a bisect, with no locks.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[_Labels, float]] = {}
+        self._histograms: Dict[str, Dict[_Labels, Histogram]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._help: Dict[str, str] = {}
+
+    def counter(self, name: str, help_text: str):
+        self._counters[name] = {}
+        self._help[name] = help_text
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self._histograms[name] = {}
+        self._buckets[name] = buckets
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1, **labels: str):
+        series = self._counters[name]
+        key = tuple(labels.items())
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels: str):
+        series = self._histograms[name]
+        key = tuple(labels.items())
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self._buckets[name])
+        histogram.observe(value)
+
+    def prometheus(self, gauges: Iterable[Tuple[str, str, Dict[str, str], float]] = ()) -> str:
+        """Render everything in the Prometheus text exposition format"""
+        lines = []
+        for name, series in self._counters.items():
+            lines += [f"# HELP {name} {self._help[name]}", f"# TYPE {name} counter"]
+            for labels, value in series.items():
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for name, series in self._histograms.items():
+            lines += [f"# HELP {name} {self._help[name]}", f"# TYPE {name} histogram"]
+            for labels, histogram in series.items():
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        declared = set()
+        for name, help_text, labels, value in gauges:
+            if name not in declared:
+                declared.add(name)
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            lines.append(f"{name}{_format_labels(tuple(labels.items()))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self, gauges: Iterable[Tuple[str, str, Dict[str, str], float]] = ()) -> dict:
+        """Everything as plain JSON-friendly data"""
+        return {
+            "counters": {
+                name: [{"labels": dict(labels), "value": value} for labels, value in series.items()]
+                for name, series in self._counters.items()
+            },
+            "histograms": {
+                name: [
+                    {
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(histogram.cumulative())
+                    }
+                    for labels, histogram in series.items()
+                ]
+                for name, series in self._histograms.items()
+            },
+            "gauges": [{"name": name, "labels": labels, "value": value} for name, _, labels, value in gauges]
+        }
+
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+class ConversionMetrics:
+    """The service's conversion metrics, labelled by converter"""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        registry.counter("fileconverter_conversions_total", "Conversions handled, by converter and outcome")
+        registry.histogram(
+            "fileconverter_conversion_seconds", "Conversion latency up to the response being sent", LATENCY_BUCKETS
+        )
+        registry.histogram("fileconverter_stage_seconds", "Latency of each pipeline stage", LATENCY_BUCKETS)
+        registry.histogram("fileconverter_input_bytes", "Size of uploaded documents", SIZE_BUCKETS)
+        registry.histogram("fileconverter_output_bytes", "Size of produced documents", SIZE_BUCKETS)
+        registry.histogram("fileconverter_output_pages", "Pages per produced PDF", PAGE_BUCKETS)
+
+    def count(self, converter: str, outcome: str, seconds: Optional[float] = None):
+        """Count a finished request, and its latency if it got as far as a response"""
+        self.registry.inc("fileconverter_conversions_total", converter=converter, outcome=outcome)
+        if seconds is not None:
+            self.registry.observe("fileconverter_conversion_seconds", seconds, converter=converter)
+
+    def stage(self, converter: str, stage: str, seconds: float):
+        self.registry.observe("fileconverter_stage_seconds", seconds, converter=converter, stage=stage)
+
+    def input(self, converter: str, size: int):
+        self.registry.observe("fileconverter_input_bytes", size, converter=converter)
+
+    def result(self, converter: str, result):
+        """Record a rendered PDF: its size and, unless it came from the cache, pages and stage timings"""
+        self.registry.observe("fileconverter_output_bytes", result.size, converter=converter)
+        if result.pages:
+            self.registry.observe("fileconverter_output_pages", result.pages, converter=converter)
+        for stage, seconds in result.timings.items():
+            self.stage(converter, stage, seconds)
+
+    async def sent(self, converter: str, stopwatch: "Stopwatch"):
+        """Response body fully written: close out the request's timings (a coroutine so it runs on the loop)"""
+        self.stage(converter, "response_write", stopwatch.split())
+        self.count(converter, "ok", stopwatch.total())
+
+class Stopwatch:
+    """Split timer for the stages of one request"""
+    __slots__ = ("started", "last")
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+
+    def split(self) -> float:
+        """Seconds since the previous split (or start)"""
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.last = now
+        return elapsed
+
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+# Global metrics instances
+metrics_registry = MetricsRegistry()
+conversion_metrics = ConversionMetrics(metrics_registry)
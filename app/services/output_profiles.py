@@ -0,0 +1,18 @@
+from typing import Dict, NamedTuple, Optional
+from app.core.config import settings
+
+class OutputProfile(NamedTuple):
+    """How a rendered PDF trades file size against render time"""
+    compression: int  # zlib level for page streams, 0 = stored uncompressed
+    deduplicate: bool  # write identical resource dictionaries and merged objects once
+
+OUTPUT_PROFILES: Dict[str, OutputProfile] = {
+    "compact": OutputProfile(compression=9, deduplicate=True),
+    "fast": OutputProfile(compression=0, deduplicate=False)
+}
+
+def output_profile(name: Optional[str] = None) -> OutputProfile:
+    name = name or settings.PDF_OUTPUT_PROFILE
+    if name not in OUTPUT_PROFILES:
+        raise ValueError(f"Unknown PDF_OUTPUT_PROFILE '{name}'")
+    return OUTPUT_PROFILES[name]
@@ -0,0 +1,49 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+from app.core.config import settings
+from app.services.markdown_tokenizer import Token, iter_lines, tokenize
+
+class ParseCache:
+    """
+    LRU of tokenized markdown documents keyed by content hash, in the server process
+
+    Every PDF of a document is laid out from the same block tokens: full
+    conversions, streamed ones, the sections of a parallel render and
+    previews of any length or theme. Tokenizing here and sending the tokens
+    to the render workers means a document is parsed once for all of them,
+    whichever worker ends up rendering it. Tokenizing is cheap next to
+    layout (a few ms for 200KB), so the server process can afford it.
+
+    Safe to call from several threads; callers tokenize in asyncio.to_thread.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[bytes, Tuple[List[Token], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tokens(self, content: str) -> List[Token]:
+        """Block tokens of content, as the PDF renderer lays them out"""
+        key = hashlib.sha256(content.encode('utf-8')).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+        tokens = list(tokenize(iter_lines(content)))
+        # Tokens hold roughly the text again plus a small object per block
+        cost = len(content) + 64 * len(tokens)
+        with self._lock:
+            if key not in self._entries and cost <= self.max_bytes:
+                self._entries[key] = (tokens, cost)
+                self.size += cost
+                while self.size > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.size -= evicted
+        return tokens
+
+# Server-process cache shared by every conversion
+parse_cache = ParseCache(settings.PARSE_CACHE_MAX_BYTES)
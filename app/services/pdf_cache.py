@@ -0,0 +1,293 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.services.spool import pdf_spool
+
+# Bump when the renderer output changes so stale entries are never served
+CACHE_FORMAT_VERSION = 7
+
+# Disk tier files hold PDFs and HTML alike, so their name says nothing about the format
+CACHE_FILE_SUFFIX = '.result'
+
+def cache_key_hasher(options: Dict[str, Any]):
+    """Hash object for a cache key; feed it the markdown bytes, in as many chunks as needed"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        {"version": CACHE_FORMAT_VERSION, **options},
+        sort_keys=True
+    ).encode('utf-8'))
+    digest.update(b'\0')
+    return digest
+
+def make_cache_key(content: bytes, options: Dict[str, Any]) -> str:
+    """Content address for a conversion: markdown bytes plus effective render options"""
+    digest = cache_key_hasher(options)
+    digest.update(content)
+    return digest.hexdigest()
+
+class MemoryCacheTier:
+    """LRU tier holding PDF bytes in process memory"""
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        data, stored_at = entry
+        if time.time() - stored_at > self.ttl:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (data, time.time())
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        data, _ = self._entries.pop(key)
+        self.size -= len(data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes}
+
+class CacheHit:
+    """A cached result, in memory (data) or as a spool file the caller sends and releases (path)"""
+    __slots__ = ("size", "data", "path")
+
+    def __init__(self, size: int, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.size = size
+        self.data = data
+        self.path = path
+
+def _link_or_copy(source: str, destination: str):
+    # A hard link shares the bytes without copying them; other filesystems get a copy
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+def _spool_file(source: str, destination: str):
+    _link_or_copy(source, destination)
+    # The spool sweeper goes by modification time, which a link shares with the cache file
+    os.utime(destination)
+
+class DiskCacheTier:
+    """
+    LRU tier storing results as files named by their cache key
+
+    The index lives on the event loop; reading, writing and deleting the
+    files happens in worker threads so a slow disk never stalls requests.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._load_index()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def _load_index(self):
+        """Rebuild the LRU index from files left by earlier runs"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.glob(f'*{CACHE_FILE_SUFFIX}'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        paths = []
+        for stored_at, key, size in sorted(files):
+            self._entries[key] = (size, stored_at)
+            self.size += size
+        while self.size > self.max_bytes:
+            paths.append(self._forget(next(iter(self._entries))))
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    async def get(self, key: str, spool_over: Optional[int] = None) -> Optional[CacheHit]:
+        """
+        Look up a stored result
+
+        Files larger than spool_over bytes are linked into the spool
+        directory for the response to send, instead of being read into memory.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        size, stored_at = entry
+        if time.time() - stored_at > self.ttl:
+            await self._delete([self._forget(key)])
+            return None
+        path = str(self._path(key))
+        spooled = None
+        try:
+            if spool_over is not None and size > spool_over:
+                spooled = pdf_spool.new_path()
+                await asyncio.to_thread(_spool_file, path, spooled)
+                hit = CacheHit(size, path=pdf_spool.register(spooled))
+            else:
+                data = await asyncio.to_thread(Path(path).read_bytes)
+                hit = CacheHit(len(data), data=data)
+        except OSError:
+            # Evicted by another request while this one was reading it, or unreadable
+            if spooled is not None:
+                Path(spooled).unlink(missing_ok=True)
+            if self._entries.get(key) is entry:
+                await self._delete([self._forget(key)])
+            return None
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        return hit
+
+    async def put(self, key: str, data: bytes):
+        def write(tmp_path: str):
+            with open(tmp_path, 'wb') as tmp_file:
+                tmp_file.write(data)
+        await self._store(key, len(data), write)
+
+    async def put_file(self, key: str, path: str):
+        def write(tmp_path: str):
+            # Replace the placeholder with the finished file's bytes, linked where possible
+            os.unlink(tmp_path)
+            _link_or_copy(path, tmp_path)
+        await self._store(key, await asyncio.to_thread(os.path.getsize, path), write)
+
+    def _write(self, key: str, write) -> bool:
+        # Write atomically so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            Path(tmp_path).unlink(missing_ok=True)
+            return False
+        return True
+
+    async def _store(self, key: str, size: int, write):
+        if size > self.max_bytes:
+            return
+        if not await asyncio.to_thread(self._write, key, write):
+            return
+        # The file just written replaced any older one under the same name
+        if key in self._entries:
+            self._forget(key)
+        self._entries[key] = (size, time.time())
+        self.size += size
+        evicted = []
+        while self.size > self.max_bytes:
+            evicted.append(self._forget(next(iter(self._entries))))
+        if evicted:
+            await self._delete(evicted)
+
+    def _forget(self, key: str) -> Path:
+        """Drop an entry from the index, returning its file for the caller to delete"""
+        size, _ = self._entries.pop(key)
+        self.size -= size
+        return self._path(key)
+
+    async def _delete(self, paths: List[Path]):
+        def delete():
+            for path in paths:
+                path.unlink(missing_ok=True)
+        await asyncio.to_thread(delete)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes}
+
+class PdfResultCache:
+    """Two-tier (memory, then disk) content-addressed cache of rendered results"""
+
+    def __init__(self, memory: Optional[MemoryCacheTier], disk: Optional[DiskCacheTier]):
+        self.memory = memory
+        self.disk = disk
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str, spool: bool = True) -> Optional[CacheHit]:
+        """
+        Return a cached result, promoting small disk hits into memory
+
+        Disk hits over PDF_MEMORY_OUTPUT_MAX_BYTES come back as a spool file,
+        like a large fresh render, unless spool is False (for results the
+        caller needs in memory).
+        """
+        if self.memory is not None:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory_hits += 1
+                return CacheHit(len(data), data=data)
+        if self.disk is not None:
+            hit = await self.disk.get(key, settings.PDF_MEMORY_OUTPUT_MAX_BYTES if spool else None)
+            if hit is not None:
+                self.disk_hits += 1
+                if hit.data is not None and self.memory is not None:
+                    self.memory.put(key, hit.data)
+                return hit
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes):
+        """Store result bytes in every tier that has room for them"""
+        if self.memory is not None:
+            self.memory.put(key, data)
+        if self.disk is not None:
+            await self.disk.put(key, data)
+
+    async def put_file(self, key: str, path: str):
+        """Store a spooled result; it goes to the disk tier only"""
+        if self.disk is not None:
+            await self.disk.put_file(key, path)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.memory is not None or self.disk is not None,
+            "hits": self.memory_hits + self.disk_hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory": self.memory.stats() if self.memory is not None else None,
+            "disk": self.disk.stats() if self.disk is not None else None
+        }
+
+def create_pdf_cache() -> PdfResultCache:
+    """Build the result cache from settings"""
+    memory = None
+    disk = None
+    if settings.CACHE_ENABLED and settings.CACHE_MEMORY_MAX_BYTES > 0:
+        memory = MemoryCacheTier(settings.CACHE_MEMORY_MAX_BYTES, settings.CACHE_MEMORY_TTL)
+    if settings.CACHE_ENABLED and settings.CACHE_DISK_MAX_BYTES > 0:
+        directory = settings.CACHE_DISK_DIR or os.path.join(tempfile.gettempdir(), "fileconverter-cache")
+        disk = DiskCacheTier(directory, settings.CACHE_DISK_MAX_BYTES, settings.CACHE_DISK_TTL)
+    return PdfResultCache(memory, disk)
+
+# Global cache instance
+pdf_cache = create_pdf_cache()
@@ -0,0 +1,233 @@
+import re
+from hashlib import md5, sha1
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+# An indirect reference ("12 0 R"); ReportLab only ever writes generation 0
+_REFERENCE = re.compile(rb'(?<![\d.])(\d+) 0 R\b')
+_KIDS = re.compile(rb'/Kids\s*\[([^\]]*)\]')
+
+class OutlineEntry(NamedTuple):
+    """A heading in the PDF outline"""
+    title: str
+    level: int  # outline depth, starting at 0
+    page: int  # zero-based page index
+    top: float  # top edge of the heading in points from the bottom of the page
+
+class _SourcePdf:
+    """The objects of a ReportLab-generated PDF, located through its xref table"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.version = data[5:data.index(b'\n')].strip()
+        startxref = int(data[data.rindex(b'startxref') + 9:].split()[0])
+        trailer_start = data.index(b'trailer', startxref)
+        self.trailer = data[trailer_start:]
+
+        # ReportLab writes a single xref section starting at object 0
+        rows = data[startxref:trailer_start].split(b'\n')
+        offsets = {}
+        for number, row in enumerate(rows[2:2 + int(rows[1].split()[1])]):
+            fields = row.split()
+            if fields[2] == b'n':
+                offsets[number] = int(fields[0])
+        # Objects are written back to back, so each one ends where the next begins
+        starts = sorted(offsets.values()) + [startxref]
+        ends = dict(zip(starts, starts[1:]))
+        self._extents = {number: (offset, ends[offset]) for number, offset in offsets.items()}
+
+        root = self.object(self._trailer_reference(b'/Root'))
+        self.pages_number = int(re.search(rb'/Pages (\d+) 0 R', root).group(1))
+        kids = _KIDS.search(self.object(self.pages_number)).group(1)
+        self.page_numbers = [int(number) for number in _REFERENCE.findall(kids)]
+        self.info_number = self._trailer_reference(b'/Info')
+
+    def _trailer_reference(self, key: bytes) -> int:
+        return int(re.search(re.escape(key) + rb' (\d+) 0 R', self.trailer).group(1))
+
+    def object(self, number: int) -> bytes:
+        """The body of an object, between "n 0 obj" and "endobj" """
+        start, end = self._extents[number]
+        chunk = self.data[start:end]
+        return chunk[chunk.index(b' obj') + 4:chunk.rindex(b'endobj')]
+
+    def id(self) -> bytes:
+        match = re.search(rb'/ID\s*\[([^\]]*)\]', self.trailer)
+        return match.group(1) if match else b''
+
+def _split_stream(body: bytes) -> Tuple[bytes, bytes]:
+    """Split an object body into its dictionary part and its stream data, if any"""
+    index = body.find(b'\nstream\n')
+    if index == -1:
+        return body, b''
+    return body[:index], body[index:]
+
+def _text_string(text: str) -> bytes:
+    """A PDF text string that holds any unicode text"""
+    return b'<FEFF' + text.encode('utf-16-be').hex().upper().encode('ascii') + b'>'
+
+class _Writer:
+    """Writes numbered objects to a file, remembering their offsets for the xref"""
+
+    def __init__(self, output: BinaryIO, version: bytes):
+        self.output = output
+        self.offset = 0
+        self.offsets: Dict[int, int] = {}
+        self.write(b'%PDF-' + version + b'\n%\223\214\213\236 ReportLab Generated PDF document http://www.reportlab.com\n')
+
+    def write(self, data: bytes):
+        self.output.write(data)
+        self.offset += len(data)
+
+    def object(self, number: int, body: bytes):
+        self.offsets[number] = self.offset
+        if not body.startswith(b'\n'):
+            body = b'\n' + body
+        if not body.endswith(b'\n'):
+            body += b'\n'
+        self.write(b'%d 0 obj' % number + body + b'endobj\n')
+
+def _outline_objects(entries: List[OutlineEntry], root: int, first: int, pages: List[int]) -> List[Tuple[int, bytes]]:
+    """The outline root and item objects for entries, numbered from first"""
+    parents: List[Optional[int]] = []
+    children: Dict[Optional[int], List[int]] = {None: []}
+    stack: List[Tuple[int, int]] = []
+    for index, entry in enumerate(entries):
+        while stack and stack[-1][0] >= entry.level:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
+        parents.append(parent)
+        children[parent].append(index)
+        children[index] = []
+        stack.append((entry.level, index))
+
+    # Every item is open, so its count is all of its descendants
+    counts = [0] * len(entries)
+    for index in reversed(range(len(entries))):
+        counts[index] = sum(1 + counts[child] for child in children[index])
+
+    def links(index: Optional[int]) -> bytes:
+        kids = children[index]
+        if not kids:
+            return b''
+        total = counts[index] if index is not None else len(entries)
+        return b' /First %d 0 R /Last %d 0 R /Count %d' % (first + kids[0], first + kids[-1], total)
+
+    objects = [(root, b'<< /Type /Outlines' + links(None) + b' >>')]
+    for index, entry in enumerate(entries):
+        parent = parents[index]
+        siblings = children[parent]
+        position = siblings.index(index)
+        body = b'<< /Title ' + _text_string(entry.title)
+        body += b' /Parent %d 0 R' % (root if parent is None else first + parent)
+        if position > 0:
+            body += b' /Prev %d 0 R' % (first + siblings[position - 1])
+        if position + 1 < len(siblings):
+            body += b' /Next %d 0 R' % (first + siblings[position + 1])
+        body += links(index)
+        body += b' /Dest [ %d 0 R /XYZ 0 %.2f null ] >>' % (pages[entry.page], entry.top)
+        objects.append((first + index, body))
+    return objects
+
+def merge_pdfs(
+    parts: List[bytes],
+    outlines: List[List[OutlineEntry]],
+    output: BinaryIO,
+    deduplicate: bool = False
+) -> int:
+    """
+    Concatenate ReportLab-generated PDFs into one, with a single outline
+
+    Only the objects each part's pages use are copied, renumbered, and the
+    part page trees are replaced by one. The parts' own outlines are dropped;
+    outlines[i] lists the headings of parts[i] and is rebuilt into one outline
+    whose entries point at the merged pages. Returns the page count.
+
+    With deduplicate, an object that comes out byte for byte the same as one
+    already written, such as every part's copy of the same font, is written
+    once and shared. Objects are copied after the objects they refer to, so
+    two copies are only the same once their own references are.
+    """
+    sources = [_SourcePdf(data) for data in parts]
+    writer = _Writer(output, max(source.version for source in sources))
+    catalog_number, pages_number, info_number, outline_number = 1, 2, 3, 4
+    next_number = 5
+    # Digest of a renumbered object -> its merged number
+    written: Dict[bytes, int] = {}
+
+    merged_pages = []
+    merged_outline = []
+    for source, outline in zip(sources, outlines):
+        # Pages are never shared, so they can be numbered up front
+        renumbered = {source.pages_number: pages_number}
+        for number in source.page_numbers:
+            renumbered[number] = next_number
+            next_number += 1
+        merged_outline.extend(entry._replace(page=entry.page + len(merged_pages)) for entry in outline)
+        merged_pages.extend(renumbered[number] for number in source.page_numbers)
+
+        def renumber(match):
+            return b'%d 0 R' % renumbered[int(match.group(1))]
+
+        copying = set()
+
+        def copy(number: int):
+            """Write an object after everything it refers to, giving it a number if it has none yet"""
+            nonlocal next_number
+            copying.add(number)
+            dictionary, stream = _split_stream(source.object(number))
+            for reference in _REFERENCE.findall(dictionary):
+                reference = int(reference)
+                if reference in renumbered:
+                    continue
+                if reference in copying:
+                    # A cycle: number it now, and leave it unshared
+                    renumbered[reference] = next_number
+                    next_number += 1
+                else:
+                    copy(reference)
+            copying.discard(number)
+            body = _REFERENCE.sub(renumber, dictionary) + stream
+            if number in renumbered:
+                writer.object(renumbered[number], body)
+                return
+            digest = sha1(body).digest() if deduplicate else None
+            if digest in written:
+                renumbered[number] = written[digest]
+                return
+            renumbered[number] = next_number
+            next_number += 1
+            if digest is not None:
+                written[digest] = renumbered[number]
+            writer.object(renumbered[number], body)
+
+        for number in source.page_numbers:
+            copy(number)
+
+    writer.object(pages_number, b'<< /Count %d /Kids [ %s ] /Type /Pages >>' % (
+        len(merged_pages), b' '.join(b'%d 0 R' % number for number in merged_pages)
+    ))
+    catalog = b'<< /PageMode /UseNone /Pages %d 0 R /Type /Catalog' % pages_number
+    if merged_outline:
+        catalog += b' /Outlines %d 0 R' % outline_number
+        for number, body in _outline_objects(merged_outline, outline_number, next_number, merged_pages):
+            writer.object(number, body)
+        next_number += len(merged_outline)
+    writer.object(catalog_number, catalog + b' >>')
+    # Info has no references; take the first part's as is
+    writer.object(info_number, sources[0].object(sources[0].info_number))
+
+    # Numbers left unused (no outline) are listed as free
+    startxref = writer.offset
+    rows = [b'xref', b'0 %d' % next_number, b'0000000000 65535 f ']
+    for number in range(1, next_number):
+        if number in writer.offsets:
+            rows.append(b'%010d 00000 n ' % writer.offsets[number])
+        else:
+            rows.append(b'0000000000 00000 f ')
+    writer.write(b'\n'.join(rows) + b'\n')
+    document_id = md5(b''.join(source.id() for source in sources)).hexdigest().encode('ascii')
+    writer.write(
+        b'trailer\n<<\n/ID [<%s><%s>] /Info %d 0 R /Root %d 0 R /Size %d\n>>\nstartxref\n%d\n%%%%EOF\n'
+        % (document_id, document_id, info_number, catalog_number, next_number, startxref)
+    )
+    return len(merged_pages)
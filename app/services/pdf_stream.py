@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Optional
+from app.core.config import settings
+from app.core.exceptions import ConversionFailedError, FileConversionError
+from app.core.responses import StreamAborted
+from app.services.pdf_cache import pdf_cache
+from app.services.spool import pdf_spool
+
+logger = logging.getLogger("uvicorn.error")
+
+# Bytes read from a growing PDF per response chunk
+STREAM_CHUNK_SIZE = 64 * 1024
+
+class PdfStream:
+    """
+    The bytes of a PDF that a render worker is still writing to a spool file
+
+    start() waits for the first bytes, and chunks() then yields whatever has
+    been written so far, waits for more while the render runs, and ends once
+    the worker has finished and the file is read to the end. The finished
+    PDF goes into the result cache and the spool file is deleted; if the
+    client goes away first, the render is left to finish and its file is
+    deleted then.
+    """
+
+    def __init__(self, path: str, render: Future, cache_key: str):
+        self.path = path
+        self.cache_key = cache_key
+        self._render = render
+        self._reader = self._read()
+        self._first = b''
+        # The worker's RenderedPdf, once the stream is complete
+        self.result: Any = None
+        # Seconds from the first read until the first bytes were available
+        self.first_byte: Optional[float] = None
+
+    async def start(self):
+        """
+        Wait for the first bytes of the PDF, before the response starts
+
+        A render that fails before writing anything raises here, where the
+        error can still become an ordinary error response: conversion errors
+        (a render limit, say) unchanged, anything else as ConversionFailedError.
+        """
+        try:
+            self._first = await self._reader.__anext__()
+        except StopAsyncIteration:
+            pass
+        except FileConversionError:
+            raise
+        except Exception as e:
+            raise ConversionFailedError(f"Failed to convert markdown to PDF: {str(e)}")
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """
+        The PDF's bytes, from the first chunk start() read
+
+        The response has started by now, so an error is logged and the
+        body aborted with StreamAborted rather than raised as an HTTP error.
+        """
+        sent = 0
+        try:
+            if self._first:
+                yield self._first
+                sent += len(self._first)
+            async for chunk in self._reader:
+                yield chunk
+                sent += len(chunk)
+        except Exception as e:
+            detail = e.detail if isinstance(e, FileConversionError) else str(e)
+            logger.error("Streamed PDF %s aborted after %d bytes: %s", self.cache_key, sent, detail)
+            raise StreamAborted() from e
+        finally:
+            await self._reader.aclose()
+
+    async def _read(self) -> AsyncIterator[bytes]:
+        render = asyncio.wrap_future(self._render)
+        started = time.perf_counter()
+        try:
+            with open(self.path, 'rb') as pdf_file:
+                while True:
+                    # Check before reading, so nothing written just before the end is missed
+                    finished = render.done()
+                    chunk = pdf_file.read(STREAM_CHUNK_SIZE)
+                    if chunk:
+                        if self.first_byte is None:
+                            self.first_byte = time.perf_counter() - started
+                        yield chunk
+                    elif finished:
+                        break
+                    else:
+                        await asyncio.wait({render}, timeout=settings.PDF_STREAM_POLL_INTERVAL)
+            self.result = render.result()
+            try:
+                await pdf_cache.put_file(self.cache_key, self.path)
+            except Exception as e:
+                # Every byte is out already; failing to cache the PDF only costs a later miss
+                logger.warning("Could not cache streamed PDF %s: %s", self.cache_key, e)
+        finally:
+            if render.done():
+                self._discard(render)
+            else:
+                render.add_done_callback(self._discard)
+
+    def _discard(self, render: asyncio.Future):
+        """Release the spool file, consuming a worker error nobody is waiting for"""
+        if not render.cancelled():
+            render.exception()
+        pdf_spool.release(self.path)
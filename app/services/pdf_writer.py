@@ -0,0 +1,208 @@
+import zlib
+from typing import BinaryIO, Dict, List
+from reportlab.pdfbase.pdfdoc import (
+    BasicFonts, PDFCatalog, PDFCrossReferenceTable, PDFDocument, PDFFile, PDFIndirectObject,
+    PDFInfo, PDFObjectReference, PDFOutlines, PDFOutlines0, PDFPage, PDFPages, PDFStream, PDFTrailer
+)
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import SimpleDocTemplate
+from app.services.output_profiles import OUTPUT_PROFILES, OutputProfile
+from app.services.pdf_merge import OutlineEntry
+
+class _Deflate:
+    """A FlateDecode stream filter with a chosen compression level"""
+    pdfname = "FlateDecode"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def encode(self, text):
+        if isinstance(text, str):
+            text = text.encode('utf8')
+        return zlib.compress(text, self.level)
+
+class StreamingPDFDocument(PDFDocument):
+    """
+    A PDF document that writes each page to its output as soon as it is added
+
+    ReportLab keeps every object until save and then formats the whole file.
+    Here a finished page, its content stream and any fonts or images it brought
+    in are formatted and written at once, then dropped. Objects that are only
+    complete at the end (the page tree, catalog, outlines, info and font
+    dictionary) and objects whose references cannot be resolved yet, such as
+    links to later bookmarks, wait for save, which writes them followed by the
+    cross-reference table and trailer. Object numbers are assigned exactly as
+    ReportLab does, so the xref simply records where each one landed.
+
+    The header is written with the first page, so the PDF version can only be
+    raised by features used before that.
+
+    The profile sets how page streams are compressed: binary Flate at its
+    level, without the ASCII85 layer ReportLab adds by default, or not at
+    all. Deduplicating profiles point pages with the same resources (fonts,
+    color spaces, images) at one shared dictionary instead of repeating it.
+    """
+
+    # Written last: they keep changing until the document is saved
+    _final_types = (PDFPages, PDFCatalog, PDFOutlines, PDFOutlines0, PDFInfo)
+
+    def __init__(self, output: BinaryIO, profile: OutputProfile = OUTPUT_PROFILES["compact"], **kwargs):
+        super().__init__(**kwargs)
+        self._output = output
+        self._offset = 0
+        self._scanned = 0
+        self._deferred = []
+        self._profile = profile
+        self._deflate = _Deflate(profile.compression) if profile.compression else None
+        # Formatted resource dictionary -> the shared object written for it
+        self._resources: Dict[bytes, PDFObjectReference] = {}
+
+    def addPage(self, page):
+        if page.compression and self._deflate and page.stream:
+            page.Contents = PDFStream(content=page.stream, filters=[self._deflate])
+            page.Contents.__Comment__ = "page stream"
+        if self._profile.deduplicate:
+            # Fills in the resources now, so pages can share them before anything is written
+            page.check_format(self)
+            resources = page.Resources.format(self)
+            if resources not in self._resources:
+                self._resources[resources] = self.Reference(page.Resources)
+            page.Resources = self._resources[resources]
+        super().addPage(page)
+        self._write_objects()
+        self._output.flush()
+
+    def format(self):
+        """Write everything not yet written, then the xref and trailer; returns nothing for SaveToFile to add"""
+        self.Reference(self.Catalog)
+        self.Reference(self.info)
+        self._write_objects(final=True)
+
+        xref = PDFCrossReferenceTable()
+        xref.addsection(0, [self.numberToId[number] for number in range(1, self.objectcounter + 1)])
+        trailer = PDFTrailer(
+            startxref=self._write(xref.format(self)),
+            Size=self.objectcounter + 1,
+            Root=self.Reference(self.Catalog),
+            Info=self.Reference(self.info),
+            ID=self.ID()
+        )
+        self._write(trailer.format(self))
+        self._output.flush()
+        return b''
+
+    def _write_objects(self, final: bool = False):
+        """Write registered objects that are ready (all remaining ones when final)"""
+        if final:
+            deferred, self._deferred = self._deferred, []
+            for oid in deferred:
+                self._write_object(oid)
+        # Formatting can register further objects, so keep going until caught up
+        while self._scanned < self.objectcounter:
+            self._scanned += 1
+            oid = self.numberToId[self._scanned]
+            if not final and (oid == BasicFonts or type(self.idToObject[oid]) in self._final_types):
+                self._deferred.append(oid)
+                continue
+            try:
+                self._write_object(oid)
+            except (KeyError, ValueError):
+                # A forward reference; it resolves by the end of the document
+                if final:
+                    raise
+                self._deferred.append(oid)
+
+    def _write_object(self, oid: str):
+        obj = self.idToObject[oid]
+        self.idToOffset[oid] = self._write(PDFIndirectObject(oid, obj).format(self))
+        if isinstance(obj, PDFPage):
+            # The page tree still lists the page and refers to it by name; drop everything else
+            name = obj.__InternalName__
+            obj.__dict__.clear()
+            obj.__InternalName__ = name
+        else:
+            # Keep the name registered so references to it still resolve
+            self.idToObject[oid] = None
+
+    def _write(self, data: bytes) -> int:
+        """Append data to the output and return the offset it starts at"""
+        if self._offset == 0:
+            header = PDFFile(self._pdfVersion).format(self)
+            self._output.write(header)
+            self._offset = len(header)
+        offset = self._offset
+        self._output.write(data)
+        self._offset += len(data)
+        return offset
+
+class StreamingCanvas(Canvas):
+    """
+    A canvas whose pages are written to its file object as they are finished
+
+    Use it as a doc template's canvasmaker with a binary file object for output,
+    binding the output profile with functools.partial.
+    """
+
+    def __init__(self, filename, *args, profile: OutputProfile = OUTPUT_PROFILES["compact"], **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        doc = self._doc
+        self._doc = StreamingPDFDocument(
+            filename,
+            profile,
+            compression=doc.compression,
+            invariant=doc.invariant,
+            pdfVersion=doc._pdfVersion,
+            lang=kwargs.get('lang')
+        )
+        # The preamble registered the initial font with the replaced document
+        self._make_preamble()
+
+class _PageLimitReached(Exception):
+    pass
+
+class OutlineDocTemplate(SimpleDocTemplate):
+    """
+    A doc template that bookmarks headings and adds them to the PDF outline
+
+    Flowables with an outline_level attribute (1 for a top-level heading) are
+    entered into the outline as they are drawn. The entries are also kept in
+    self.outline, so the outline can be rebuilt when section PDFs are merged.
+
+    With max_pages, build stops laying out as soon as that many pages are
+    finished and saves them as the whole PDF; the rest of the flowables are
+    never created.
+    """
+
+    def __init__(self, *args, max_pages: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outline: List[OutlineEntry] = []
+        self.max_pages = max_pages
+
+    def handle_pageEnd(self):
+        super().handle_pageEnd()
+        if self.max_pages and self.page >= self.max_pages:
+            raise _PageLimitReached(f"stopped after {self.page} pages")
+
+    def build(self, flowables, *args, **kwargs):
+        try:
+            super().build(flowables, *args, **kwargs)
+        except _PageLimitReached:
+            # The last page wanted is already out; only the cross-reference table and trailer are missing
+            self.canv.save()
+
+    def afterFlowable(self, flowable):
+        level = getattr(flowable, 'outline_level', None)
+        if level is None:
+            return
+        # The outline can only go one level deeper at a time
+        previous = self.outline[-1].level if self.outline else -1
+        entry = OutlineEntry(
+            flowable.getPlainText(),
+            min(level - 1, previous + 1),
+            self.page - 1,
+            self.frame._y + flowable.getSpaceAfter() + flowable.height
+        )
+        key = f"heading{len(self.outline)}"
+        self.canv.bookmarkPage(key, fit='XYZ', left=0, top=entry.top)
+        self.canv.addOutlineEntry(entry.title, key, entry.level)
+        self.outline.append(entry)
@@ -0,0 +1,169 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+from app.core.exceptions import RenderLimitExceededError, RenderQueueFullError
+from app.core.config import settings
+from app.services.metrics import metrics_registry
+from app.services.render_sandbox import SandboxPool
+
+# Readiness of the worker processes
+STARTING = "starting"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+class RenderExecutor:
+    """
+    Bounded process pool that runs CPU-bound PDF rendering off the event loop
+
+    Every render runs under the sandbox limits (timeout, cpu_limit and
+    memory_limit, see SandboxPool); breaches are counted by limit.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        queue_size: int,
+        start_method: str = "spawn",
+        timeout: float = 0,
+        cpu_limit: int = 0,
+        memory_limit: int = 0
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.start_method = start_method
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self._pool: Optional[SandboxPool] = None
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._waiting = 0
+        self._running = 0
+        # Jobs that reached a worker and finished, for worker recycling
+        self.completed = 0
+        # Run first in every worker process the pool starts
+        self._initializer: Optional[Callable[[], Any]] = None
+        self.state = READY
+        self.error: Optional[str] = None
+        metrics_registry.counter(
+            "fileconverter_render_limit_breaches_total", "Renders stopped for going over a render worker limit"
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of conversions waiting for a free worker"""
+        return self._waiting
+
+    @property
+    def in_flight(self) -> int:
+        """Number of conversions currently running in a worker"""
+        return self._running
+
+    def _get_pool(self) -> SandboxPool:
+        """Create the process pool on first use"""
+        if self._pool is None:
+            self._pool = SandboxPool(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=self._initializer,
+                timeout=self.timeout,
+                cpu_limit=self.cpu_limit,
+                memory_limit=self.memory_limit
+            )
+        return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) in a worker process and await its result
+
+        Waiting jobs are rejected once the queue is full. Cancelling the awaiting
+        task drops a queued job before it reaches a worker; a job that is already
+        running keeps its worker slot until it finishes and its result is discarded.
+        """
+        future = await self.submit(fn, *args)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Wait for a free worker, start fn(*args) on it and return its future
+
+        For callers that follow the job's progress while it runs, such as a
+        streamed PDF. Queueing and rejection work as in run().
+        """
+        if self._waiting >= self.queue_size:
+            raise RenderQueueFullError(self.queue_size)
+
+        # Wait for a free worker
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._running += 1
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda done: loop.is_closed() or loop.call_soon_threadsafe(self._release_slot, done))
+        return future
+
+    async def warm_up(self, initializer: Callable[[], Any], probe: Callable[[], Optional[str]]):
+        """
+        Start every worker process now, each running initializer before any conversion
+
+        Submitting one probe per worker at once makes the pool start all of
+        them; each returns an error message if its warm-up failed. Until every
+        probe is back the executor reports itself as warming, so a readiness
+        check can hold traffic off a cold instance. Conversions that arrive
+        meanwhile are still served and simply queue behind the warm-up.
+        """
+        self._initializer = initializer
+        self.state = WARMING
+        try:
+            errors = await asyncio.gather(*(self.run(probe) for _ in range(self.max_workers)))
+            # Probes are not conversions
+            self.completed -= len(errors)
+        except Exception as e:
+            errors = [f"{type(e).__name__}: {e}"]
+        self.error = next((error for error in errors if error), None)
+        self.state = FAILED if self.error else READY
+
+    def readiness(self) -> Dict[str, Any]:
+        """Whether the workers can take conversions without a cold start"""
+        readiness = {"state": self.state, "ready": self.state == READY, "workers": self.max_workers}
+        if self.error:
+            readiness["error"] = self.error
+        return readiness
+
+    def _release_slot(self, future: Future):
+        """Give the worker slot back once the process is really done with the job"""
+        self._running -= 1
+        self.completed += 1
+        self._slots.release()
+        if not future.cancelled() and isinstance(future.exception(), RenderLimitExceededError):
+            metrics_registry.inc("fileconverter_render_limit_breaches_total", limit=future.exception().limit)
+
+    def shutdown(self):
+        """Stop the worker processes, dropping jobs that have not started"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+# Global executor instance
+render_executor = RenderExecutor(
+    max_workers=settings.RENDER_WORKERS,
+    queue_size=settings.RENDER_QUEUE_SIZE,
+    start_method=settings.RENDER_START_METHOD,
+    timeout=settings.RENDER_TIMEOUT,
+    cpu_limit=settings.RENDER_CPU_LIMIT,
+    memory_limit=settings.RENDER_MEMORY_LIMIT
+)
@@ -0,0 +1,231 @@
+import math
+import queue
+import resource
+import signal
+import threading
+from concurrent.futures import Future
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Optional
+from app.core.exceptions import (
+    ConversionFailedError, RenderCpuLimitError, RenderMemoryLimitError, RenderTimeoutError
+)
+
+# Messages from a worker process: that it has started, the task's result, the exception it raised,
+# or that it ran out of memory
+_READY = "ready"
+_RESULT = "result"
+_ERROR = "error"
+_OUT_OF_MEMORY = "out_of_memory"
+
+# Seconds a worker gets to exit on its own before it is killed
+_EXIT_TIMEOUT = 5.0
+
+# Seconds a new worker gets to start and run its initializer; this is not part of any render's limits
+_STARTUP_TIMEOUT = 120.0
+
+def _worker_main(conn, initializer: Optional[Callable[[], Any]], cpu_limit: int, memory_limit: int):
+    """
+    Body of a sandbox worker process: run tasks from conn until told to stop
+
+    The address space limit holds for the life of the process. The CPU limit
+    is re-armed before every task at the CPU time used so far plus
+    cpu_limit, so the kernel stops the process with SIGXCPU once one task
+    has used that much. A task that runs out of memory is reported and the
+    process exits, since the heap it leaves behind is not worth reusing.
+    """
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    if cpu_limit:
+        # SIGXCPU would otherwise dump a core for every breach
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if initializer is not None:
+        initializer()
+    conn.send((_READY, None))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args = task
+        if cpu_limit:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_limit
+            hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+            resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+        try:
+            message = (_RESULT, fn(*args))
+        except MemoryError:
+            conn.send((_OUT_OF_MEMORY, None))
+            return
+        except Exception as e:
+            message = (_ERROR, e)
+        try:
+            conn.send(message)
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send((_ERROR, ConversionFailedError(f"{type(e).__name__}: {e}")))
+
+class SandboxPool:
+    """
+    Worker processes that each run one render at a time under hard limits
+
+    A stand-in for ProcessPoolExecutor (submit() and shutdown()) that can
+    stop a single runaway render: a worker over its wall-clock timeout is
+    killed, one over its CPU-seconds limit is killed by the kernel, and one
+    over its address-space limit fails the render with MemoryError and
+    exits. The render's future then fails with the matching
+    RenderLimitExceededError and a fresh worker, running initializer again,
+    takes the dead one's place; renders on the other workers carry on.
+    Limits of 0 are not enforced.
+
+    Each worker is driven by a thread in the calling process that takes
+    tasks from a shared queue, sends them over a pipe and waits for the
+    answer, so tasks go to whichever worker is free. A worker reports when
+    its initializer is done, and its first task's wall-clock time only
+    starts then, so starting a replacement never counts against a render.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        mp_context: BaseContext,
+        initializer: Optional[Callable[[], Any]] = None,
+        timeout: float = 0,
+        cpu_limit: int = 0,
+        memory_limit: int = 0
+    ):
+        self._context = mp_context
+        self._initializer = initializer
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self._tasks: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._drive_worker, name=f"render-sandbox-{index}", daemon=True)
+            for index in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+        future = Future()
+        self._tasks.put((future, fn, args))
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """Stop the workers once their current render is done, optionally cancelling queued ones"""
+        self._shutdown = True
+        if cancel_futures:
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None:
+                    task[0].cancel()
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _spawn(self):
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self._initializer, self.cpu_limit, self.memory_limit),
+            daemon=True
+        )
+        process.start()
+        # Only the worker holds the other end now, so its death shows up as EOF
+        child_conn.close()
+        return process, conn
+
+    def _drive_worker(self):
+        process = conn = None
+        ready = False
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    break
+                future, fn, args = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if process is None:
+                    process, conn = self._spawn()
+                error = None if ready else self._wait_ready(process, conn)
+                if error is None:
+                    ready = True
+                    error = self._run(process, conn, future, fn, args)
+                if error is not None:
+                    future.set_exception(error)
+                    # Start the replacement now, so it warms up before the next task
+                    conn.close()
+                    process, conn = self._spawn()
+                    ready = False
+        finally:
+            if process is not None:
+                self._stop(process, conn)
+
+    def _wait_ready(self, process, conn) -> Optional[Exception]:
+        """Wait for a new worker to finish starting; returns the error to fail the task with if it does not"""
+        try:
+            if conn.poll(_STARTUP_TIMEOUT):
+                status, _ = conn.recv()
+                if status == _READY:
+                    return None
+        except (EOFError, OSError):
+            pass
+        process.kill()
+        process.join()
+        return ConversionFailedError(f"render worker failed to start (exit code {process.exitcode})")
+
+    def _run(self, process, conn, future: Future, fn, args) -> Optional[Exception]:
+        """Run one task on process; returns the error to fail it with if the worker is gone"""
+        try:
+            conn.send((fn, args))
+            if not conn.poll(self.timeout or None):
+                process.kill()
+                process.join()
+                return RenderTimeoutError(self.timeout)
+            status, payload = conn.recv()
+        except (EOFError, OSError):
+            process.join(_EXIT_TIMEOUT)
+            if process.exitcode == -signal.SIGXCPU:
+                return RenderCpuLimitError(self.cpu_limit)
+            process.kill()
+            process.join()
+            return ConversionFailedError(f"render worker exited unexpectedly (exit code {process.exitcode})")
+        except Exception as e:
+            # The task or its answer could not be pickled; the worker is still usable
+            future.set_exception(e)
+            return None
+
+        if status == _OUT_OF_MEMORY:
+            process.join(_EXIT_TIMEOUT)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            return RenderMemoryLimitError(self.memory_limit)
+        if status == _ERROR:
+            future.set_exception(payload)
+        else:
+            future.set_result(payload)
+        return None
+
+    def _stop(self, process, conn):
+        try:
+            conn.send(None)
+        except OSError:
+            pass
+        process.join(_EXIT_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        conn.close()
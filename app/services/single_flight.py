@@ -0,0 +1,87 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.services.metrics import metrics_registry
+
+class _Call:
+    """Work in progress for one key and the callers still waiting for it"""
+    __slots__ = ("task", "waiters", "finished")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.finished = False
+
+class SingleFlight:
+    """
+    Runs identical work once while it is in progress, for every caller that asks for it
+
+    The first caller for a key starts work() as a task of its own; callers
+    asking for the same key before it finishes wait for that task instead of
+    starting again. All of them get its result, or its exception. The task
+    is shielded, so a caller that goes away (a client disconnecting cancels
+    its request) does not cancel it for the others; it finishes even with no
+    one left waiting.
+
+    share(result) gives each waiter its own copy of a result that callers
+    consume, such as a file they delete once it is sent. Once every waiter
+    has its copy, release(result) disposes of the original.
+    """
+
+    def __init__(
+        self,
+        share: Optional[Callable[[Any], Any]] = None,
+        release: Optional[Callable[[Any], None]] = None
+    ):
+        self.share = share
+        self.release = release
+        self.started = 0
+        self.coalesced = 0
+        self._calls: Dict[str, _Call] = {}
+        metrics_registry.counter(
+            "fileconverter_coalesced_requests_total",
+            "Conversions served by waiting for an identical one already in progress"
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def joinable(self, key: str) -> bool:
+        return key in self._calls
+
+    async def run(self, key: str, work: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = _Call(asyncio.ensure_future(work()))
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            metrics_registry.inc("fileconverter_coalesced_requests_total")
+
+        call.waiters += 1
+        try:
+            result = await asyncio.shield(call.task)
+            return self.share(result) if self.share is not None else result
+        finally:
+            call.waiters -= 1
+            if not call.waiters and call.finished:
+                self._dispose(call)
+
+    def _finished(self, key: str, call: _Call):
+        # Later callers start afresh (and will usually find the result cached)
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        call.finished = True
+        if not call.waiters:
+            self._dispose(call)
+
+    def _dispose(self, call: _Call):
+        if call.task.cancelled():
+            return
+        # Retrieving the exception also keeps asyncio from logging it as never retrieved
+        if call.task.exception() is None and self.release is not None:
+            self.release(call.task.result())
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": self.in_flight, "started": self.started, "coalesced": self.coalesced}
@@ -0,0 +1,156 @@
+import asyncio
+import io
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.core.exceptions import SpoolFullError
+from app.core.config import settings
+
+class SpoolDirectory:
+    """
+    Managed directory for PDFs too large to keep in memory until they are sent
+
+    Usage is charged per file, not per path: hard links to one file (a
+    result shared by coalesced requests) are charged once, and the charge
+    stays until the last of them is released.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.size = 0
+        # Registered paths, by the (device, inode) of their file
+        self._files: Dict[str, Tuple[int, int]] = {}
+        # Size and registered path count of each file
+        self._inodes: Dict[Tuple[int, int], List[int]] = {}
+
+    def new_path(self) -> str:
+        """Path for a new spool file (safe to call from worker processes)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return str(self.directory / f"{uuid.uuid4().hex}.pdf")
+
+    def register(self, path: str, reserve: Optional[int] = None) -> str:
+        """
+        Account for a spool file written by a worker, enforcing the quota
+
+        A file still to be written, such as a streamed PDF, is charged
+        reserve bytes instead of its current size.
+        """
+        stat_result = os.stat(path)
+        inode = (stat_result.st_dev, stat_result.st_ino)
+        charge = self._inodes.get(inode)
+        if charge is None:
+            size = stat_result.st_size if reserve is None else reserve
+            if self.size + size > self.max_bytes:
+                Path(path).unlink(missing_ok=True)
+                raise SpoolFullError(self.max_bytes)
+            charge = self._inodes[inode] = [size, 0]
+            self.size += size
+        charge[1] += 1
+        self._files[path] = inode
+        return path
+
+    def share(self, path: str) -> str:
+        """A spool file of its own for another response sending the same PDF, released separately"""
+        shared = self.new_path()
+        try:
+            # A hard link is the same file, so it adds no charge until a copy is needed
+            os.link(path, shared)
+        except OSError:
+            shutil.copyfile(path, shared)
+        return self.register(shared)
+
+    def release(self, path: str):
+        """Delete a spool file once its response has been sent"""
+        inode = self._files.pop(path, None)
+        if inode is not None:
+            charge = self._inodes[inode]
+            charge[1] -= 1
+            if not charge[1]:
+                del self._inodes[inode]
+                self.size -= charge[0]
+        Path(path).unlink(missing_ok=True)
+
+    def sweep(self) -> int:
+        """Delete spool files older than max_age, e.g. left behind by a crash"""
+        if not self.directory.is_dir():
+            return 0
+        removed = 0
+        cutoff = time.time() - self.max_age
+        for path in self.directory.glob('*.pdf'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    self.release(str(path))
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    async def run_sweeper(self, interval: int):
+        """Background task that sweeps the spool directory periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            self.sweep()
+
+    def stats(self) -> Dict[str, int]:
+        return {"files": len(self._files), "bytes": self.size, "max_bytes": self.max_bytes}
+
+class SpillingOutput:
+    """
+    Output for a PDF of unknown size: kept in memory up to max_bytes, written to a spool file past that
+
+    Only flush() and write() are offered, which is all the streaming PDF
+    writer uses. Once the output outgrows max_bytes, what is buffered moves
+    to a new spool file and the rest is written straight there, so a large
+    PDF is never held in memory whole. After close(), path is the spool
+    file (for the server process to register), or None and data holds the PDF.
+    """
+
+    def __init__(self, spool: SpoolDirectory, max_bytes: int):
+        self.spool = spool
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.path: Optional[str] = None
+        self.data: Optional[bytes] = None
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file = None
+
+    def write(self, data: bytes) -> int:
+        if self._file is None and self.size + len(data) > self.max_bytes:
+            self.path = self.spool.new_path()
+            self._file = open(self.path, 'wb')
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        (self._file or self._buffer).write(data)
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        elif self._buffer is not None:
+            self.data = self._buffer.getvalue()
+        self._buffer = None
+
+    def discard(self):
+        """Drop the output of a failed build, deleting its spool file if it had one"""
+        self.close()
+        self.data = None
+        if self.path is not None:
+            Path(self.path).unlink(missing_ok=True)
+
+# Global spool instance
+pdf_spool = SpoolDirectory(
+    settings.SPOOL_DIR or os.path.join(tempfile.gettempdir(), "fileconverter-spool"),
+    settings.SPOOL_MAX_BYTES,
+    settings.SPOOL_MAX_AGE
+)
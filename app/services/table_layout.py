@@ -0,0 +1,100 @@
+from typing import List
+from reportlab.platypus import Flowable, LongTable, Table, TableStyle
+
+class LargeTable(Flowable):
+    """
+    A table with many rows, laid out one page at a time with its header repeated
+
+    A plain Table measures every cell to size itself, and each page split
+    copies all remaining rows into a new Table, so layout time is quadratic in
+    the row count. LargeTable uses column widths and row heights measured once
+    on a sample of rows. A split only slices out the rows that fit on the
+    current page, and the remainder is a view on the same row list. Total work
+    is linear in the number of rows.
+    """
+
+    def __init__(
+        self,
+        rows: List[List[str]],
+        col_widths: List[float],
+        header_height: float,
+        row_height: float,
+        styles: List[TableStyle],
+        start: int = 1
+    ):
+        super().__init__()
+        self.rows = rows
+        self.col_widths = col_widths
+        self.header_height = header_height
+        self.row_height = row_height
+        # One style per stripe phase, so alternating row colours continue across pages
+        self.styles = styles
+        self.start = start
+        self.hAlign = 'CENTER'
+        self._widths = col_widths
+
+    def _fit_widths(self, avail_width: float):
+        total = sum(self.col_widths)
+        if total > avail_width:
+            scale = avail_width / total
+            self._widths = [width * scale for width in self.col_widths]
+        else:
+            self._widths = self.col_widths
+
+    def _page_table(self, end: int) -> LongTable:
+        """The header plus rows[start:end] as a table with fixed geometry"""
+        body = self.rows[self.start:end]
+        return LongTable(
+            [self.rows[0]] + body,
+            colWidths=self._widths,
+            rowHeights=[self.header_height] + [self.row_height] * len(body),
+            style=self.styles[(self.start - 1) % 2],
+            repeatRows=1
+        )
+
+    def wrap(self, availWidth, availHeight):
+        self._fit_widths(availWidth)
+        self.width = sum(self._widths)
+        self.height = self.header_height + (len(self.rows) - self.start) * self.row_height
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        self._fit_widths(availWidth)
+        fit = int((availHeight - self.header_height) // self.row_height)
+        if fit < 1:
+            return []
+        end = self.start + fit
+        if end >= len(self.rows):
+            return [self._page_table(len(self.rows))]
+        rest = LargeTable(self.rows, self.col_widths, self.header_height, self.row_height, self.styles, end)
+        return [self._page_table(end), rest]
+
+    def draw(self):
+        table = self._page_table(len(self.rows))
+        table.wrapOn(self.canv, self.width, self.height)
+        table.drawOn(self.canv, 0, 0)
+
+def _sample(rows: List[List[str]], size: int) -> List[List[str]]:
+    """The header and divider rows plus evenly spaced body rows"""
+    if len(rows) <= size:
+        return rows
+    step = (len(rows) - 2) / (size - 2)
+    return rows[:2] + [rows[2 + int(index * step)] for index in range(size - 2)]
+
+def large_table(rows: List[List[str]], style: TableStyle, sample_size: int) -> LargeTable:
+    """Build a LargeTable whose geometry ReportLab measures on a sample of the rows"""
+    columns = max(len(row) for row in rows)
+    sample = _sample(rows, sample_size)
+    # Make sure the widest row is present so every column gets measured
+    if max(len(row) for row in sample) < columns:
+        sample = sample + [next(row for row in rows if len(row) == columns)]
+    probe = Table(sample)
+    probe.setStyle(style)
+    probe.wrap(0, 0)
+
+    # Continue the stripes on every page, whatever the parity of its first row
+    stripes = next(command[3] for command in style.getCommands() if command[0] == 'ROWBACKGROUNDS')
+    shifted = TableStyle(parent=style)
+    shifted.add('ROWBACKGROUNDS', (0, 1), (-1, -1), list(stripes[1:]) + list(stripes[:1]))
+
+    return LargeTable(rows, list(probe._colWidths), probe._rowHeights[0], max(probe._rowHeights[1:]), [style, shifted])
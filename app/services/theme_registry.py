@@ -0,0 +1,74 @@
+from typing import TYPE_CHECKING, Dict, Tuple
+from app.core.exceptions import UnknownThemeError
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.services.theme_styles import Theme
+
+# Built-in palettes; "cursor" reproduces Cursor's Markdown preview exactly
+PALETTES: Dict[str, Dict[str, str]] = {
+    "cursor": {
+        "text": "#24292f",
+        "code_bg": "#f6f8fa",
+        "code_border": "#d0d7de",
+        "quote": "#656d76",
+        "table_header_bg": "#f6f8fa",
+        "table_row_bg": "#ffffff",
+        "table_alt_row_bg": "#f6f8fa",
+        "table_border": "#d0d7de"
+    },
+    "print": {
+        "text": "#000000",
+        "code_bg": "#f2f2f2",
+        "code_border": "#999999",
+        "quote": "#444444",
+        "table_header_bg": "#e6e6e6",
+        "table_row_bg": "#ffffff",
+        "table_alt_row_bg": "#f2f2f2",
+        "table_border": "#999999"
+    }
+}
+
+class ThemeRegistry:
+    """Compiles each theme once per settings combination and hands out the shared result"""
+
+    def __init__(self, palettes: Dict[str, Dict[str, str]]):
+        self._palettes = dict(palettes)
+        self._compiled: Dict[Tuple, "Theme"] = {}
+
+    def register(self, name: str, palette: Dict[str, str]):
+        """Add or replace a palette; missing colors fall back to the default theme"""
+        self._palettes[name] = {**PALETTES["cursor"], **palette}
+        self._compiled = {key: theme for key, theme in self._compiled.items() if key[0] != name}
+
+    def names(self):
+        return sorted(self._palettes)
+
+    def validate(self, name: str = None) -> str:
+        """Resolve a theme name without compiling it"""
+        name = name or settings.PDF_THEME
+        if name not in self._palettes:
+            raise UnknownThemeError(name, self.names())
+        return name
+
+    def palette(self, name: str = None) -> Dict[str, str]:
+        """Colors a theme name resolves to, e.g. for cache keys"""
+        return dict(self._palettes[self.validate(name)])
+
+    def get(self, name: str = None) -> "Theme":
+        name = self.validate(name)
+        key = (name, settings.PDF_FONT_SIZE_NORMAL, settings.PDF_FONT_SIZE_HEADER)
+        theme = self._compiled.get(key)
+        if theme is None:
+            # Styles pull in ReportLab, so they are only loaded by the processes that render
+            from app.services.theme_styles import compile_theme
+            theme = compile_theme(
+                name, self._palettes[name], settings.PDF_FONT_SIZE_NORMAL, settings.PDF_FONT_SIZE_HEADER
+            )
+            self._compiled[key] = theme
+        return theme
+
+# Global registry instance, including themes configured through settings
+theme_registry = ThemeRegistry(PALETTES)
+for _name, _palette in settings.PDF_CUSTOM_THEMES.items():
+    theme_registry.register(_name, _palette)
@@ -0,0 +1,255 @@
+from typing import Dict
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT
+from reportlab.platypus import TableStyle
+from app.services.font_registry import font_registry
+
+class Theme:
+    """Compiled paragraph and table styles for one palette, shared read-only by every render"""
+
+    def __init__(self, name: str, styles: Dict[str, ParagraphStyle], table_style: TableStyle):
+        self.name = name
+        self.styles = styles
+        self.table_style = table_style
+
+def _compile_paragraph_styles(palette: Dict[str, colors.Color], normal_size: int, header_size: int):
+    """Create styles that exactly match Cursor's Markdown preview"""
+    styles = getSampleStyleSheet()
+
+    text_color = palette['text']
+    code_bg = palette['code_bg']
+    code_border = palette['code_border']
+    quote_color = palette['quote']
+
+    # H1 - Exact Cursor styling
+    h1_style = ParagraphStyle(
+        'ExactH1',
+        parent=styles['Normal'],
+        fontSize=header_size,
+        spaceAfter=24,
+        spaceBefore=40,
+        textColor=text_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Helvetica-Bold'),
+        leading=header_size + 6,
+        leftIndent=0,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=0,
+        borderColor=code_border,
+        borderPadding=0
+    )
+
+    # H2 - Exact Cursor styling
+    h2_style = ParagraphStyle(
+        'ExactH2',
+        parent=styles['Normal'],
+        fontSize=24,
+        spaceAfter=20,
+        spaceBefore=32,
+        textColor=text_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Helvetica-Bold'),
+        leading=28,
+        leftIndent=0,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=0,
+        borderColor=code_border,
+        borderPadding=0
+    )
+
+    # H3 - Exact Cursor styling
+    h3_style = ParagraphStyle(
+        'ExactH3',
+        parent=styles['Normal'],
+        fontSize=20,
+        spaceAfter=16,
+        spaceBefore=28,
+        textColor=text_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Helvetica-Bold'),
+        leading=24,
+        leftIndent=0,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=0,
+        borderColor=code_border,
+        borderPadding=0
+    )
+
+    # H4 - Exact Cursor styling
+    h4_style = ParagraphStyle(
+        'ExactH4',
+        parent=styles['Normal'],
+        fontSize=18,
+        spaceAfter=14,
+        spaceBefore=24,
+        textColor=text_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Helvetica-Bold'),
+        leading=22,
+        leftIndent=0,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=0,
+        borderColor=code_border,
+        borderPadding=0
+    )
+
+    # Normal text - Exact Cursor styling
+    normal_style = ParagraphStyle(
+        'ExactNormal',
+        parent=styles['Normal'],
+        fontSize=normal_size,
+        spaceAfter=12,
+        spaceBefore=0,
+        textColor=text_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Helvetica'),
+        leading=normal_size + 8,
+        leftIndent=0,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=0,
+        borderColor=code_border,
+        borderPadding=0
+    )
+
+    # Code block - Exact Cursor styling
+    code_style = ParagraphStyle(
+        'ExactCode',
+        parent=styles['Normal'],
+        fontSize=14,
+        spaceAfter=20,
+        spaceBefore=20,
+        textColor=text_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Courier'),
+        leading=18,
+        leftIndent=0,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=1,
+        borderColor=code_border,
+        borderPadding=20,
+        backColor=code_bg
+    )
+
+    # Inline code - Exact Cursor styling
+    inline_code_style = ParagraphStyle(
+        'ExactInlineCode',
+        parent=styles['Normal'],
+        fontSize=14,
+        spaceAfter=0,
+        spaceBefore=0,
+        textColor=text_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Courier'),
+        leading=18,
+        leftIndent=0,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=0.5,
+        borderColor=code_border,
+        borderPadding=6,
+        backColor=code_bg
+    )
+
+    # List - Exact Cursor styling
+    list_style = ParagraphStyle(
+        'ExactList',
+        parent=normal_style,
+        fontSize=normal_size,
+        spaceAfter=6,
+        spaceBefore=6,
+        textColor=text_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Helvetica'),
+        leading=normal_size + 8,
+        leftIndent=24,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=0,
+        borderColor=code_border,
+        borderPadding=0
+    )
+
+    # Quote - Exact Cursor styling
+    quote_style = ParagraphStyle(
+        'ExactQuote',
+        parent=normal_style,
+        fontSize=normal_size,
+        spaceAfter=12,
+        spaceBefore=12,
+        textColor=quote_color,
+        alignment=TA_LEFT,
+        fontName=font_registry.font('Helvetica'),
+        leading=normal_size + 8,
+        leftIndent=24,
+        rightIndent=0,
+        firstLineIndent=0,
+        borderWidth=0,
+        borderColor=code_border,
+        borderPadding=0,
+        leftBorderWidth=4,
+        leftBorderColor=code_border,
+        leftBorderPadding=16
+    )
+
+    # Horizontal rule
+    hr_style = ParagraphStyle(
+        'ExactHR',
+        parent=normal_style,
+        borderWidth=1,
+        borderColor=code_border,
+        spaceAfter=32,
+        spaceBefore=32,
+        leading=1
+    )
+    
+    return {
+        'h1': h1_style,
+        'h2': h2_style,
+        'h3': h3_style,
+        'h4': h4_style,
+        'normal': normal_style,
+        'code': code_style,
+        'inline_code': inline_code_style,
+        'list': list_style,
+        'quote': quote_style,
+        'hr': hr_style
+    }
+
+
+def _compile_table_style(palette: Dict[str, colors.Color]) -> TableStyle:
+    """GitHub-style table: bold header row, grid and alternating row backgrounds"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), palette['table_header_bg']),
+        ('TEXTCOLOR', (0, 0), (-1, 0), palette['text']),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), font_registry.font('Helvetica-Bold')),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+        ('LEFTPADDING', (0, 0), (-1, -1), 12),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), palette['table_row_bg']),
+        ('TEXTCOLOR', (0, 1), (-1, -1), palette['text']),
+        ('FONTNAME', (0, 1), (-1, -1), font_registry.font('Helvetica')),
+        ('FONTSIZE', (0, 1), (-1, -1), 14),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 12),
+        ('TOPPADDING', (0, 1), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, palette['table_border']),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [palette['table_row_bg'], palette['table_alt_row_bg']])
+    ])
+
+def compile_theme(name: str, palette: Dict[str, str], normal_size: int, header_size: int) -> Theme:
+    """Build the styles for a palette of hex colors"""
+    colors_by_role = {role: colors.HexColor(value) for role, value in palette.items()}
+    return Theme(
+        name,
+        _compile_paragraph_styles(colors_by_role, normal_size, header_size),
+        _compile_table_style(colors_by_role)
+    )
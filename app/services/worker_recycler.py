@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import signal
+import sys
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.services.render_executor import render_executor
+
+logger = logging.getLogger("uvicorn.error")
+
+def process_rss(pid: int) -> Optional[int]:
+    """Current resident set size of a process in bytes, None where /proc is not available"""
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _peak_rss() -> int:
+    """Peak RSS of this process; ru_maxrss is KB on Linux and bytes on macOS"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class WorkerRecycler:
+    """
+    Retires a production server worker once it has rendered enough or grown too large
+
+    ReportLab keeps caches that grow with every document it lays out, and
+    fragmentation keeps freed memory in the process. A worker (the server
+    process and its render pool) is replaced after max_conversions renders,
+    plus up to jitter more so workers do not all restart at once, or as soon
+    as it or any of its render processes passes max_rss bytes. Retiring is a
+    SIGTERM to itself: the server stops accepting connections, finishes the
+    requests in flight and the render pool drains before the process exits.
+    The launcher (app/core/server.py) then starts a replacement, so this is
+    only enabled in processes it supervises.
+    """
+
+    def __init__(self, max_conversions: int, jitter: int, max_rss: int):
+        self.max_conversions = max_conversions + random.randint(0, jitter) if max_conversions else 0
+        self.max_rss = max_rss
+        self.enabled = False
+        self.reason: Optional[str] = None
+
+    def enable(self):
+        self.enabled = True
+
+    def rss(self) -> Dict[int, int]:
+        """RSS in bytes of this process and its render worker processes, by pid"""
+        sizes = {os.getpid(): process_rss(os.getpid()) or _peak_rss()}
+        for child in multiprocessing.active_children():
+            size = process_rss(child.pid)
+            if size is not None:
+                sizes[child.pid] = size
+        return sizes
+
+    def check(self) -> Optional[str]:
+        """Why this worker should be replaced now, if it should"""
+        if self.max_conversions and render_executor.completed >= self.max_conversions:
+            return f"rendered {render_executor.completed} conversions"
+        if self.max_rss:
+            pid, size = max(self.rss().items(), key=lambda item: item[1])
+            if size > self.max_rss:
+                return f"process {pid} uses {size // (1024 * 1024)}MB"
+        return None
+
+    async def run(self, interval: float):
+        """Background task that retires the worker once a limit is reached"""
+        while self.reason is None:
+            await asyncio.sleep(interval)
+            self.reason = self.check()
+        logger.info("Retiring worker process [%d]: %s", os.getpid(), self.reason)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pid": os.getpid(),
+            "conversions": render_executor.completed,
+            "max_conversions": self.max_conversions,
+            "rss_bytes": max(self.rss().values()),
+            "max_rss_bytes": self.max_rss,
+            "retiring": self.reason
+        }
+
+# Global recycler for this server process
+worker_recycler = WorkerRecycler(
+    settings.SERVER_MAX_CONVERSIONS,
+    settings.SERVER_MAX_CONVERSIONS_JITTER,
+    settings.SERVER_MAX_RSS
+)
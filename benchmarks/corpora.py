@@ -0,0 +1,106 @@
+"""
+Deterministic synthetic markdown corpora for benchmarks
+
+Every corpus is generated from a fixed seed, so the same (mix, size) pair
+always produces byte-identical markdown across runs and machines.
+"""
+import random
+
+SIZES = {
+    "1KB": 1024,
+    "100KB": 100 * 1024,
+    "1MB": 1024 * 1024,
+    "10MB": 10 * 1024 * 1024
+}
+
+MIXES = ("mixed", "table", "code", "list")
+
+WORDS = (
+    "markdown pdf conversion service render layout table code block list item paragraph "
+    "heading quote release notes feature status description performance cache worker "
+    "request response document page style theme upload download"
+).split()
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    picked = [rng.choice(WORDS) for _ in range(words)]
+    # Sprinkle inline markup the way real READMEs do
+    if rng.random() < 0.5:
+        index = rng.randrange(words)
+        picked[index] = f"**{picked[index]}**"
+    if rng.random() < 0.4:
+        index = rng.randrange(words)
+        picked[index] = f"*{picked[index]}*"
+    if rng.random() < 0.4:
+        index = rng.randrange(words)
+        picked[index] = f"`{picked[index]}()`"
+    if rng.random() < 0.2:
+        index = rng.randrange(words)
+        picked[index] = f"[{picked[index]}](https://example.com/{picked[index]})"
+    return " ".join(picked).capitalize() + "."
+
+def _heading(rng: random.Random, section: int) -> str:
+    level = rng.choice((1, 2, 2, 3, 3, 4))
+    return f"{'#' * level} Section {section}: {rng.choice(WORDS).title()}\n\n"
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(2, 5))) + "\n\n"
+
+def _bullets(rng: random.Random, items: int) -> str:
+    lines = []
+    for number in range(1, items + 1):
+        if rng.random() < 0.3:
+            lines.append(f"{number}. {_sentence(rng, 8)}")
+        else:
+            lines.append(f"{rng.choice('-*')} {_sentence(rng, 8)}")
+    return "\n".join(lines) + "\n\n"
+
+def _code(rng: random.Random, lines: int) -> str:
+    body = []
+    for number in range(lines):
+        indent = "    " * rng.randint(0, 2)
+        body.append(f'{indent}{rng.choice(WORDS)}_{number} = process("{rng.choice(WORDS)}", {number})')
+    return "```python\n" + "\n".join(body) + "\n```\n\n"
+
+def _table(rng: random.Random, rows: int, columns: int = 4) -> str:
+    header = "| " + " | ".join(rng.choice(WORDS).title() for _ in range(columns)) + " |"
+    divider = "|" + "|".join("---------" for _ in range(columns)) + "|"
+    body = [
+        "| " + " | ".join(rng.choice(WORDS) for _ in range(columns)) + " |"
+        for _ in range(rows)
+    ]
+    return "\n".join([header, divider] + body) + "\n\n"
+
+def _quote(rng: random.Random) -> str:
+    return f"> {_sentence(rng)}\n\n"
+
+def _block(rng: random.Random, mix: str, section: int) -> str:
+    """One section of the corpus, weighted by mix"""
+    parts = [_heading(rng, section)]
+    if mix == "mixed":
+        parts += [_paragraph(rng), _bullets(rng, 4), _code(rng, 6), _table(rng, 4), _quote(rng)]
+        if rng.random() < 0.3:
+            parts.append("---\n\n")
+    elif mix == "table":
+        parts += [_paragraph(rng), _table(rng, 20, 5), _table(rng, 10, 3)]
+    elif mix == "code":
+        parts += [_paragraph(rng), _code(rng, 30), _code(rng, 10)]
+    elif mix == "list":
+        parts += [_paragraph(rng), _bullets(rng, 25)]
+    else:
+        raise ValueError(f"Unknown corpus mix '{mix}'")
+    return "".join(parts)
+
+def generate(mix: str, size: int, seed: int = 2024) -> str:
+    """Markdown of the given mix, truncated at a block boundary near size bytes"""
+    rng = random.Random(f"{mix}:{seed}")
+    blocks = []
+    total = 0
+    section = 1
+    while total < size:
+        block = _block(rng, mix, section)
+        if total and total + len(block) > size * 1.1:
+            break
+        blocks.append(block)
+        total += len(block)
+        section += 1
+    return "".join(blocks)
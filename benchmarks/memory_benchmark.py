@@ -0,0 +1,71 @@
+"""
+Layout memory benchmark: peak traced allocations while a document is laid out
+
+Run from the repository root:
+    python -m benchmarks.memory_benchmark [--sizes 100KB,1MB] [--mixes code,mixed] [--max-growth 5.0]
+
+Each corpus is laid out with the PDF written to os.devnull, so the peak covers
+parsing, flowables and page objects but not the output bytes or the markdown
+text itself (which exists before tracing starts). With flowables created on
+demand and pages written as they are finished, the peak grows far slower
+than the document: what is left is per-page bookkeeping (xref offsets, outline
+entries). The inline formatting memo is switched off, since it fills up to its
+configured size whatever the layout does. The run exits non-zero if, for any mix, the largest
+size peaks more than --max-growth times higher than the smallest; this is the
+regression check for bounded-memory layout. tracemalloc slows layout down
+several times, so keep the sizes modest.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+# Its size is fixed by INLINE_CACHE_SIZE, and filling it would mask layout growth
+os.environ.setdefault("INLINE_CACHE_SIZE", "0")
+
+from benchmarks.corpora import MIXES, SIZES, generate
+from app.services.markdown_renderer import markdown_renderer
+from app.services.markdown_tokenizer import iter_lines, tokenize
+
+def layout_peak(content: str) -> tuple:
+    """Peak traced bytes, pages and seconds for laying out content"""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        with open(os.devnull, 'wb') as sink:
+            doc = markdown_renderer._new_document(sink)
+            markdown_renderer._layout(doc, tokenize(iter_lines(content)))
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, doc.page, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100KB,1MB", help=f"comma separated from {', '.join(SIZES)}, smallest first")
+    parser.add_argument("--mixes", default="code,mixed", help=f"comma separated from {', '.join(MIXES)}")
+    parser.add_argument("--max-growth", type=float, default=5.0, help="allowed peak ratio, largest size to smallest")
+    args = parser.parse_args()
+
+    # Warm up theme, font and inline caches outside the measurement
+    layout_peak(generate("mixed", 1024))
+    failed = False
+    print(f"{'corpus':>14} {'pages':>6} {'peak':>9} {'x input':>8} {'time':>8}")
+    for mix in args.mixes.split(','):
+        peaks = []
+        for size in args.sizes.split(','):
+            content = generate(mix, SIZES[size])
+            peak, pages, seconds = layout_peak(content)
+            peaks.append(peak)
+            print(f"{mix + ' ' + size:>14} {pages:>6} {peak / 2**20:>7.2f}MB "
+                  f"{peak / len(content):>7.2f}x {seconds:>7.1f}s")
+        growth = peaks[-1] / peaks[0]
+        if growth > args.max_growth:
+            failed = True
+            print(f"REGRESSION: {mix} peak grew {growth:.1f}x from {args.sizes.split(',')[0]}, over {args.max_growth}x")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Parallel section rendering benchmark: one document on one worker vs. split across the pool
+
+Run from the repository root:
+    [RENDER_WORKERS=4] python -m benchmarks.parallel_benchmark [--sizes 1MB,10MB] [--mixes mixed]
+
+Both paths go through MarkdownConverterService.convert_markdown_to_pdf with the
+result cache disabled. The speedup is bounded by the worker count and the number
+of CPU cores, and by the largest top-level section.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# Every conversion must really render, whatever its size
+os.environ.setdefault("CACHE_ENABLED", "false")
+
+from benchmarks.corpora import MIXES, SIZES, generate
+from app.services.markdown_service import markdown_service, section_parts
+from app.services.render_executor import render_executor
+
+async def convert(content: str, parallel: bool) -> tuple:
+    start = time.perf_counter()
+    result = await markdown_service.convert_markdown_to_pdf(content, "benchmark.md", parallel=parallel)
+    return time.perf_counter() - start, result.pages
+
+async def run(args):
+    workers = render_executor.max_workers
+    print(f"{workers} render workers on {os.cpu_count()} CPU cores")
+    print(f"{'corpus':>14} {'parts':>5} {'pages':>6} {'one worker':>11} {'sections':>9} {'speedup':>8}")
+    try:
+        # Start the worker processes before timing anything
+        await asyncio.gather(*(convert(generate("mixed", 1024), False) for _ in range(workers)))
+        for mix in args.mixes.split(','):
+            for size in args.sizes.split(','):
+                content = generate(mix, SIZES[size])
+                parts = len(section_parts(content, workers))
+                sequential, pages = await convert(content, False)
+                parallel, _ = await convert(content, True)
+                print(f"{mix + ' ' + size:>14} {parts:>5} {pages:>6} {sequential:>10.2f}s {parallel:>8.2f}s {sequential / parallel:>7.2f}x")
+    finally:
+        render_executor.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1MB", help=f"comma separated from {', '.join(SIZES)}")
+    parser.add_argument("--mixes", default="mixed", help=f"comma separated from {', '.join(MIXES)}")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
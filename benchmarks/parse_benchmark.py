@@ -0,0 +1,118 @@
+"""
+Block parsing benchmark: single-pass tokenizer vs. the original line-by-line loop
+
+Run from the repository root:
+    python -m benchmarks.parse_benchmark [--sizes 1,2,5] [--repeat 3]
+"""
+import argparse
+import re
+import time
+from app.services.markdown_tokenizer import (
+    tokenize, Token, HEADING, BULLET, ORDERED, CODE, QUOTE, TABLE, RULE, PARAGRAPH
+)
+
+BLOCK = """# Release Notes
+
+This is a paragraph with **bold**, *italic* and `inline code` plus a [link](https://example.com).
+
+## Features
+
+- **Bold text** and *italic text*
+- `Inline code` and code blocks
+1. First step
+2. Second step
+
+```python
+def hello_world():
+    print("Hello, World!")
+```
+
+| Feature | Status | Description |
+|---------|--------|-------------|
+| Markdown | yes | Full support |
+| PDF Output | yes | High quality |
+
+> This is a blockquote example.
+
+---
+
+"""
+
+def generate_document(size_mb: float) -> str:
+    """Deterministic markdown document of roughly size_mb megabytes"""
+    target = int(size_mb * 1024 * 1024)
+    return BLOCK * (target // len(BLOCK) + 1)
+
+def legacy_tokenize(md_content: str):
+    """The original _parse_markdown_exactly control flow, emitting tokens instead of flowables"""
+    tokens = []
+    lines = md_content.split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if not line:
+            i += 1
+            continue
+        if line.startswith('# '):
+            tokens.append(Token(HEADING, line[2:], level=1))
+        elif line.startswith('## '):
+            tokens.append(Token(HEADING, line[3:], level=2))
+        elif line.startswith('### '):
+            tokens.append(Token(HEADING, line[4:], level=3))
+        elif line.startswith('#### '):
+            tokens.append(Token(HEADING, line[5:], level=4))
+        elif line.startswith('- ') or line.startswith('* '):
+            tokens.append(Token(BULLET, line[2:]))
+        elif re.match(r'^\d+\. ', line):
+            tokens.append(Token(ORDERED, re.sub(r'^\d+\. ', '', line)))
+        elif line.startswith('```'):
+            code_lines = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith('```'):
+                code_lines.append(lines[i])
+                i += 1
+            if code_lines:
+                tokens.append(Token(CODE, '\n'.join(code_lines)))
+        elif line.startswith('> '):
+            tokens.append(Token(QUOTE, line[2:]))
+        elif '|' in line and i + 1 < len(lines) and '|' in lines[i + 1]:
+            table_data = []
+            while i < len(lines) and '|' in lines[i]:
+                table_data.append([cell.strip() for cell in lines[i].split('|')[1:-1]])
+                i += 1
+            tokens.append(Token(TABLE, rows=table_data))
+            continue
+        elif line.startswith('---') or line.startswith('***'):
+            tokens.append(Token(RULE))
+        else:
+            tokens.append(Token(PARAGRAPH, line))
+        i += 1
+    return tokens
+
+def best_of(repeat: int, fn, *args) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,2,5', help='document sizes in MB, comma separated')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'legacy':>10} {'tokenizer':>10} {'speedup':>8} {'tokenizer ms/MB':>16}")
+    for size_mb in [float(size) for size in args.sizes.split(',')]:
+        document = generate_document(size_mb)
+        assert list(tokenize(document.split('\n'))) == legacy_tokenize(document), "token streams differ"
+        legacy = best_of(args.repeat, legacy_tokenize, document)
+        single_pass = best_of(args.repeat, lambda text: list(tokenize(text.split('\n'))), document)
+        print(
+            f"{size_mb:>6.1f}MB {legacy * 1000:>8.1f}ms {single_pass * 1000:>8.1f}ms "
+            f"{legacy / single_pass:>7.2f}x {single_pass * 1000 / size_mb:>16.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Conversion pipeline benchmark over synthetic corpora, timed per stage
+
+Stages are measured separately so a regression can be pinned to one of them:
+    decode  bytes -> str of the uploaded markdown
+    parse   markdown -> flowables (_parse_markdown_exactly)
+    build   flowables -> PDF bytes (doc.build)
+    http    POST /api/v1/convert/markdown-to-pdf through an in-process ASGI client,
+            including the render pool round trip (the result cache is disabled)
+    import  cold "import app.main" in a fresh interpreter, reported once as startup/import;
+            also lists any rendering libraries (ReportLab, Pillow, markdown) the import loaded,
+            which only render workers should pay for
+
+Run from the repository root:
+    python -m benchmarks.pipeline_benchmark [--sizes 1KB,100KB,1MB] [--mixes mixed,table,code,list]
+                                            [--repeat 5] [--output results.json] [--baseline old.json]
+
+Use --sizes all to include the 10MB manual. With --baseline the run exits
+non-zero when any stage's p50 is slower than the baseline by more than --threshold.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Callable, List, Tuple
+
+# Every request must really render, and the 10MB corpus must pass the upload limit
+os.environ.setdefault("CACHE_ENABLED", "false")
+os.environ.setdefault("MAX_FILE_SIZE", str(64 * 1024 * 1024))
+# Back-to-back requests from one client would otherwise be rate limited
+os.environ.setdefault("ADMISSION_CLIENT_RATE", "0")
+
+from benchmarks.corpora import MIXES, SIZES, generate
+from app.services.markdown_renderer import markdown_renderer
+from app.services.render_executor import render_executor
+from app.services.theme_registry import theme_registry
+
+STAGES = ("decode", "parse", "build", "http", "import")
+
+# Libraries the server process should not load until it renders itself
+HEAVY_MODULES = ("reportlab", "PIL", "markdown")
+
+# Run in a fresh interpreter: seconds to import the app, then the heavy modules it loaded
+IMPORT_PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import app.main\n"
+    "print(time.perf_counter() - start)\n"
+    f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n"
+)
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def summarize(samples: List[float], size: int) -> dict:
+    p50 = percentile(samples, 0.50)
+    return {
+        "samples": len(samples),
+        "p50_ms": round(p50 * 1000, 4),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 4),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "throughput_mb_s": round(size / (1024 * 1024) / p50, 3) if p50 > 0 and size else None
+    }
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident set size so far; ru_maxrss is KB on Linux and bytes on macOS"""
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def time_sync(repeat: int, setup: Callable, fn: Callable) -> List[float]:
+    """Run fn(setup()) once to warm up, then repeat times timing only fn"""
+    fn(setup())
+    samples = []
+    for _ in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        fn(argument)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def time_import(repeat: int) -> Tuple[List[float], List[str]]:
+    """Cold import times of the app, each in a new interpreter, and the heavy modules it loaded"""
+    samples = []
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True
+        ).stdout.split("\n")
+        samples.append(float(output[0]))
+        loaded = [name for name in output[1].split(",") if name]
+    return samples, loaded
+
+def multipart_body(filename: str, data: bytes) -> Tuple[bytes, str]:
+    boundary = "pipelinebenchmarkboundary"
+    body = b"".join([
+        f"--{boundary}\r\n".encode(),
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode(),
+        b"Content-Type: text/markdown\r\n\r\n",
+        data,
+        f"\r\n--{boundary}--\r\n".encode()
+    ])
+    return body, f"multipart/form-data; boundary={boundary}"
+
+async def asgi_post(app, path: str, body: bytes, content_type: str) -> Tuple[int, int]:
+    """Minimal in-process ASGI client: one POST, returns (status, response body length)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"benchmark"),
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode())
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80)
+    }
+    request_sent = False
+    status = 0
+    length = 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Never disconnect while the response is streaming
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, length
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            length += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, length
+
+async def time_http(app, repeat: int, data: bytes) -> List[float]:
+    body, content_type = multipart_body("benchmark.md", data)
+    samples = []
+    # The first request also pays for starting the render pool; keep it out of the samples
+    for attempt in range(repeat + 1):
+        start = time.perf_counter()
+        status, length = await asgi_post(app, "/api/v1/convert/markdown-to-pdf", body, content_type)
+        if attempt:
+            samples.append(time.perf_counter() - start)
+        if status != 200 or not length:
+            raise RuntimeError(f"HTTP conversion failed with status {status}")
+    return samples
+
+def measure_corpus(mix: str, size_name: str, repeat: int, stages: List[str]) -> Tuple[dict, bytes]:
+    data = generate(mix, SIZES[size_name]).encode("utf-8")
+    content = data.decode("utf-8")
+    theme = theme_registry.get(None)
+    results = {}
+
+    if "decode" in stages:
+        results["decode"] = summarize(time_sync(repeat, lambda: data, lambda raw: raw.decode("utf-8")), len(data))
+    if "parse" in stages:
+        results["parse"] = summarize(
+            time_sync(repeat, lambda: content, lambda text: markdown_renderer._parse_markdown_exactly(text, theme)),
+            len(data)
+        )
+    if "build" in stages:
+        # doc.build consumes its flowables, so each run gets a freshly parsed list
+        def build(elements):
+            markdown_renderer._new_document(io.BytesIO()).build(elements)
+        results["build"] = summarize(
+            time_sync(repeat, lambda: markdown_renderer._parse_markdown_exactly(content, theme), build),
+            len(data)
+        )
+    return results, data
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> int:
+    """Print p50 changes against a baseline run; returns the number of regressions"""
+    previous = {(item["mix"], item["size"]): item for item in baseline}
+    regressions = 0
+    print(f"\n{'corpus':<16} {'stage':<7} {'baseline':>11} {'current':>11} {'change':>8}")
+    for item in results:
+        old = previous.get((item["mix"], item["size"]))
+        if old is None:
+            continue
+        for stage, stats in item["stages"].items():
+            if stage not in old["stages"]:
+                continue
+            before = old["stages"][stage]["p50_ms"]
+            after = stats["p50_ms"]
+            change = (after - before) / before if before else 0.0
+            marker = ""
+            if change > threshold:
+                regressions += 1
+                marker = "  REGRESSION"
+            print(
+                f"{item['mix'] + '/' + item['size']:<16} {stage:<7} "
+                f"{before:>9.2f}ms {after:>9.2f}ms {change * 100:>+7.1f}%{marker}"
+            )
+    return regressions
+
+async def run(args) -> int:
+    sizes = list(SIZES) if args.sizes == "all" else args.sizes.split(",")
+    mixes = args.mixes.split(",")
+    stages = args.stages.split(",")
+    for name in sizes:
+        if name not in SIZES:
+            raise SystemExit(f"Unknown size '{name}', choose from {', '.join(SIZES)}")
+    for name in mixes:
+        if name not in MIXES:
+            raise SystemExit(f"Unknown mix '{name}', choose from {', '.join(MIXES)}")
+
+    app = None
+    if "http" in stages:
+        from app.main import app
+
+    results = []
+    print(f"{'corpus':<16} {'bytes':>10} {'stage':<7} {'p50':>10} {'p99':>10} {'MB/s':>8} {'peak RSS':>9}")
+    if "import" in stages:
+        samples, loaded = time_import(args.repeat)
+        stats = summarize(samples, 0)
+        results.append({"mix": "startup", "size": "import", "bytes": 0, "stages": {"import": stats}, "loaded": loaded})
+        print(f"{'startup/import':<16} {0:>10} {'import':<7} {stats['p50_ms']:>8.3f}ms {stats['p99_ms']:>8.3f}ms")
+        if loaded:
+            print(f"  importing app.main loaded {', '.join(loaded)}; these should only load in render workers")
+    corpus_stages = [stage for stage in stages if stage != "import"]
+    for size_name in sizes if corpus_stages else ():
+        for mix in mixes:
+            stage_results, data = measure_corpus(mix, size_name, args.repeat, stages)
+            if app is not None:
+                stage_results["http"] = summarize(await time_http(app, args.repeat, data), len(data))
+            item = {
+                "mix": mix,
+                "size": size_name,
+                "bytes": len(data),
+                "stages": stage_results,
+                "peak_rss_mb": peak_rss_mb()
+            }
+            results.append(item)
+            for stage, stats in stage_results.items():
+                print(
+                    f"{mix + '/' + size_name:<16} {len(data):>10} {stage:<7} "
+                    f"{stats['p50_ms']:>8.3f}ms {stats['p99_ms']:>8.3f}ms "
+                    f"{stats['throughput_mb_s'] or 0:>8.2f} {item['peak_rss_mb']:>7.1f}MB"
+                )
+
+    # Worker processes only show up in RUSAGE_CHILDREN once they have exited
+    render_executor.shutdown()
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "render_workers": render_executor.max_workers,
+            "repeat": args.repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_worker_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)
+        },
+        "results": results
+    }
+    print(f"\npeak RSS: {report['meta']['peak_rss_mb']}MB (server), {report['meta']['peak_worker_rss_mb']}MB (render worker)")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline)["results"], args.threshold)
+        if regressions:
+            print(f"\n{regressions} stage(s) slower than baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1KB,100KB,1MB", help=f"comma separated from {', '.join(SIZES)}, or 'all'")
+    parser.add_argument("--mixes", default=",".join(MIXES), help="comma separated corpus mixes")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma separated stages to time")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown counted as a regression")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+if __name__ == "__main__":
+    main()
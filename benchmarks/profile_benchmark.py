@@ -0,0 +1,68 @@
+"""
+Output profile benchmark: file size and render time of "compact" vs. "fast"
+
+Run from the repository root:
+    python -m benchmarks.profile_benchmark [--sizes 100KB,1MB] [--mixes mixed,code] [--ttf] [--repeat 3]
+
+Each corpus is built in process once per profile and the best of --repeat
+runs is reported. --ttf draws the themes in the Vera TrueType fonts bundled
+with ReportLab instead of the built-in fonts, so the embedded font subsets
+are part of the comparison.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import reportlab
+
+# Fonts are registered on first use, so they are configured before the app is imported
+if "--ttf" in sys.argv:
+    _fonts = os.path.join(os.path.dirname(reportlab.__file__), "fonts")
+    os.environ["PDF_FONT_FILES"] = json.dumps({
+        "Helvetica": os.path.join(_fonts, "Vera.ttf"),
+        "Helvetica-Bold": os.path.join(_fonts, "VeraBd.ttf"),
+        "Courier": os.path.join(_fonts, "Vera.ttf")
+    })
+
+from benchmarks.corpora import MIXES, SIZES, generate
+from app.core.config import settings
+from app.services.markdown_renderer import markdown_renderer
+from app.services.output_profiles import OUTPUT_PROFILES
+
+def build(content: str, profile: str, repeat: int) -> tuple:
+    """Best seconds, size and pages for building content with profile"""
+    settings.PDF_OUTPUT_PROFILE = profile
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = markdown_renderer.build_pdf(content)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+        if result.path is not None:
+            os.unlink(result.path)
+    return best, result.size, result.pages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100KB,1MB", help=f"comma separated from {', '.join(SIZES)}")
+    parser.add_argument("--mixes", default="mixed,code", help=f"comma separated from {', '.join(MIXES)}")
+    parser.add_argument("--ttf", action="store_true", help="embed TrueType fonts instead of using the built-in ones")
+    parser.add_argument("--repeat", type=int, default=3, help="builds per corpus and profile")
+    args = parser.parse_args()
+
+    profiles = list(OUTPUT_PROFILES)
+    print(f"fonts: {'TrueType subsets' if args.ttf else 'built-in'}")
+    print(f"{'corpus':>14} {'pages':>6} " + " ".join(f"{name + ' size':>13} {name + ' time':>13}" for name in profiles))
+    for mix in args.mixes.split(','):
+        for size in args.sizes.split(','):
+            content = generate(mix, SIZES[size])
+            results = {profile: build(content, profile, args.repeat) for profile in profiles}
+            pages = results[profiles[0]][2]
+            columns = " ".join(
+                f"{results[name][1] / 1024:>11.0f}KB {results[name][0]:>12.2f}s" for name in profiles
+            )
+            print(f"{mix + ' ' + size:>14} {pages:>6} {columns}")
+
+if __name__ == "__main__":
+    main()
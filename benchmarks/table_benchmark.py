@@ -0,0 +1,74 @@
+"""
+Large table benchmark: paged large-table layout vs. one auto-sized Table
+
+Run from the repository root:
+    python -m benchmarks.table_benchmark [--rows 1000,10000,100000] [--legacy-max 10000]
+
+The auto-sized Table is quadratic in its row count, so it is only timed up to
+--legacy-max rows.
+"""
+import argparse
+import io
+import resource
+import time
+from reportlab.platypus import Spacer, Table
+from app.core.config import settings
+from app.services.markdown_renderer import markdown_renderer
+from app.services.markdown_tokenizer import TABLE
+from app.services.theme_registry import theme_registry
+
+def generate_table(rows: int) -> str:
+    """A CSV-export style markdown table with deterministic contents"""
+    lines = ["| Id | Customer | Region | Amount | Status |", "|----|----------|--------|--------|--------|"]
+    for index in range(rows):
+        lines.append(
+            f"| {index} | Customer {index * 7919 % 10007} | Region {index % 12} "
+            f"| {index * 37 % 100000 / 100:.2f} | {('open', 'paid', 'overdue')[index % 3]} |"
+        )
+    return "\n".join(lines) + "\n"
+
+def legacy_table_flowables(self, token, theme):
+    """The original table branch: one Table measured and split as a whole"""
+    table = Table(token.rows)
+    table.setStyle(theme.table_style)
+    return [table, Spacer(1, 20)]
+
+def render(content: str) -> tuple:
+    theme = theme_registry.get()
+    buffer = io.BytesIO()
+    doc = markdown_renderer._new_document(buffer)
+    start = time.perf_counter()
+    doc.build(markdown_renderer._parse_markdown_exactly(content, theme))
+    return time.perf_counter() - start, doc.page, buffer.tell()
+
+def render_legacy(content: str) -> tuple:
+    handlers = markdown_renderer._token_flowables
+    original = handlers[TABLE]
+    handlers[TABLE] = legacy_table_flowables
+    try:
+        return render(content)
+    finally:
+        handlers[TABLE] = original
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='1000,10000,100000', help='table sizes in rows, comma separated')
+    parser.add_argument('--legacy-max', type=int, default=10000, help='largest table timed with the auto-sized Table')
+    args = parser.parse_args()
+
+    print(f"large-table layout above {settings.TABLE_LARGE_ROWS} rows, columns sized from {settings.TABLE_SAMPLE_ROWS} sampled rows")
+    print(f"{'rows':>8} {'pages':>6} {'large table':>12} {'us/row':>7} {'legacy':>10} {'speedup':>8} {'peak RSS':>9}")
+    for rows in [int(size) for size in args.rows.split(',')]:
+        content = generate_table(rows)
+        seconds, pages, _ = render(content)
+        legacy = f"{'-':>10} {'-':>8}"
+        if rows <= args.legacy_max:
+            legacy_seconds, _, _ = render_legacy(content)
+            legacy = f"{legacy_seconds:>9.2f}s {legacy_seconds / seconds:>7.1f}x"
+        print(f"{rows:>8} {pages:>6} {seconds:>11.2f}s {seconds * 1e6 / rows:>7.0f} {legacy} {peak_rss_mb():>7.0f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, Response
 import markdown
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
@@ -7,9 +7,7 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, mm
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-import tempfile
+import io
 import os
 from pathlib import Path
 import re
@@ -395,13 +393,12 @@ async def convert_md_to_pdf(file: UploadFile = File(...)):
         content = await file.read()
         md_content = content.decode('utf-8')
         
-        # Create a temporary file for the PDF
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            pdf_path = tmp_file.name
+        # Build the PDF in memory; nothing is left behind on disk
+        buffer = io.BytesIO()
         
         # Create PDF document with exact margins
         doc = SimpleDocTemplate(
-            pdf_path, 
+            buffer, 
             pagesize=A4,
             rightMargin=30*mm,
             leftMargin=30*mm,
@@ -416,10 +413,10 @@ async def convert_md_to_pdf(file: UploadFile = File(...)):
         doc.build(elements)
         
         # Return the PDF file for download
-        return FileResponse(
-            path=pdf_path,
-            filename=f"{Path(file.filename).stem}.pdf",
-            media_type='application/pdf'
+        return Response(
+            content=buffer.getvalue(),
+            media_type='application/pdf',
+            headers={"Content-Disposition": f'attachment; filename="{Path(file.filename).stem}.pdf"'}
         )
         
     except Exception as e:
@@ -1,12 +1,8 @@
-import uvicorn
-from app.main import app
 from app.core.config import settings
+from app.core.server import run_development, run_production
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=True,
-        log_level="info"
-    )
+    if settings.SERVER_MODE == "production":
+        run_production()
+    else:
+        run_development()